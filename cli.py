@@ -0,0 +1,369 @@
+"""
+影片下載器命令列介面
+
+不依賴 PySide6，可在沒有圖形環境的伺服器上執行，
+透過 core.download_manager.DownloadManager 並行下載單一或批量 URL
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import sys
+import threading
+from typing import List, Optional, Iterable, TextIO
+
+from core.url_utils import clean_url, validate_url, iter_urls
+from core.short_links import resolve_short_urls
+from core.downloader_strategy import probe_tools
+from core.bandwidth import BandwidthGovernor, parse_rate
+from core.progress import format_size, format_speed, format_eta
+
+# 結束碼
+EXIT_OK = 0              # 全部下載成功
+EXIT_FAILED = 1          # 至少一個下載失敗
+EXIT_USAGE = 2           # 參數錯誤或沒有可下載的 URL
+EXIT_MISSING_DEPS = 3    # 缺少必要的依賴程式
+EXIT_INTERRUPTED = 130   # 使用者中斷 (Ctrl+C)
+
+# 預設輸出目錄
+DEFAULT_OUTPUT_DIR = os.path.join(os.path.expanduser("~"), "Downloads")
+
+
+def rate_argument(value: str) -> Optional[int]:
+    """解析 --limit-rate 參數"""
+    try:
+        return parse_rate(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """建立命令列參數解析器"""
+    parser = argparse.ArgumentParser(
+        prog="ytdl",
+        description="YouTube / Bilibili 影片下載器",
+    )
+    parser.add_argument("urls", nargs="*", metavar="URL", help="要下載的影片 URL")
+    parser.add_argument("-b", "--batch", metavar="FILE",
+                        help="從檔案擷取所有 URL (可為任意文字，# 開頭的行為註解)，使用 - 表示標準輸入")
+    parser.add_argument("-o", "--output", default=DEFAULT_OUTPUT_DIR, metavar="DIR",
+                        help=f"輸出目錄 (預設: {DEFAULT_OUTPUT_DIR})")
+    parser.add_argument("-t", "--template", metavar="TEMPLATE",
+                        help="輸出檔名模板 (yt-dlp 語法，如 \"%%(uploader)s/%%(title)s.%%(ext)s\")")
+    parser.add_argument("-f", "--format", choices=["video", "audio", "mp3"], default="video",
+                        help="下載格式：video 為 MP4 影片，audio 為原始音訊 (不轉檔，m4a/opus)，"
+                             "mp3 為轉檔後的 MP3 音訊 (預設: video)")
+    parser.add_argument("-q", "--quality", type=int, metavar="HEIGHT",
+                        help="影片畫質高度，如 1080、720 (預設: 最佳畫質)")
+    parser.add_argument("-j", "--jobs", type=int, default=3, metavar="N",
+                        help="同時下載數量 (預設: 3)")
+    parser.add_argument("-r", "--limit-rate", type=rate_argument, metavar="RATE",
+                        help="所有下載合計的頻寬上限，如 500K、2M (平均分配給執行中的任務)")
+    parser.add_argument("--no-archive", action="store_true",
+                        help="不略過下載記錄中已下載過的影片")
+    parser.add_argument("--json", action="store_true",
+                        help="以 JSON Lines 格式在標準輸出回報任務狀態和進度")
+    parser.add_argument("-v", "--verbose", action="store_true", help="顯示詳細下載日誌")
+    parser.add_argument("--check", action="store_true", help="檢查依賴程式後結束")
+    return parser
+
+
+def read_urls(stream: Iterable[str]) -> List[str]:
+    """
+    從文字串流擷取所有影片 URL (每行不限一個，可以是聊天記錄等任意文字)
+    
+    Args:
+        stream: 檔案或標準輸入 (逐行讀取，不會載入整個檔案)
+    
+    Returns:
+        標準化且去除重複的 URL 列表 (已略過 # 開頭的註解行)
+    """
+    lines = (line for line in stream if not line.lstrip().startswith("#"))
+    return [item.url for item in iter_urls(lines)]
+
+
+def check_dependencies(out: TextIO = sys.stdout) -> int:
+    """
+    檢查依賴程式
+    
+    Args:
+        out: 輸出串流
+    
+    Returns:
+        結束碼，缺少必要依賴時返回 EXIT_MISSING_DEPS
+    """
+    missing = False
+    
+    if importlib.util.find_spec("yt_dlp") is not None:
+        from yt_dlp.version import __version__ as ytdlp_version
+        print(f"[OK]   yt-dlp {ytdlp_version}", file=out)
+    else:
+        print("[缺少] yt-dlp (pip install yt-dlp)", file=out)
+        missing = True
+    
+    tools = probe_tools()
+    
+    ffmpeg = tools.get("ffmpeg")
+    if ffmpeg:
+        print(f"[OK]   FFmpeg: {ffmpeg}", file=out)
+    else:
+        print("[缺少] FFmpeg (合併影音及轉檔需要)", file=out)
+        missing = True
+    
+    aria2c = tools.get("aria2c")
+    if aria2c:
+        print(f"[OK]   aria2c: {aria2c}", file=out)
+    else:
+        print("[可選] aria2c 未安裝，將全部使用內建下載器", file=out)
+    
+    if importlib.util.find_spec("PySide6") is not None:
+        print("[OK]   PySide6 (圖形界面)", file=out)
+    else:
+        print("[可選] PySide6 未安裝，只能使用命令列", file=out)
+    
+    return EXIT_MISSING_DEPS if missing else EXIT_OK
+
+
+class CliReporter:
+    """將任務狀態、進度和日誌輸出到終端機或 JSON Lines"""
+    
+    # 任務狀態顯示文字
+    STATUS_TEXT = {
+        "queued": "等待中",
+        "running": "下載中",
+        "postprocessing": "後處理中",
+        "completed": "完成",
+        "failed": "失敗",
+        "removed": "已移除",
+        "skipped": "已下載過",
+        "paused": "已暫停",
+        "cancelled": "已取消",
+    }
+    
+    def __init__(self, json_mode: bool = False, verbose: bool = False):
+        """
+        初始化輸出器
+        
+        Args:
+            json_mode: 是否輸出 JSON Lines
+            verbose: 是否輸出下載日誌
+        """
+        self.json_mode = json_mode
+        self.verbose = verbose
+        self.show_progress = not json_mode and sys.stderr.isatty()
+        self._lock = threading.Lock()
+        self._progress_line = False
+        self._aggregator = None
+    
+    def attach(self, aggregator):
+        """
+        訂閱下載管理器的進度彙整器
+        
+        Args:
+            aggregator: ProgressAggregator，同時用於計算所有任務的合計進度
+        """
+        self._aggregator = aggregator
+        aggregator.subscribe(self.on_snapshots)
+    
+    def emit(self, event: str, **data):
+        """輸出一行 JSON 事件"""
+        data["event"] = event
+        with self._lock:
+            sys.stdout.write(json.dumps(data, ensure_ascii=False) + "\n")
+            sys.stdout.flush()
+    
+    def message(self, text: str):
+        """輸出一般訊息到標準錯誤"""
+        with self._lock:
+            self._clear_progress_line()
+            print(text, file=sys.stderr, flush=True)
+    
+    def on_job(self, job):
+        """任務狀態變更 (在工作線程中呼叫)"""
+        if self.json_mode:
+            self.emit("job", **job.to_dict())
+        elif job.status != "queued":
+            text = f"[{self.STATUS_TEXT.get(job.status, job.status)}] {job.title or job.url}"
+            if job.error:
+                text += f" ({job.error})"
+            self.message(text)
+    
+    def on_log(self, job_id: str, message: str, log_type: int):
+        """下載日誌 (在工作線程中呼叫)，非詳細模式只輸出警告和錯誤"""
+        if not self.verbose and log_type < 2:
+            return
+        if self.json_mode:
+            self.emit("log", job_id=job_id, message=message, level=log_type)
+        else:
+            self.message(f"  {message}")
+    
+    def on_snapshots(self, snapshots):
+        """進度快照 (在進度彙整線程中呼叫，約 10 Hz)"""
+        totals = self._aggregator.get_totals() if self._aggregator is not None else None
+        
+        if self.json_mode:
+            for snapshot in snapshots:
+                self.emit("progress", **snapshot.to_dict())
+            if totals is not None:
+                self.emit("totals", **totals)
+            return
+        
+        if not self.show_progress:
+            return
+        
+        if totals is not None and totals['jobs'] > 1:
+            # 多個任務同時下載時顯示合計進度
+            downloaded = totals['downloaded_bytes']
+            text = f"[{totals['jobs']} 個任務] {format_size(downloaded)}"
+            if totals['total_bytes']:
+                percent = min(downloaded / totals['total_bytes'] * 100, 100.0)
+                text += f" / {format_size(totals['total_bytes'])} ({percent:.1f}%)"
+            speed, eta = format_speed(totals['speed']), format_eta(totals['eta'])
+        else:
+            snapshot = snapshots[-1]
+            text = f"{snapshot.progress:5.1f}% {snapshot.filename[:50]}"
+            if snapshot.postprocessor:
+                text += f" [{snapshot.postprocessor}]"
+            speed, eta = snapshot.speed_str, snapshot.eta_str
+        
+        if speed:
+            text += f" {speed}"
+        if eta:
+            text += f" 剩餘 {eta}"
+        
+        with self._lock:
+            sys.stderr.write("\r\033[K" + text)
+            sys.stderr.flush()
+            self._progress_line = True
+    
+    def _clear_progress_line(self):
+        """清除進度行 (呼叫時需持有鎖)"""
+        if self._progress_line:
+            sys.stderr.write("\r\033[K")
+            self._progress_line = False
+
+
+def run_downloads(urls: List[str], args: argparse.Namespace) -> int:
+    """
+    並行下載所有 URL 並等待完成
+    
+    Args:
+        urls: URL 列表
+        args: 命令列參數
+    
+    Returns:
+        結束碼
+    """
+    reporter = CliReporter(json_mode=args.json, verbose=args.verbose)
+    
+    valid_urls = []
+    invalid_count = 0
+    for url in urls:
+        if validate_url(url):
+            valid_urls.append(clean_url(url))
+        else:
+            invalid_count += 1
+            if args.json:
+                reporter.emit("invalid_url", url=url)
+            else:
+                reporter.message(f"[略過] 不支援的 URL: {url}")
+    
+    if not valid_urls:
+        reporter.message("沒有可下載的 URL")
+        return EXIT_USAGE
+    
+    # 並行解析短網址，解析後指向同一部影片的 URL 只下載一次
+    valid_urls = list(dict.fromkeys(resolve_short_urls(valid_urls)))
+    
+    # 延遲匯入，讓 --check 和參數錯誤不需要載入 yt-dlp
+    try:
+        from core.download_manager import DownloadManager, JobStatus
+    except ImportError as e:
+        reporter.message(f"無法載入下載模組: {str(e)} (請執行 ytdl --check)")
+        return EXIT_MISSING_DEPS
+    
+    manager = DownloadManager(
+        max_workers=max(1, args.jobs),
+        job_callback=reporter.on_job,
+        log_callback=reporter.on_log,
+        governor=BandwidthGovernor(total_rate=args.limit_rate),
+    )
+    reporter.attach(manager.progress_aggregator)
+    
+    audio_only = args.format in ("audio", "mp3")
+    format_str = "mp3" if args.format == "mp3" else "best"
+    if not audio_only and args.quality:
+        format_str = f"{args.quality}p"
+    
+    for url in valid_urls:
+        # 播放清單、頻道和多P影片會在背景展開為多個任務
+        manager.submit(url, args.output, format_str, audio_only, output_template=args.template,
+                       skip_archived=not args.no_archive)
+    
+    try:
+        manager.wait()
+    except KeyboardInterrupt:
+        manager.shutdown()
+        reporter.message("已中斷下載")
+        return EXIT_INTERRUPTED
+    finally:
+        manager.progress_aggregator.flush()
+        manager.progress_aggregator.stop()
+    
+    jobs = manager.get_jobs()
+    completed = sum(1 for job in jobs if job.status == JobStatus.COMPLETED)
+    skipped = sum(1 for job in jobs if job.status == JobStatus.SKIPPED)
+    failed = len(jobs) - completed - skipped + invalid_count
+    
+    if args.json:
+        reporter.emit("summary", total=len(jobs) + invalid_count, completed=completed,
+                      skipped=skipped, failed=failed)
+    else:
+        reporter.message(f"完成 {completed} 個，略過 {skipped} 個，失敗 {failed} 個")
+    
+    return EXIT_OK if failed == 0 else EXIT_FAILED
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    命令列入口點
+    
+    Args:
+        argv: 命令列參數，預設為 sys.argv[1:]
+    
+    Returns:
+        結束碼
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    
+    if args.check:
+        return check_dependencies()
+    
+    if args.jobs < 1:
+        parser.error("--jobs 必須大於 0")
+    
+    urls = list(args.urls)
+    if args.batch == "-":
+        urls.extend(read_urls(sys.stdin))
+    elif args.batch:
+        try:
+            with open(args.batch, "r", encoding="utf-8") as f:
+                urls.extend(read_urls(f))
+        except OSError as e:
+            print(f"無法讀取批量檔案: {str(e)}", file=sys.stderr)
+            return EXIT_USAGE
+    elif not urls and not sys.stdin.isatty():
+        # 沒有指定 URL 時讀取管線輸入 (如 cat urls.txt | ytdl)
+        urls.extend(read_urls(sys.stdin))
+    
+    if not urls:
+        parser.print_usage(sys.stderr)
+        return EXIT_USAGE
+    
+    return run_downloads(urls, args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+"""
+下載記錄模組
+
+記錄已下載完成的影片 (平台、影片 ID、格式設定)，讓批量和播放清單下載
+在解析影片資訊之前就能略過已下載的項目。記錄以只附加的文字檔保存，
+啟動時載入到記憶體中的集合，查詢為 O(1)
+"""
+
+import os
+import threading
+from typing import Optional
+
+from utils.paths import get_data_dir
+
+
+def make_format_profile(format_str: str = "best", audio_only: bool = False) -> str:
+    """
+    獲取格式設定的代表字串，同一部影片以不同格式下載視為不同項目
+    
+    Args:
+        format_str: 格式字串，如 "best", "1080p", "720p" 等
+        audio_only: 是否僅下載音訊
+    
+    Returns:
+        格式設定字串，如 "audio", "mp3", "best", "720p"
+    """
+    if format_str == "mp3":
+        return "mp3"
+    if audio_only or format_str == "bestaudio":
+        return "audio"
+    return format_str or "best"
+
+
+class DownloadArchive:
+    """已下載影片的記錄，以 (平台, 影片 ID, 格式設定) 為鍵"""
+    
+    # 記錄檔案名稱
+    FILENAME = "download_archive.txt"
+    
+    def __init__(self, path: Optional[str] = None):
+        """
+        初始化下載記錄
+        
+        Args:
+            path: 記錄檔路徑，預設為使用者資料目錄
+        """
+        self.path = path or os.path.join(get_data_dir(), self.FILENAME)
+        
+        self._lock = threading.Lock()
+        self._keys = set()
+        self._load()
+    
+    @staticmethod
+    def make_key(platform: str, video_id: str, profile: str) -> str:
+        """組合記錄鍵 (欄位以空白分隔，與記錄檔的每一行相同)"""
+        return f"{platform} {video_id} {profile}"
+    
+    def contains(self, platform: str, video_id: str, profile: str) -> bool:
+        """
+        檢查影片是否已下載
+        
+        Args:
+            platform: 平台名稱
+            video_id: 影片 ID
+            profile: 格式設定 (見 make_format_profile)
+        
+        Returns:
+            是否已有下載記錄
+        """
+        return self.make_key(platform, video_id, profile) in self._keys
+    
+    def add(self, platform: str, video_id: str, profile: str):
+        """
+        新增下載記錄
+        
+        Args:
+            platform: 平台名稱
+            video_id: 影片 ID
+            profile: 格式設定 (見 make_format_profile)
+        """
+        key = self.make_key(platform, video_id, profile)
+        
+        with self._lock:
+            if key in self._keys:
+                return
+            
+            try:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(key + "\n")
+            except OSError as e:
+                print(f"寫入下載記錄失敗: {str(e)}")
+                return
+            
+            self._keys.add(key)
+    
+    def __len__(self) -> int:
+        """記錄數量"""
+        return len(self._keys)
+    
+    def _load(self):
+        """載入記錄檔"""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self._keys = {line.strip() for line in f if line.strip()}
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"讀取下載記錄失敗: {str(e)}")
+
+
+# 全域共用的下載記錄 (延遲建立)
+_archive = None
+_archive_lock = threading.Lock()
+
+def get_download_archive() -> DownloadArchive:
+    """
+    獲取全域下載記錄
+    
+    Returns:
+        下載記錄實例
+    """
+    global _archive
+    
+    with _archive_lock:
+        if _archive is None:
+            _archive = DownloadArchive()
+        return _archive
@@ -0,0 +1,294 @@
+"""
+頻寬與連線數分配模組
+
+在所有同時執行的下載任務之間分配總頻寬和連線數：每個任務分得總頻寬的
+相同份額，同一平台的任務共用連線數上限，任務開始或結束時立即重新分配，
+避免多個任務同時下載時連線數倍增而被平台限速 (如 YouTube 的 HTTP 429)
+"""
+
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, Optional
+
+
+def parse_rate(value: str) -> Optional[int]:
+    """
+    解析頻寬字串
+    
+    Args:
+        value: 頻寬字串，如 "500K", "2.5M", "1G" (位元組/秒)，"0" 表示不限制
+    
+    Returns:
+        位元組/秒，不限制時返回 None
+    
+    Raises:
+        ValueError: 格式不正確
+    """
+    match = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*([KMG]?)(?:i?B)?\s*', value, re.IGNORECASE)
+    if not match:
+        raise ValueError(f"無效的頻寬: {value}")
+    
+    number, unit = match.groups()
+    rate = int(float(number) * 1024 ** " KMG".index(unit.upper() or " "))
+    return rate or None
+
+
+class TokenBucket:
+    """令牌桶限速器，可以在使用中調整速率"""
+    
+    # 桶的容量 (以秒計的突發量)
+    BURST_SECONDS = 1.0
+    
+    def __init__(self, rate: float):
+        """
+        初始化令牌桶
+        
+        Args:
+            rate: 速率 (位元組/秒)
+        """
+        self._lock = threading.Lock()
+        self._rate = rate
+        self._tokens = rate * self.BURST_SECONDS
+        self._last = time.monotonic()
+    
+    def set_rate(self, rate: float):
+        """調整速率 (已累積的令牌不超過新的容量)"""
+        with self._lock:
+            self._refill()
+            self._rate = rate
+            self._tokens = min(self._tokens, rate * self.BURST_SECONDS)
+    
+    def consume(self, amount: int) -> float:
+        """
+        取用令牌 (允許透支，由呼叫端等待透支的部分補回)
+        
+        Args:
+            amount: 位元組數
+        
+        Returns:
+            需要等待的秒數
+        """
+        with self._lock:
+            self._refill()
+            self._tokens -= amount
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self._rate
+    
+    def _refill(self):
+        """依經過的時間補充令牌"""
+        now = time.monotonic()
+        self._tokens = min(self._rate * self.BURST_SECONDS,
+                           self._tokens + (now - self._last) * self._rate)
+        self._last = now
+
+
+class Allocation:
+    """單一下載任務分得的頻寬和連線數，任務開始或結束時由分配器更新"""
+    
+    # 單次等待的最長時間 (秒)，避免長時間阻塞而延遲取消
+    MAX_SLEEP = 1.0
+    
+    def __init__(self, host: str, max_connections: Optional[int] = None,
+                 max_rate: Optional[float] = None):
+        """
+        初始化分配
+        
+        Args:
+            host: 任務所屬的平台 (連線數上限以平台為單位)
+            max_connections: 該平台所有任務合計的連線數上限，None 表示使用分配器的預設值
+            max_rate: 該平台所有任務合計的頻寬上限 (位元組/秒)，None 表示不限制
+        """
+        self.host = host
+        self.max_connections = max_connections
+        self.max_rate = max_rate
+        self.rate = None        # 頻寬 (位元組/秒)，None 表示不限制
+        self.connections = 1    # 單一檔案的連線數
+        self.fragments = 1      # 分段串流的並行下載數
+        
+        self._lock = threading.Lock()
+        self._bucket = None
+        self._counters = {}     # 檔名 -> 已計入的位元組數
+    
+    def update(self, rate: Optional[float], connections: int, fragments: int):
+        """更新分配 (由分配器呼叫)"""
+        with self._lock:
+            self.rate = rate
+            self.connections = connections
+            self.fragments = fragments
+            
+            if rate is None:
+                self._bucket = None
+            elif self._bucket is None:
+                self._bucket = TokenBucket(rate)
+            else:
+                self._bucket.set_rate(rate)
+    
+    def throttle(self, status: Dict[str, Any]):
+        """
+        依 yt-dlp 的進度回調計入下載量，超過分得的頻寬時等待 (在進度回調中呼叫)
+        
+        yt-dlp 的內建下載器在同一線程中讀取資料並呼叫進度回調，
+        因此在回調中等待就能限制內建下載器的速度
+        
+        Args:
+            status: yt-dlp 進度字典
+        """
+        key = status.get('filename')
+        if status.get('status') != 'downloading':
+            with self._lock:
+                self._counters.pop(key, None)
+            return
+        
+        downloaded = status.get('downloaded_bytes') or 0
+        with self._lock:
+            delta = downloaded - self._counters.get(key, 0)
+            self._counters[key] = downloaded
+            bucket = self._bucket
+        
+        if bucket is None or delta <= 0:
+            return
+        
+        delay = bucket.consume(delta)
+        if delay > 0:
+            time.sleep(min(delay, self.MAX_SLEEP))
+
+
+# 各線程目前執行中的下載任務分配
+_local = threading.local()
+
+
+def get_current_allocation() -> Optional[Allocation]:
+    """獲取目前線程的下載任務分配"""
+    return getattr(_local, 'allocation', None)
+
+
+class BandwidthGovernor:
+    """全域頻寬與連線數分配器"""
+    
+    # 同一平台所有任務合計的連線數上限
+    DEFAULT_MAX_CONNECTIONS_PER_HOST = 16
+    
+    # 所有任務合計的分段並行下載數上限
+    DEFAULT_MAX_FRAGMENTS = 16
+    
+    def __init__(self, total_rate: Optional[float] = None,
+                 max_connections_per_host: int = DEFAULT_MAX_CONNECTIONS_PER_HOST,
+                 max_fragments: int = DEFAULT_MAX_FRAGMENTS):
+        """
+        初始化分配器
+        
+        Args:
+            total_rate: 所有任務合計的頻寬 (位元組/秒)，None 表示不限制
+            max_connections_per_host: 同一平台所有任務合計的連線數上限
+            max_fragments: 所有任務合計的分段並行下載數上限
+        """
+        self.total_rate = total_rate
+        self.max_connections_per_host = max(1, int(max_connections_per_host))
+        self.max_fragments = max(1, int(max_fragments))
+        
+        self._lock = threading.Lock()
+        self._allocations = []
+    
+    @property
+    def active_count(self) -> int:
+        """執行中的任務數量"""
+        with self._lock:
+            return len(self._allocations)
+    
+    def set_total_rate(self, total_rate: Optional[float]):
+        """
+        設定總頻寬，立即重新分配給執行中的任務
+        
+        Args:
+            total_rate: 所有任務合計的頻寬 (位元組/秒)，None 或 0 表示不限制
+        """
+        with self._lock:
+            self.total_rate = total_rate or None
+            self._rebalance()
+    
+    @contextmanager
+    def allocate(self, host: str, max_connections: Optional[int] = None,
+                 max_rate: Optional[float] = None):
+        """
+        在下載期間為目前線程的任務分配頻寬和連線數
+        
+        Args:
+            host: 任務所屬的平台
+            max_connections: 該平台所有任務合計的連線數上限 (見 PlatformProfile)
+            max_rate: 該平台所有任務合計的頻寬上限 (位元組/秒)
+        
+        Yields:
+            任務的分配 (其他任務開始或結束時會自動更新)
+        """
+        allocation = Allocation(host, max_connections, max_rate)
+        
+        with self._lock:
+            self._allocations.append(allocation)
+            self._rebalance()
+        
+        previous = get_current_allocation()
+        _local.allocation = allocation
+        try:
+            yield allocation
+        finally:
+            _local.allocation = previous
+            self.release(allocation)
+    
+    def release(self, allocation: Allocation):
+        """
+        提前歸還分配 (如下載完成後進入後處理時)，並重新分配給其他任務
+        
+        Args:
+            allocation: allocate() 取得的分配，已歸還時不做任何事
+        """
+        with self._lock:
+            if allocation not in self._allocations:
+                return
+            self._allocations.remove(allocation)
+            self._rebalance()
+    
+    def _rebalance(self):
+        """平均分配頻寬和連線數給執行中的任務 (呼叫時需持有鎖)"""
+        count = len(self._allocations)
+        if count == 0:
+            return
+        
+        hosts = {}
+        for allocation in self._allocations:
+            hosts[allocation.host] = hosts.get(allocation.host, 0) + 1
+        
+        share = self.total_rate / count if self.total_rate else None
+        fragments = max(1, self.max_fragments // count)
+        for allocation in self._allocations:
+            host_count = hosts[allocation.host]
+            max_connections = allocation.max_connections or self.max_connections_per_host
+            connections = max(1, max_connections // host_count)
+            
+            # 平台有頻寬上限時，同平台的任務平分該上限
+            rate = share
+            if allocation.max_rate:
+                host_share = allocation.max_rate / host_count
+                rate = min(rate, host_share) if rate else host_share
+            allocation.update(rate, connections, fragments)
+
+
+# 全域共用的分配器 (延遲建立)
+_governor = None
+_governor_lock = threading.Lock()
+
+def get_bandwidth_governor() -> BandwidthGovernor:
+    """
+    獲取全域頻寬分配器
+    
+    Returns:
+        頻寬分配器實例
+    """
+    global _governor
+    
+    with _governor_lock:
+        if _governor is None:
+            _governor = BandwidthGovernor()
+        return _governor
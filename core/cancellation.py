@@ -0,0 +1,193 @@
+"""
+下載取消模組
+
+提供下載任務的取消權杖：進度回調中檢查權杖以中止 yt-dlp 的下載，
+並追蹤下載期間由 yt-dlp 啟動的子程序 (aria2c、ffmpeg)，取消時立即終止，
+釋出頻寬和 CPU
+"""
+
+import subprocess
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+
+class DownloadCancelled(Exception):
+    """任務被取消或暫停時，由進度回調拋出以中止下載"""
+    
+    def __init__(self, reason: str):
+        super().__init__(f"下載已中止 ({reason})")
+        self.reason = reason
+
+
+class CancellationToken:
+    """單一下載任務的取消權杖"""
+    
+    # 取消原因
+    REASON_CANCEL = "cancel"      # 使用者取消
+    REASON_PAUSE = "pause"        # 使用者暫停 (保留暫存檔以便繼續)
+    REASON_SHUTDOWN = "shutdown"  # 程式結束 (下次啟動時恢復)
+    
+    # 終止子程序後等待其結束的時間 (秒)，逾時則強制結束
+    TERMINATE_TIMEOUT = 3
+    
+    def __init__(self):
+        """初始化取消權杖"""
+        self.reason = None
+        
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._processes = set()
+        self._reapers = []
+    
+    @property
+    def is_cancelled(self) -> bool:
+        """是否已要求中止"""
+        return self._event.is_set()
+    
+    def cancel(self, reason: str = REASON_CANCEL):
+        """
+        要求中止下載，並立即終止已啟動的子程序
+        
+        只送出終止訊號就返回 (可在 UI 線程呼叫)，等待子程序結束及逾時強制結束
+        在背景線程中進行
+        
+        Args:
+            reason: 取消原因
+        """
+        with self._lock:
+            if self._event.is_set():
+                return
+            self.reason = reason
+            self._event.set()
+            processes = list(self._processes)
+        
+        self._terminate(processes)
+    
+    def check(self):
+        """已要求中止時拋出 DownloadCancelled (在進度回調中呼叫)"""
+        if self._event.is_set():
+            raise DownloadCancelled(self.reason)
+    
+    def register_process(self, process: subprocess.Popen):
+        """登記下載期間啟動的子程序，已取消時立即終止"""
+        with self._lock:
+            cancelled = self._event.is_set()
+            if not cancelled:
+                self._processes.add(process)
+        
+        if cancelled:
+            self._terminate([process])
+    
+    def unregister_process(self, process: subprocess.Popen):
+        """取消登記已結束的子程序"""
+        with self._lock:
+            self._processes.discard(process)
+    
+    def wait_terminated(self):
+        """等待取消時終止的子程序全部結束 (最多約 TERMINATE_TIMEOUT 秒)"""
+        with self._lock:
+            reapers = list(self._reapers)
+        for reaper in reapers:
+            reaper.join()
+    
+    def _terminate(self, processes):
+        """終止子程序，並在背景線程中等待結束 (逾時未結束則強制結束)"""
+        terminated = []
+        for process in processes:
+            try:
+                if process.poll() is None:
+                    process.terminate()
+                    terminated.append(process)
+            except OSError as e:
+                print(f"終止子程序失敗: {str(e)}")
+        
+        if terminated:
+            reaper = threading.Thread(target=self._reap, args=(terminated,),
+                                      name="process-reaper", daemon=True)
+            with self._lock:
+                self._reapers.append(reaper)
+            reaper.start()
+    
+    def _reap(self, processes):
+        """等待已終止的子程序結束，逾時未結束則強制結束"""
+        deadline = time.monotonic() + self.TERMINATE_TIMEOUT
+        for process in processes:
+            try:
+                try:
+                    process.wait(max(deadline - time.monotonic(), 0))
+                except subprocess.TimeoutExpired:
+                    process.kill()
+            except OSError as e:
+                print(f"終止子程序失敗: {str(e)}")
+
+
+# 各線程目前執行中的下載任務權杖
+_local = threading.local()
+_install_lock = threading.Lock()
+_installed = False
+
+
+def get_current_token() -> Optional[CancellationToken]:
+    """獲取目前線程的取消權杖"""
+    return getattr(_local, 'token', None)
+
+
+@contextmanager
+def activate(token: CancellationToken):
+    """
+    在目前線程啟用取消權杖，期間 yt-dlp 啟動的子程序都會登記到該權杖
+    
+    Args:
+        token: 取消權杖
+    """
+    _install_process_tracking()
+    
+    previous = get_current_token()
+    _local.token = token
+    try:
+        yield token
+    finally:
+        _local.token = previous
+
+
+def _install_process_tracking():
+    """
+    攔截 yt-dlp 建立子程序的類別 (yt_dlp.utils.Popen)
+    
+    yt-dlp 的外部下載器和 FFmpeg 後處理都透過這個類別啟動子程序，
+    但沒有提供取得子程序的介面，因此在建立時登記到目前線程的權杖
+    """
+    global _installed
+    
+    with _install_lock:
+        if _installed:
+            return
+        
+        try:
+            from yt_dlp.utils import Popen
+        except ImportError:
+            return
+        
+        original_init = Popen.__init__
+        original_wait = Popen.wait
+        
+        def tracked_init(self, *args, **kwargs):
+            original_init(self, *args, **kwargs)
+            token = get_current_token()
+            self._cancel_token = token
+            if token is not None:
+                token.register_process(self)
+        
+        def tracked_wait(self, *args, **kwargs):
+            try:
+                return original_wait(self, *args, **kwargs)
+            finally:
+                token = getattr(self, '_cancel_token', None)
+                if token is not None and self.returncode is not None:
+                    token.unregister_process(self)
+        
+        Popen.__init__ = tracked_init
+        Popen.wait = tracked_wait
+        _installed = True
@@ -1,29 +1,62 @@
 """
-下載引擎抽象模組
+下載引擎模組
 
-提供下載引擎的抽象基類和工廠類，用於處理不同平台的影片下載
+提供依平台設定 (core.platforms) 產生 yt-dlp 選項的下載引擎和工廠類，
+用於處理不同平台的影片下載
 """
 
-from abc import ABC, abstractmethod
+import copy
 import os
-from typing import List, Dict, Any, Optional, Tuple, Callable
-import yt_dlp
+import threading
+from typing import List, Dict, Any, Optional, Tuple, Callable, Iterator
 
-from core.url_utils import detect_platform, clean_url, extract_video_id
+from core.url_utils import detect_platform, clean_url, extract_video_id, UrlProcessor
+from core.metadata_cache import get_metadata_cache
+from core.cancellation import get_current_token
+from core.downloader_strategy import DownloaderStrategy, estimate_filesize
+from core.bandwidth import get_current_allocation
+from core.postprocess import get_postprocess_pool
+from core.platforms import PlatformProfile, get_platform_profile
+from core.format_selection import FormatSelector
 
-class DownloadEngine(ABC):
-    """下載引擎抽象基類"""
+class DownloadEngine:
+    """下載引擎，平台之間的差異由平台設定描述，引擎本身不保存下載狀態，可在線程間共用"""
     
-    def __init__(self):
-        """初始化下載引擎"""
-        self.platform = self.get_platform_name()
+    # 預設輸出檔名模板 (yt-dlp outtmpl 語法，相對於輸出路徑)
+    DEFAULT_OUTPUT_TEMPLATE = '%(title)s.%(ext)s'
+    
+    # 展開巢狀播放清單 (如頻道首頁的各個分頁) 的最大深度
+    MAX_PLAYLIST_DEPTH = 3
+    
+    # 格式選擇
+    FORMAT_VIDEO = "1"  # MP4 影片
+    FORMAT_MP3 = "2"    # MP3 音訊 (下載後轉檔)
+    FORMAT_AUDIO = "3"  # 原始音訊 (保留來源編碼，不轉檔)
+    
+    # 串流複製合併或轉封裝失敗 (音訊編碼與 MP4 不相容) 時改用的後處理參數
+    AUDIO_REENCODE_ARGS = {
+        'merger+ffmpeg_o': ['-c:v', 'copy', '-c:a', 'aac'],
+        'videoremuxer+ffmpeg_o': ['-c:v', 'copy', '-c:a', 'aac'],
+    }
+    
+    def __init__(self, profile: PlatformProfile,
+                 downloader_strategy: Optional[DownloaderStrategy] = None):
+        """
+        初始化下載引擎
+        
+        Args:
+            profile: 平台設定
+            downloader_strategy: 下載器選擇策略，預設為單一任務的策略
+        """
+        self.profile = profile
+        self.platform = profile.name
+        self.downloader_strategy = downloader_strategy or DownloaderStrategy()
+        self.format_selector = FormatSelector()
     
-    @abstractmethod
     def get_platform_name(self) -> str:
         """獲取平台名稱"""
-        pass
+        return self.profile.name
     
-    @abstractmethod
     def get_available_formats(self, url: str) -> List[Dict[str, Any]]:
         """
         獲取影片可用的畫質選項
@@ -32,39 +65,107 @@ class DownloadEngine(ABC):
             url: 影片 URL
             
         Returns:
-            格式列表，每個格式包含 height, ext, quality, filesize 等資訊
+            格式列表 (依畫質由高到低)，每個格式包含 format_id, height, fps, ext, quality,
+            filesize (估計值見 filesize_estimated) 等資訊
         """
-        pass
+        try:
+            info = self.extract_info(url)
+            formats = []
+            
+            # 每個畫質取該畫質最高幀率中估計大小最小的組合 (含音訊)
+            for candidate in self.format_selector.list_qualities(info):
+                if candidate.size is None:
+                    filesize_str = "未知大小"
+                else:
+                    filesize_str = f"{'約 ' if candidate.estimated else ''}{candidate.size / (1024 * 1024):.1f}MB"
+                
+                formats.append({
+                    'format_id': candidate.format_id,
+                    'height': candidate.height,
+                    'fps': candidate.fps,
+                    'ext': candidate.video['ext'],
+                    'quality': f'{candidate.height}p',
+                    'filesize': candidate.size or 0,
+                    'filesize_estimated': candidate.estimated,
+                    'filesize_str': filesize_str,
+                    'vcodec': candidate.video.get('vcodec', 'unknown')
+                })
+            
+            return formats
+        except Exception as e:
+            print(f"獲取 {self.profile.display_name} 影片格式失敗: {str(e)}")
+            return []
     
-    @abstractmethod
     def download(self, url: str, output_path: str, format_choice: str, 
-                 height: Optional[int] = None, progress_hook: Optional[Callable] = None) -> bool:
+                 height: Optional[int] = None, progress_hook: Optional[Callable] = None,
+                 info: Optional[Dict[str, Any]] = None,
+                 output_template: Optional[str] = None,
+                 postprocessor_hook: Optional[Callable] = None) -> bool:
         """
         下載影片
         
         Args:
             url: 影片 URL
             output_path: 輸出路徑
-            format_choice: 格式選擇 ("1" 表示影片, "2" 表示音訊)
+            format_choice: 格式選擇 (見 FORMAT_VIDEO, FORMAT_MP3, FORMAT_AUDIO)
             height: 影片高度 (畫質)，如 720, 1080 等
             progress_hook: 進度回調函數
+            info: 已解析的影片資訊 (如預覽時取得的資訊)，提供時不再重新解析
+            output_template: 輸出檔名模板 (yt-dlp outtmpl 語法)，預設為 DEFAULT_OUTPUT_TEMPLATE
+            postprocessor_hook: 後處理回調函數 (yt-dlp postprocessor_hooks 格式)，
+                                每個後處理步驟開始和結束時呼叫
             
         Returns:
             下載是否成功
         """
-        pass
+        try:
+            # 影片需要格式列表才能選擇格式 (解析結果會快取，下載時不再重新解析)
+            audio = format_choice in (self.FORMAT_MP3, self.FORMAT_AUDIO)
+            if not audio and not info:
+                info = self.extract_info(url)
+            
+            # 準備基本下載選項 (含平台的 headers 和選項)
+            ydl_opts = self.prepare_download_options(url, output_path, format_choice, height,
+                                                     progress_hook, output_template, info,
+                                                     postprocessor_hook)
+            
+            # 根據格式選擇設置特定選項
+            if audio:
+                ydl_opts.update(self.get_audio_options(format_choice, info))
+            else:  # MP4
+                ydl_opts.update(self.get_video_options(height, info))
+            
+            # 執行下載 (共用快取的影片資訊，避免重複解析)
+            if audio:
+                paths = self.run_download(url, ydl_opts, info)
+            else:
+                paths = self.run_video_download(url, ydl_opts, info)
+            
+            # MP3 在後處理工作池中轉檔
+            self.finish_audio(paths, format_choice, postprocessor_hook)
+            
+            return True
+        except Exception as e:
+            print(f"下載 {self.profile.display_name} 影片失敗: {str(e)}")
+            return False
     
     def prepare_download_options(self, url: str, output_path: str, format_choice: str,
-                                height: Optional[int] = None, progress_hook: Optional[Callable] = None) -> Dict[str, Any]:
+                                height: Optional[int] = None, progress_hook: Optional[Callable] = None,
+                                output_template: Optional[str] = None,
+                                info: Optional[Dict[str, Any]] = None,
+                                postprocessor_hook: Optional[Callable] = None) -> Dict[str, Any]:
         """
         準備下載選項
         
         Args:
             url: 影片 URL
             output_path: 輸出路徑
-            format_choice: 格式選擇 ("1" 表示影片, "2" 表示音訊)
+            format_choice: 格式選擇 (見 FORMAT_VIDEO, FORMAT_MP3, FORMAT_AUDIO)
             height: 影片高度 (畫質)，如 720, 1080 等
             progress_hook: 進度回調函數
+            output_template: 輸出檔名模板 (yt-dlp outtmpl 語法)
+            info: 已解析的影片資訊，用於估計檔案大小以調整分段下載
+            postprocessor_hook: 後處理回調函數
             
         Returns:
             下載選項字典
@@ -74,8 +175,7 @@ class DownloadEngine(ABC):
         
         # 基本下載選項
         ydl_opts = {
-            'outtmpl': os.path.join(output_path, '%(title)s.%(ext)s'),
-            'concurrent_fragment_downloads': 8,
+            'outtmpl': os.path.join(output_path, output_template or self.DEFAULT_OUTPUT_TEMPLATE),
             'retries': 10,
             'fragment_retries': 10,
             'http_chunk_size': 52428800,
@@ -95,293 +195,390 @@ class DownloadEngine(ABC):
         # 設置進度回調
         if progress_hook:
             ydl_opts['progress_hooks'] = [progress_hook]
+        if postprocessor_hook:
+            ydl_opts['postprocessor_hooks'] = [postprocessor_hook]
+        
+        # 設置下載器 (依協定選擇內建下載器或 aria2c，並依檔案大小和分得的配額調整連線數)
+        filesize = estimate_filesize(self.select_streams(info, format_choice, height),
+                                     info.get('duration') if info else None)
+        ydl_opts.update(self.downloader_strategy.build_options(filesize,
+                                                               get_current_allocation()))
         
-        # 設置外部下載器
-        ydl_opts.update({
-            'external_downloader': 'aria2c',
-            'external_downloader_args': [
-                '--min-split-size=1M',
-                '--max-connection-per-server=16',
-                '--split=16',
-                '--max-concurrent-downloads=16',
-                '--max-tries=10',
-                '--retry-wait=3',
-                '--auto-file-renaming=false',
-                '--allow-overwrite=true',
-                '--continue=true',
-                '--timeout=120',
-                '--connect-timeout=120',
-                '--stream-piece-selector=inorder'
-            ]
-        })
+        # 平台設定
+        self.profile.apply_headers(ydl_opts)
+        ydl_opts.update(self.profile.ydl_options)
         
         return ydl_opts
     
-    def extract_info(self, url: str) -> Dict[str, Any]:
+    def get_audio_options(self, format_choice: str,
+                          info: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
-        提取影片資訊
+        獲取音訊下載選項
+        
+        提供影片資訊時下載 FormatSelector 選出的音訊 (與進度總量使用的格式相同)，
+        無法下載時改用來源的最佳音訊。原始音訊只把音軌以串流複製放入
+        對應的容器 (如 AAC 為 m4a、Opus 為 opus)；MP3 則在下載完成後由
+        finish_audio() 交給後處理工作池轉檔
         
         Args:
-            url: 影片 URL
+            format_choice: FORMAT_MP3 或 FORMAT_AUDIO
+            info: 已解析的影片資訊
             
         Returns:
-            影片資訊字典
+            yt-dlp 選項字典
         """
-        with yt_dlp.YoutubeDL({'quiet': True}) as ydl:
-            return ydl.extract_info(url, download=False)
-
-
-class YouTubeDownloadEngine(DownloadEngine):
-    """YouTube 下載引擎"""
-    
-    def get_platform_name(self) -> str:
-        """獲取平台名稱"""
-        return "youtube"
+        format_str = 'bestaudio/best'
+        streams = self.select_streams(info, format_choice)
+        if streams:
+            format_str = f"{streams[0]['format_id']}/{format_str}"
+        
+        ydl_opts = {'format': format_str}
+        if format_choice == self.FORMAT_AUDIO:
+            ydl_opts['postprocessors'] = [{
+                'key': 'FFmpegExtractAudio',
+                'preferredcodec': 'best',
+            }]
+        return ydl_opts
     
-    def get_available_formats(self, url: str) -> List[Dict[str, Any]]:
-        """獲取影片可用的畫質選項"""
-        ydl_opts = {
-            'quiet': True,
-            'no_warnings': True,
-        }
+    def get_video_options(self, height: Optional[int] = None,
+                          info: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        獲取 MP4 影片下載選項
         
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            try:
-                info = ydl.extract_info(url, download=False)
-                formats = []
-                seen_qualities = set()
-                
-                # 過濾並整理格式列表
-                for f in info['formats']:
-                    if 'height' in f and f['height'] is not None and f.get('vcodec') != 'none':
-                        quality = f'{f["height"]}p'
-                        if quality not in seen_qualities:
-                            filesize = f.get('filesize', 0)
-                            if filesize == 0:
-                                filesize_str = "未知大小"
-                            else:
-                                filesize_str = f"{filesize / (1024 * 1024):.1f}MB"
-                            
-                            formats.append({
-                                'height': f['height'],
-                                'ext': f['ext'],
-                                'quality': quality,
-                                'filesize': filesize,
-                                'filesize_str': filesize_str,
-                                'vcodec': f.get('vcodec', 'unknown')
-                            })
-                            seen_qualities.add(quality)
-                
-                # 按畫質排序
-                formats.sort(key=lambda x: x['height'], reverse=True)
-                return formats
-            except Exception as e:
-                print(f"獲取影片格式失敗: {str(e)}")
-                return []
+        提供影片資訊時由 FormatSelector 選出不超過目標畫質的最高畫質中最省空間的格式組合，
+        選出的格式無法下載時 (如串流網址失效後重新解析) 改用格式排序選擇。
+        影片和音訊都以串流複製合併 (不重新編碼)；合併失敗時由
+        run_video_download() 改為重新編碼音訊
+        
+        Args:
+            height: 目標高度 (畫質)，None 表示最佳畫質
+            info: 已解析的影片資訊
+            
+        Returns:
+            yt-dlp 選項字典
+        """
+        format_sort = list(self.profile.video_format_sort)
+        if height:
+            # 不超過目標畫質的最高畫質 (都超過時使用最低畫質)，與 FormatSelector.select 相同
+            format_str = f'bestvideo[height<={height}]+bestaudio/best[height<={height}]/best'
+            format_sort = [f'res:{height}'] + [field for field in format_sort if field.split(':')[0] != 'res']
+        else:
+            format_str = 'bestvideo+bestaudio/best'
+        
+        selection = self.format_selector.select(info, height) if info else None
+        if selection is not None:
+            format_str = f'{selection.format_id}/{format_str}'
+        
+        return {
+            'format': format_str,
+            'format_sort': format_sort,
+            'merge_output_format': 'mp4',
+            'postprocessors': [{
+                'key': 'FFmpegVideoRemuxer',
+                'preferedformat': 'mp4',
+            }],
+        }
     
-    def download(self, url: str, output_path: str, format_choice: str, 
-                height: Optional[int] = None, progress_hook: Optional[Callable] = None) -> bool:
-        """下載 YouTube 影片"""
-        try:
-            # 準備基本下載選項
-            ydl_opts = self.prepare_download_options(url, output_path, format_choice, height, progress_hook)
+    def select_streams(self, info: Optional[Dict[str, Any]], format_choice: str,
+                       height: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        列出下載時 FormatSelector 會選擇的格式 (影片加音訊時為兩個)
+        
+        Args:
+            info: 已解析的影片資訊
+            format_choice: 格式選擇 (見 FORMAT_VIDEO, FORMAT_MP3, FORMAT_AUDIO)
+            height: 目標高度 (畫質)，None 表示最佳畫質
             
-            # 根據格式選擇設置特定選項
-            if format_choice == "2":  # MP3
-                ydl_opts.update({
-                    'format': 'bestaudio/best',
-                    'postprocessors': [{
-                        'key': 'FFmpegExtractAudio',
-                        'preferredcodec': 'mp3',
-                        'preferredquality': '192',
-                    }],
-                    'format_sort': ['acodec:m4a', 'acodec:mp3', 'acodec'],
-                    'prefer_ffmpeg': True,
-                })
-            else:  # MP4
-                if height:
-                    ydl_opts.update({
-                        'format': f'bestvideo[height={height}]+bestaudio/best',
-                        'merge_output_format': 'mp4',
-                        'postprocessors': [{
-                            'key': 'FFmpegVideoRemuxer',
-                            'preferedformat': 'mp4',
-                        }],
-                        'postprocessor_args': [
-                            '-c:v', 'copy',
-                            '-c:a', 'aac',
-                            '-strict', 'experimental'
-                        ],
-                    })
-                else:
-                    ydl_opts.update({
-                        'format': 'bestvideo+bestaudio/best',
-                        'merge_output_format': 'mp4',
-                        'postprocessors': [{
-                            'key': 'FFmpegVideoRemuxer',
-                            'preferedformat': 'mp4',
-                        }],
-                        'postprocessor_args': [
-                            '-c:v', 'copy',
-                            '-c:a', 'aac',
-                            '-strict', 'experimental'
-                        ],
-                    })
+        Returns:
+            yt-dlp 格式字典列表，無法選擇時為空列表
+        """
+        if not info:
+            return []
+        
+        if format_choice in (self.FORMAT_MP3, self.FORMAT_AUDIO):
+            audio = self.format_selector.select_audio(info.get('formats') or [], info.get('duration'))
+            return [audio] if audio is not None else []
+        
+        selection = self.format_selector.select(info, height)
+        if selection is None:
+            return []
+        return [f for f in (selection.video, selection.audio) if f is not None]
+    
+    def run_video_download(self, url: str, ydl_opts: Dict[str, Any],
+                           info: Optional[Dict[str, Any]] = None) -> List[str]:
+        """
+        執行 MP4 影片下載，串流複製合併失敗時改為重新編碼音訊再試一次
+        
+        重試時已下載的影音檔會被沿用，只會重新執行合併
+        
+        Args:
+            url: 影片 URL
+            ydl_opts: yt-dlp 下載選項
+            info: 已解析的影片資訊
             
-            # 執行下載
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                ydl.download([url])
+        Returns:
+            下載完成的檔案路徑
+        """
+        import yt_dlp
+        
+        try:
+            return self.run_download(url, ydl_opts, info)
+        except yt_dlp.utils.DownloadError as e:
+            if not self._is_postprocessing_error(e):
+                raise
             
-            return True
-        except Exception as e:
-            print(f"下載 YouTube 影片失敗: {str(e)}")
-            return False
-
-
-class BilibiliDownloadEngine(DownloadEngine):
-    """Bilibili 下載引擎"""
+            print(f"串流複製合併失敗，改為重新編碼音訊: {str(e)}")
+            ydl_opts = dict(ydl_opts, postprocessor_args=self.AUDIO_REENCODE_ARGS)
+            return self.run_download(url, ydl_opts, info)
     
-    def get_platform_name(self) -> str:
-        """獲取平台名稱"""
-        return "bilibili"
+    def finish_audio(self, paths: List[str], format_choice: str,
+                     postprocessor_hook: Optional[Callable] = None) -> List[str]:
+        """
+        下載完成後的音訊轉檔 (僅 MP3 需要)
+        
+        Args:
+            paths: 下載完成的檔案路徑
+            format_choice: 格式選擇
+            postprocessor_hook: 後處理回調函數 (轉檔開始和結束時呼叫)
+            
+        Returns:
+            最終的檔案路徑
+        """
+        if format_choice != self.FORMAT_MP3:
+            return paths
+        
+        def notify(status):
+            if postprocessor_hook:
+                postprocessor_hook({'status': status, 'postprocessor': 'TranscodeMP3', 'info_dict': {}})
+        
+        pool = get_postprocess_pool()
+        notify('started')
+        try:
+            return [pool.transcode_audio(path, 'mp3', get_current_token()) for path in paths]
+        finally:
+            notify('finished')
     
-    def get_available_formats(self, url: str) -> List[Dict[str, Any]]:
-        """獲取影片可用的畫質選項"""
+    def get_extract_options(self) -> Dict[str, Any]:
+        """
+        獲取解析影片資訊時使用的 yt-dlp 選項
+        
+        Returns:
+            yt-dlp 選項字典
+        """
         ydl_opts = {
             'quiet': True,
             'no_warnings': True,
-            'http_headers': {  # Bilibili 需要特定的 headers
-                'Referer': 'https://www.bilibili.com',
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-            }
+            # 播放清單只解析項目的網址和標題，各項目在下載時才完整解析
+            'extract_flat': 'in_playlist',
         }
+        return self.profile.apply_headers(ydl_opts)
+    
+    def extract_info(self, url: str, use_cache: bool = True) -> Dict[str, Any]:
+        """
+        提取影片資訊
+        
+        結果會以 (平台, 影片 ID) 為鍵寫入磁碟快取，之後的預覽、畫質列表和下載
+        都直接讀取快取，不必重新解析
+        
+        Args:
+            url: 影片 URL
+            use_cache: 是否讀取快取
+            
+        Returns:
+            影片資訊字典
+        """
+        video_id = extract_video_id(url)
+        cache = get_metadata_cache() if video_id else None
+        
+        if use_cache and cache is not None:
+            info = cache.get(self.platform, video_id)
+            if info is not None and not self._is_collection(info):
+                return info
+        
+        # 延遲匯入 yt-dlp (載入擷取器註冊表很慢，不應拖慢程式啟動)
+        import yt_dlp
+        
+        with yt_dlp.YoutubeDL(self.get_extract_options()) as ydl:
+            info = ydl.extract_info(url, download=False)
+            # 轉換為可序列化的字典，才能寫入快取及重新交給 process_ie_result
+            info = ydl.sanitize_info(info, remove_private_keys=True)
+        
+        # 播放清單 (如多P影片) 經 sanitize_info 後不含項目，不能當作單一影片的資訊快取
+        if cache is not None and info and not self._is_collection(info):
+            cache.put(self.platform, video_id, info)
+        
+        return info
+    
+    def iter_playlist_entries(self, url: str, info: Optional[Dict[str, Any]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        逐一產生播放清單、頻道或多P影片中的項目
+        
+        使用平面解析，只取得各項目的網址和標題。yt-dlp 每取得一頁結果就產生
+        該頁的項目，不必等整個清單解析完成。URL 只指向單一影片時，產生一個
+        附帶完整影片資訊的項目 (同時寫入快取，下載時不必再解析)
+        
+        Args:
+            url: 播放清單、頻道或影片 URL
+            info: 已解析的播放清單資訊 (如預覽時取得的資訊)，提供時不再重新解析
+            
+        Yields:
+            項目字典，包含 url、title，單一影片時另含 info
+        """
+        import yt_dlp
+        
+        ydl_opts = self.get_extract_options()
+        ydl_opts['lazy_playlist'] = True
         
         with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            try:
-                info = ydl.extract_info(url, download=False)
-                formats = []
-                seen_qualities = set()
-                
-                # 過濾並整理格式列表
-                for f in info['formats']:
-                    if 'height' in f and f['height'] is not None and f.get('vcodec') != 'none':
-                        quality = f'{f["height"]}p'
-                        if quality not in seen_qualities:
-                            filesize = f.get('filesize', 0)
-                            if filesize == 0:
-                                filesize_str = "未知大小"
-                            else:
-                                filesize_str = f"{filesize / (1024 * 1024):.1f}MB"
-                            
-                            formats.append({
-                                'height': f['height'],
-                                'ext': f['ext'],
-                                'quality': quality,
-                                'filesize': filesize,
-                                'filesize_str': filesize_str,
-                                'vcodec': f.get('vcodec', 'unknown')
-                            })
-                            seen_qualities.add(quality)
-                
-                # 按畫質排序
-                formats.sort(key=lambda x: x['height'], reverse=True)
-                return formats
-            except Exception as e:
-                print(f"獲取 Bilibili 影片格式失敗: {str(e)}")
-                return []
+            if not info:
+                info = ydl.extract_info(url, download=False, process=False)
+            yield from self._walk_entries(ydl, url, info, 0)
     
-    def download(self, url: str, output_path: str, format_choice: str, 
-                height: Optional[int] = None, progress_hook: Optional[Callable] = None) -> bool:
-        """下載 Bilibili 影片"""
-        try:
-            # 準備基本下載選項
-            ydl_opts = self.prepare_download_options(url, output_path, format_choice, height, progress_hook)
+    def _walk_entries(self, ydl, url: str, info: Dict[str, Any], depth: int) -> Iterator[Dict[str, Any]]:
+        """遞迴展開 yt-dlp 的解析結果"""
+        result_type = info.get('_type', 'video')
+        
+        # 重新導向 (如頻道首頁導向影片分頁)
+        if result_type in ('url', 'url_transparent'):
+            if depth < self.MAX_PLAYLIST_DEPTH:
+                info = ydl.extract_info(info['url'], ie_key=info.get('ie_key'), download=False, process=False)
+                yield from self._walk_entries(ydl, url, info, depth + 1)
+            return
+        
+        # 單一影片
+        if result_type not in ('playlist', 'multi_video'):
+            info = ydl.sanitize_info(ydl.process_ie_result(info, download=False), remove_private_keys=True)
+            video_id = extract_video_id(url)
+            cache = get_metadata_cache() if video_id else None
+            if cache is not None:
+                cache.put(self.platform, video_id, info)
+            yield {'url': info.get('webpage_url') or url, 'title': info.get('title'), 'info': info}
+            return
+        
+        entries = info.get('entries') or []
+        if hasattr(entries, 'getslice'):  # yt-dlp 的分頁清單
+            entries = entries.getslice()
+        
+        for entry in entries:
+            if not entry:
+                continue
             
-            # Bilibili 特定的下載選項
-            ydl_opts.update({
-                'http_headers': {  # Bilibili 需要特定的 headers
-                    'Referer': 'https://www.bilibili.com',
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-                }
-            })
+            entry_url = entry.get('url') or entry.get('webpage_url')
+            if not entry_url:
+                continue
             
-            # 根據格式選擇設置特定選項
-            if format_choice == "2":  # MP3
-                ydl_opts.update({
-                    'format': 'bestaudio/best',
-                    'postprocessors': [{
-                        'key': 'FFmpegExtractAudio',
-                        'preferredcodec': 'mp3',
-                        'preferredquality': '192',
-                    }],
-                    'format_sort': ['acodec:m4a', 'acodec:mp3', 'acodec'],
-                    'prefer_ffmpeg': True,
-                })
-            else:  # MP4
-                if height:
-                    ydl_opts.update({
-                        'format': f'bestvideo[height={height}]+bestaudio/best',
-                        'merge_output_format': 'mp4',
-                        'postprocessors': [{
-                            'key': 'FFmpegVideoRemuxer',
-                            'preferedformat': 'mp4',
-                        }],
-                        'postprocessor_args': [
-                            '-c:v', 'copy',
-                            '-c:a', 'aac',
-                            '-strict', 'experimental'
-                        ],
-                    })
-                else:
-                    ydl_opts.update({
-                        'format': 'bestvideo+bestaudio/best',
-                        'merge_output_format': 'mp4',
-                        'postprocessors': [{
-                            'key': 'FFmpegVideoRemuxer',
-                            'preferedformat': 'mp4',
-                        }],
-                        'postprocessor_args': [
-                            '-c:v', 'copy',
-                            '-c:a', 'aac',
-                            '-strict', 'experimental'
-                        ],
-                    })
+            # 巢狀清單 (如頻道的影片、Shorts 分頁) 繼續展開
+            if entry.get('_type') == 'playlist' or UrlProcessor.is_collection_url(entry_url):
+                if depth < self.MAX_PLAYLIST_DEPTH:
+                    if entry.get('_type') != 'playlist':
+                        entry = ydl.extract_info(entry_url, ie_key=entry.get('ie_key'),
+                                                 download=False, process=False)
+                    yield from self._walk_entries(ydl, entry_url, entry, depth + 1)
+                continue
             
-            # 執行下載
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                ydl.download([url])
+            yield {'url': entry_url, 'title': entry.get('title')}
+    
+    def run_download(self, url: str, ydl_opts: Dict[str, Any],
+                     info: Optional[Dict[str, Any]] = None) -> List[str]:
+        """
+        使用已解析的影片資訊執行下載
+        
+        未提供影片資訊時讀取快取 (必要時解析一次)。影片資訊中的串流網址
+        失效時，會清除快取並重新解析後再下載一次
+        
+        Args:
+            url: 影片 URL
+            ydl_opts: yt-dlp 下載選項
+            info: 已解析的影片資訊，會先複製再交給 yt-dlp，不會修改呼叫端的字典
             
-            return True
-        except Exception as e:
-            print(f"下載 Bilibili 影片失敗: {str(e)}")
+        Returns:
+            下載 (及 yt-dlp 後處理) 完成的檔案路徑
+        """
+        if info:
+            info = copy.deepcopy(info)
+        else:
+            info = self.extract_info(url)
+        
+        # 記錄最終檔案路徑
+        paths = []
+        ydl_opts = dict(ydl_opts, post_hooks=list(ydl_opts.get('post_hooks', [])) + [paths.append])
+        
+        import yt_dlp
+        
+        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            if info:
+                try:
+                    ydl.process_ie_result(info, download=True)
+                    return paths
+                except yt_dlp.utils.DownloadError as e:
+                    # 任務被取消或暫停 (子程序被終止) 或後處理失敗時不重新解析
+                    token = get_current_token()
+                    if (token is not None and token.is_cancelled) or self._is_postprocessing_error(e):
+                        raise
+                    
+                    print(f"使用已解析的影片資訊下載失敗，重新解析: {str(e)}")
+                    video_id = extract_video_id(url)
+                    cache = get_metadata_cache()
+                    if video_id and cache is not None:
+                        cache.invalidate(self.platform, video_id)
+                
+                paths.clear()
+            
+            ydl.download([url])
+        
+        return paths
+    
+    @staticmethod
+    def _is_collection(info: Dict[str, Any]) -> bool:
+        """判斷解析結果是否為播放清單 (含多P影片)"""
+        return info.get('_type') in ('playlist', 'multi_video')
+    
+    @staticmethod
+    def _is_postprocessing_error(error: Exception) -> bool:
+        """下載錯誤是否由後處理 (FFmpeg) 失敗引起"""
+        from yt_dlp.utils import PostProcessingError
+        
+        token = get_current_token()
+        if token is not None and token.is_cancelled:
             return False
+        cause = error.exc_info[1] if getattr(error, 'exc_info', None) else None
+        return isinstance(cause, PostProcessingError)
 
 
 class DownloadEngineFactory:
-    """下載引擎工廠類"""
+    """下載引擎工廠類，每個平台只建立一個引擎並重複使用"""
     
-    @staticmethod
-    def create_engine(url: str) -> DownloadEngine:
+    def __init__(self, downloader_strategy: Optional[DownloaderStrategy] = None):
+        """
+        初始化下載引擎工廠
+        
+        Args:
+            downloader_strategy: 建立的引擎共用的下載器選擇策略
         """
-        根據 URL 創建適合的下載引擎
+        self.downloader_strategy = downloader_strategy or DownloaderStrategy()
+        
+        self._engines: Dict[str, DownloadEngine] = {}
+        self._lock = threading.Lock()
+    
+    def create_engine(self, url: str) -> DownloadEngine:
+        """
+        根據 URL 獲取適合的下載引擎
         
         Args:
             url: 影片 URL
             
         Returns:
-            下載引擎實例
+            下載引擎實例 (同一平台共用)
         """
         # 清理 URL
         url = clean_url(url)
         
-        # 檢測平台
-        platform = detect_platform(url)
+        # 檢測平台 (未知平台使用預設平台的設定)
+        profile = get_platform_profile(detect_platform(url))
         
-        # 根據平台選擇引擎
-        if platform == "youtube":
-            return YouTubeDownloadEngine()
-        elif platform == "bilibili":
-            return BilibiliDownloadEngine()
-        else:
-            # 默認使用 YouTube 引擎
-            return YouTubeDownloadEngine()
+        with self._lock:
+            engine = self._engines.get(profile.name)
+            if engine is None:
+                engine = DownloadEngine(profile, self.downloader_strategy)
+                self._engines[profile.name] = engine
+            return engine
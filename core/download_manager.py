@@ -5,18 +5,808 @@
 """
 
 import os
+import heapq
+import itertools
+import threading
+import time
+import uuid
 from typing import List, Dict, Any, Optional, Tuple, Callable, Union
 
 from core.download_engine import DownloadEngineFactory
-from core.url_utils import clean_url, detect_platform, validate_url
+from core.downloader_strategy import DownloaderStrategy
+from core.bandwidth import BandwidthGovernor, get_bandwidth_governor
+from core.url_utils import clean_url, detect_platform, validate_url, is_playlist_url, extract_video_id
+from core.short_links import lookup_short_url, resolve_short_url
+from core.archive import DownloadArchive, get_download_archive, make_format_profile
+from core.job_journal import JobJournal
+from core.cancellation import CancellationToken, DownloadCancelled, activate
+from core.progress import ProgressAggregator, ProgressSnapshot, format_size
+from core.postprocess import PostprocessTimer, get_postprocess_pool
+
+
+class JobStatus:
+    """下載任務狀態"""
+    
+    QUEUED = "queued"        # 等待中
+    RUNNING = "running"      # 下載中
+    POSTPROCESSING = "postprocessing"  # 後處理中 (合併、轉檔)
+    COMPLETED = "completed"  # 已完成
+    FAILED = "failed"        # 失敗
+    REMOVED = "removed"      # 已從佇列移除
+    SKIPPED = "skipped"      # 已下載過 (下載記錄中已有)，略過
+    PAUSED = "paused"        # 已暫停 (保留暫存檔，可繼續)
+    CANCELLED = "cancelled"  # 已取消
+    
+    # 已結束的狀態
+    FINISHED_STATES = (COMPLETED, FAILED, REMOVED, SKIPPED, CANCELLED)
+
+
+class DownloadJob:
+    """下載任務，保存單一下載的參數與執行狀態"""
+    
+    def __init__(self, job_id: str, url: str, output_path: str, format_str: str = "best",
+                 audio_only: bool = False, priority: int = 0,
+                 info: Optional[Dict[str, Any]] = None,
+                 output_template: Optional[str] = None, title: str = ""):
+        """
+        初始化下載任務
+        
+        Args:
+            job_id: 任務 ID
+            url: 影片 URL
+            output_path: 輸出路徑
+            format_str: 格式字串，如 "best", "1080p", "720p", "bestaudio" (原始音訊), "mp3" 等
+            audio_only: 是否僅下載音訊
+            priority: 優先順序，數字越大越先執行
+            info: 已解析的影片資訊，下載時直接使用，不再重新解析
+            output_template: 輸出檔名模板 (yt-dlp outtmpl 語法)，None 表示使用引擎預設值
+            title: 影片標題 (已知時)，用於顯示
+        """
+        self.job_id = job_id
+        self.url = url
+        self.output_path = output_path
+        self.format_str = format_str
+        self.audio_only = audio_only
+        self.priority = priority
+        self.info = info
+        self.output_template = output_template
+        self.title = title or (info or {}).get('title') or ""
+        
+        # 執行狀態
+        self.status = JobStatus.QUEUED
+        self.progress = 0.0
+        self.filename = ""
+        self.speed = ""
+        self.eta = ""
+        self.error = None
+        self.cancel_token = None  # 執行中任務的取消權杖
+        self.postprocess_timer = None  # 後處理計時器 (開始執行後建立)
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+    
+    @property
+    def is_finished(self) -> bool:
+        """任務是否已結束"""
+        return self.status in JobStatus.FINISHED_STATES
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """轉換為字典，方便 UI 或日誌使用"""
+        return {
+            'job_id': self.job_id,
+            'url': self.url,
+            'title': self.title,
+            'output_path': self.output_path,
+            'format_str': self.format_str,
+            'audio_only': self.audio_only,
+            'output_template': self.output_template,
+            'priority': self.priority,
+            'status': self.status,
+            'progress': self.progress,
+            'filename': self.filename,
+            'speed': self.speed,
+            'eta': self.eta,
+            'error': self.error,
+            'postprocess_timings': self.postprocess_timer.get_timings() if self.postprocess_timer else {},
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+        }
+    
+    # 寫入任務日誌的欄位 (重新建立任務所需的參數和狀態，不含影片資訊)
+    RECORD_FIELDS = ('job_id', 'url', 'output_path', 'format_str', 'audio_only', 'priority',
+                     'output_template', 'title', 'status', 'created_at')
+    
+    def to_record(self) -> Dict[str, Any]:
+        """轉換為任務日誌記錄"""
+        return {field: getattr(self, field) for field in self.RECORD_FIELDS}
+    
+    @classmethod
+    def from_record(cls, record: Dict[str, Any]) -> 'DownloadJob':
+        """
+        從任務日誌記錄重新建立任務 (狀態重設為等待中)
+        
+        Args:
+            record: 任務日誌記錄
+            
+        Returns:
+            下載任務
+        """
+        job = cls(record['job_id'], record['url'], record['output_path'],
+                  record.get('format_str', 'best'), record.get('audio_only', False),
+                  record.get('priority', 0), None, record.get('output_template'),
+                  record.get('title', ''))
+        job.created_at = record.get('created_at') or job.created_at
+        return job
+
 
 class DownloadManager:
     """下載管理器類別，負責整合下載引擎並提供統一的下載介面"""
     
-    def __init__(self):
-        """初始化下載管理器"""
-        self.factory = DownloadEngineFactory()
+    # 預設同時下載數
+    DEFAULT_MAX_WORKERS = 3
+    
+    def __init__(self, max_workers: int = DEFAULT_MAX_WORKERS,
+                 job_callback: Optional[Callable] = None,
+                 log_callback: Optional[Callable] = None,
+                 archive: Optional[DownloadArchive] = None,
+                 journal: Optional[JobJournal] = None,
+                 governor: Optional[BandwidthGovernor] = None):
+        """
+        初始化下載管理器
+        
+        任務進度不直接回調，而是透過 progress_aggregator 以固定頻率發布快照，
+        需要進度的元件請呼叫 progress_aggregator.subscribe() 訂閱
+        
+        Args:
+            max_workers: 同時執行的下載數量
+            job_callback: 任務狀態回調函數，接收 (job) 參數
+            log_callback: 任務日誌回調函數，接收 (job_id, message, log_type) 參數
+            archive: 下載記錄，預設為全域下載記錄 (首次使用時載入)
+            journal: 任務日誌，提供時記錄每個任務的狀態變更，並可用 restore_jobs() 恢復
+                     上次未完成的任務
+            governor: 頻寬與連線數分配器，預設為全域分配器 (所有管理器共用同一份總頻寬)
+        """
+        self._archive = archive
+        self.journal = journal
+        
+        # 任務佇列設定
+        self.max_workers = max(1, int(max_workers))
+        
+        # 下載器選擇策略和頻寬分配 (連線數和頻寬依執行中的任務數量分配)
+        self.governor = governor or get_bandwidth_governor()
+        self.downloader_strategy = DownloaderStrategy()
+        self.factory = DownloadEngineFactory(self.downloader_strategy)
+        self.job_callback = job_callback
+        self.log_callback = log_callback
+        
+        # 進度彙整 (同步任務物件上的進度欄位)
+        self.progress_aggregator = ProgressAggregator()
+        self.progress_aggregator.subscribe(self._on_progress_snapshots)
+        
+        # 任務佇列狀態 (佇列元素為 (-priority, 序號, job_id))
+        self._jobs: Dict[str, DownloadJob] = {}
+        self._queue: List[Tuple[int, int, str]] = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._workers: List[threading.Thread] = []
+        self._running = True
+        self._expanding = 0  # 進行中的播放清單展開數量
+    
+    @property
+    def archive(self) -> DownloadArchive:
+        """下載記錄"""
+        if self._archive is None:
+            self._archive = get_download_archive()
+        return self._archive
+    
+    # --- 任務佇列 ---
+    def enqueue(self, url: str, output_path: str, format_str: str = "best",
+                audio_only: bool = False, priority: int = 0,
+                info: Optional[Dict[str, Any]] = None,
+                output_template: Optional[str] = None, title: str = "",
+                skip_archived: bool = False) -> str:
+        """
+        將下載任務加入佇列
+        
+        Args:
+            url: 影片 URL
+            output_path: 輸出路徑
+            format_str: 格式字串，如 "best", "1080p", "720p", "bestaudio" (原始音訊), "mp3" 等
+            audio_only: 是否僅下載音訊
+            priority: 優先順序，數字越大越先執行
+            info: 已解析的影片資訊 (如預覽時取得的資訊)，提供時不再重新解析
+            output_template: 輸出檔名模板 (yt-dlp outtmpl 語法)
+            title: 影片標題 (已知時)，用於顯示
+            skip_archived: 下載記錄中已有該影片時是否略過 (任務直接標記為 SKIPPED)
+            
+        Returns:
+            任務 ID
+        """
+        job = DownloadJob(uuid.uuid4().hex[:12], clean_url(url), output_path,
+                          format_str, audio_only, priority, info, output_template, title)
+        
+        # 只依 URL 中的影片 ID 判斷，不需要解析影片資訊
+        archive_key = self._archive_key(job)
+        if skip_archived and archive_key is not None and self.archive.contains(*archive_key):
+            job.status = JobStatus.SKIPPED
+            job.progress = 100.0
+            job.info = None
+            job.finished_at = time.time()
+            with self._condition:
+                self._jobs[job.job_id] = job
+                self._condition.notify_all()
+            self._notify_job(job)
+            return job.job_id
+        
+        self._add_job(job)
+        return job.job_id
+    
+    def restore_jobs(self) -> List[str]:
+        """
+        從任務日誌恢復上次未完成的任務 (等待中、下載中或後處理中時程式結束)
+        
+        恢復的任務重新加入佇列，下載時沿用既有的 .part 檔或 aria2 控制檔
+        (continuedl) 從中斷處繼續。已結束的任務會從日誌中清除
+        
+        Returns:
+            恢復的任務 ID 列表
+        """
+        if self.journal is None:
+            return []
+        
+        unfinished = [record for record in self.journal.load()
+                      if record.get('status') not in JobStatus.FINISHED_STATES]
+        self.journal.rewrite(unfinished)
+        
+        restored = []
+        for record in unfinished:
+            try:
+                job = DownloadJob.from_record(record)
+            except (KeyError, TypeError) as e:
+                print(f"無法恢復下載任務: {str(e)}")
+                continue
+            
+            with self._condition:
+                if job.job_id in self._jobs:
+                    continue
+                
+                # 暫停的任務維持暫停，等待使用者繼續
+                if record.get('status') == JobStatus.PAUSED:
+                    job.status = JobStatus.PAUSED
+                    self._jobs[job.job_id] = job
+            
+            if job.status == JobStatus.PAUSED:
+                self._notify_job(job)
+            else:
+                self._add_job(job)
+            restored.append(job.job_id)
+        
+        return restored
     
+    def _add_job(self, job: DownloadJob):
+        """將任務加入佇列並通知"""
+        with self._condition:
+            self._jobs[job.job_id] = job
+            heapq.heappush(self._queue, (-job.priority, next(self._sequence), job.job_id))
+            self._ensure_workers()
+            self._condition.notify()
+        
+        self._notify_job(job)
+    
+    def submit(self, url: str, output_path: str, format_str: str = "best",
+               audio_only: bool = False, priority: int = 0,
+               info: Optional[Dict[str, Any]] = None,
+               output_template: Optional[str] = None, title: str = "",
+               skip_archived: Optional[bool] = None) -> str:
+        """
+        加入下載，播放清單、頻道和多P影片會展開為多個任務
+        
+        Args:
+            url: 影片、播放清單或頻道 URL
+            output_path: 輸出路徑
+            format_str: 格式字串，如 "best", "1080p", "720p", "bestaudio" (原始音訊), "mp3" 等
+            audio_only: 是否僅下載音訊
+            priority: 優先順序，數字越大越先執行
+            info: 已解析的資訊 (影片或播放清單)，提供時不再重新解析
+            output_template: 輸出檔名模板 (yt-dlp outtmpl 語法)
+            title: 影片標題 (已知時)，用於顯示
+            skip_archived: 是否略過已下載的影片，None 表示只略過播放清單展開出的項目
+            
+        Returns:
+            單一影片時為任務 ID，需要展開時為展開 ID (日誌回調使用的 ID)
+        """
+        # 已解析過的短網址換成標準網址 (只查詢快取，未解析過的短網址由工作線程解析)
+        url = lookup_short_url(url) or url
+        
+        if info:
+            needs_expansion = info.get('_type') in ('playlist', 'multi_video')
+        else:
+            needs_expansion = is_playlist_url(url)
+            
+            # 指向單一影片的 URL (如未指定分P的 Bilibili 影片) 已下載過時不必解析
+            video_id = extract_video_id(url)
+            if needs_expansion and skip_archived and video_id and self.archive.contains(
+                    detect_platform(url), video_id, make_format_profile(format_str, audio_only)):
+                needs_expansion = False
+        
+        if needs_expansion:
+            return self.enqueue_playlist(url, output_path, format_str, audio_only, priority,
+                                         info, output_template, skip_archived is not False)
+        return self.enqueue(url, output_path, format_str, audio_only, priority,
+                            info, output_template, title, bool(skip_archived))
+    
+    def enqueue_playlist(self, url: str, output_path: str, format_str: str = "best",
+                         audio_only: bool = False, priority: int = 0,
+                         info: Optional[Dict[str, Any]] = None,
+                         output_template: Optional[str] = None,
+                         skip_archived: bool = True) -> str:
+        """
+        在背景展開播放清單、頻道或多P影片，每發現一個項目就加入佇列
+        
+        項目各自成為獨立的任務，由工作線程並行下載，不必等整個清單展開完成。
+        展開失敗或沒有任何項目時，改為將 URL 本身作為單一任務加入佇列
+        
+        Args:
+            url: 播放清單、頻道或影片 URL
+            output_path: 輸出路徑
+            format_str: 格式字串，如 "best", "1080p", "720p", "bestaudio" (原始音訊), "mp3" 等
+            audio_only: 是否僅下載音訊
+            priority: 優先順序，數字越大越先執行
+            info: 已解析的播放清單資訊，含項目 (entries) 時不再重新解析
+            output_template: 輸出檔名模板 (yt-dlp outtmpl 語法)
+            skip_archived: 是否略過下載記錄中已有的項目
+            
+        Returns:
+            展開 ID (日誌回調使用的 ID)
+        """
+        expansion_id = uuid.uuid4().hex[:12]
+        
+        # 預覽取得的資訊經 sanitize_info 處理後不含項目 (entries)，此時由展開線程重新解析
+        if info is not None and not info.get('entries'):
+            info = None
+        
+        with self._condition:
+            self._expanding += 1
+        
+        thread = threading.Thread(
+            target=self._expand_playlist,
+            args=(expansion_id, clean_url(url), output_path, format_str, audio_only,
+                  priority, info, output_template, skip_archived),
+            name="playlist-expander",
+            daemon=True
+        )
+        thread.start()
+        return expansion_id
+    
+    def dequeue(self, job_id: str) -> bool:
+        """
+        從佇列中移除尚未開始的任務
+        
+        Args:
+            job_id: 任務 ID
+            
+        Returns:
+            是否成功移除
+        """
+        with self._condition:
+            job = self._jobs.get(job_id)
+            if job is None or job.status != JobStatus.QUEUED:
+                return False
+            
+            job.status = JobStatus.REMOVED
+            self._remove_from_queue(job_id)
+            job.finished_at = time.time()
+            self._condition.notify_all()
+        
+        self._notify_job(job)
+        return True
+    
+    def cancel(self, job_id: str) -> bool:
+        """
+        取消任務
+        
+        等待中或暫停的任務直接標記為已取消；執行中的任務會中止下載並立即終止
+        其外部下載器和 FFmpeg 子程序，工作線程隨即可執行佇列中的下一個任務
+        
+        Args:
+            job_id: 任務 ID
+            
+        Returns:
+            是否成功要求取消
+        """
+        return self._stop_job(job_id, CancellationToken.REASON_CANCEL)
+    
+    def pause(self, job_id: str) -> bool:
+        """
+        暫停任務
+        
+        執行中的任務會中止下載但保留 .part 暫存檔和 aria2 控制檔，
+        繼續時從中斷處續傳
+        
+        Args:
+            job_id: 任務 ID
+            
+        Returns:
+            是否成功要求暫停
+        """
+        return self._stop_job(job_id, CancellationToken.REASON_PAUSE)
+    
+    def resume(self, job_id: str) -> bool:
+        """
+        繼續暫停的任務 (重新加入佇列)
+        
+        Args:
+            job_id: 任務 ID
+            
+        Returns:
+            是否成功繼續
+        """
+        with self._condition:
+            job = self._jobs.get(job_id)
+            if job is None or job.status != JobStatus.PAUSED:
+                return False
+            
+            job.status = JobStatus.QUEUED
+            heapq.heappush(self._queue, (-job.priority, next(self._sequence), job_id))
+            self._ensure_workers()
+            self._condition.notify()
+        
+        self._notify_job(job)
+        return True
+    
+    def _stop_job(self, job_id: str, reason: str) -> bool:
+        """取消或暫停任務"""
+        with self._condition:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return False
+            
+            if job.status in (JobStatus.RUNNING, JobStatus.POSTPROCESSING):
+                token = job.cancel_token
+            elif job.status in (JobStatus.QUEUED, JobStatus.PAUSED):
+                token = None
+                self._remove_from_queue(job_id)
+                if reason == CancellationToken.REASON_PAUSE:
+                    job.status = JobStatus.PAUSED
+                else:
+                    job.status = JobStatus.CANCELLED
+                    job.finished_at = time.time()
+                self._condition.notify_all()
+            else:
+                return False
+        
+        if token is not None:
+            # 只送出終止訊號 (可在 UI 線程呼叫)，子程序在背景結束，
+            # 工作線程會在下載中止後更新狀態
+            token.cancel(reason)
+        else:
+            self._notify_job(job)
+        return True
+    
+    def set_priority(self, job_id: str, priority: int) -> bool:
+        """
+        調整等待中任務的優先順序
+        
+        Args:
+            job_id: 任務 ID
+            priority: 新的優先順序，數字越大越先執行
+            
+        Returns:
+            是否成功調整
+        """
+        with self._condition:
+            job = self._jobs.get(job_id)
+            if job is None or job.status != JobStatus.QUEUED:
+                return False
+            
+            job.priority = priority
+            self._remove_from_queue(job_id)
+            heapq.heappush(self._queue, (-priority, next(self._sequence), job_id))
+        
+        self._notify_job(job)
+        return True
+    
+    def get_job(self, job_id: str) -> Optional[DownloadJob]:
+        """獲取任務"""
+        with self._condition:
+            return self._jobs.get(job_id)
+    
+    def get_jobs(self) -> List[DownloadJob]:
+        """獲取所有任務 (依建立時間排序)"""
+        with self._condition:
+            return sorted(self._jobs.values(), key=lambda job: job.created_at)
+    
+    def get_active_count(self) -> int:
+        """獲取尚未結束的任務數量 (包含展開中的播放清單)"""
+        with self._condition:
+            return self._expanding + sum(1 for job in self._jobs.values() if not job.is_finished)
+    
+    def clear_finished(self) -> List[str]:
+        """
+        清除已結束的任務記錄
+        
+        Returns:
+            被清除的任務 ID 列表
+        """
+        with self._condition:
+            finished = [job_id for job_id, job in self._jobs.items() if job.is_finished]
+            for job_id in finished:
+                del self._jobs[job_id]
+            
+            removed = set(finished)
+            if any(entry[2] in removed for entry in self._queue):
+                self._queue = [entry for entry in self._queue if entry[2] not in removed]
+                heapq.heapify(self._queue)
+        return finished
+    
+    def set_max_workers(self, max_workers: int):
+        """
+        設定同時下載數量
+        
+        減少數量時，多餘的工作線程會在目前任務完成後結束
+        
+        Args:
+            max_workers: 同時執行的下載數量
+        """
+        with self._condition:
+            self.max_workers = max(1, int(max_workers))
+            self._ensure_workers()
+            self._condition.notify_all()
+    
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        等待所有任務結束
+        
+        Args:
+            timeout: 最長等待時間 (秒)，None 表示不限時
+            
+        Returns:
+            是否所有任務都已結束 (逾時返回 False)
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        
+        with self._condition:
+            # 暫停的任務不會自行結束，不列入等待
+            while self._expanding or any(not job.is_finished and job.status != JobStatus.PAUSED
+                                         for job in self._jobs.values()):
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+        return True
+    
+    def shutdown(self):
+        """
+        停止接受新任務並讓工作線程結束
+        
+        執行中的任務會被中止並終止其子程序，避免程式結束後留下 aria2c 或 ffmpeg；
+        這些任務在任務日誌中維持未完成，下次啟動時恢復
+        """
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+            tokens = [job.cancel_token for job in self._jobs.values()
+                      if job.status in (JobStatus.RUNNING, JobStatus.POSTPROCESSING)
+                      and job.cancel_token is not None]
+        
+        for token in tokens:
+            token.cancel(CancellationToken.REASON_SHUTDOWN)
+        
+        # 程式即將結束，等待子程序確實結束 (所有任務的子程序同時終止)
+        for token in tokens:
+            token.wait_terminated()
+    
+    def _ensure_workers(self):
+        """依佇列長度補足工作線程 (呼叫時需持有鎖)"""
+        if not self._running:
+            return
+        
+        pending = sum(1 for entry in self._queue
+                      if getattr(self._jobs.get(entry[2]), 'status', None) == JobStatus.QUEUED)
+        while len(self._workers) < min(self.max_workers, pending + self._running_count()):
+            worker = threading.Thread(target=self._worker_loop, name="download-worker", daemon=True)
+            self._workers.append(worker)
+            worker.start()
+    
+    def _remove_from_queue(self, job_id: str):
+        """移除佇列中該任務的項目 (呼叫時需持有鎖)"""
+        queue = [entry for entry in self._queue if entry[2] != job_id]
+        if len(queue) != len(self._queue):
+            self._queue = queue
+            heapq.heapify(self._queue)
+    
+    def _running_count(self) -> int:
+        """正在下載的任務數量，不含後處理中的任務 (呼叫時需持有鎖)"""
+        return sum(1 for job in self._jobs.values() if job.status == JobStatus.RUNNING)
+    
+    def _next_job(self) -> Optional[DownloadJob]:
+        """取出下一個待執行的任務，沒有任務或工作線程過多時返回 None"""
+        current = threading.current_thread()
+        
+        with self._condition:
+            while True:
+                if not self._running or len(self._workers) > self.max_workers:
+                    self._workers.remove(current)
+                    return None
+                
+                while self._queue:
+                    _, _, job_id = heapq.heappop(self._queue)
+                    job = self._jobs.get(job_id)
+                    if job is not None and job.status == JobStatus.QUEUED:
+                        job.status = JobStatus.RUNNING
+                        job.started_at = time.time()
+                        job.cancel_token = CancellationToken()
+                        return job
+                
+                self._condition.wait()
+    
+    def _worker_loop(self):
+        """工作線程主迴圈"""
+        current = threading.current_thread()
+        
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+            
+            self._notify_job(job)
+            self._run_job(job)
+            
+            # 任務進入後處理時已由新的工作線程接替下載名額，此線程在後處理完成後結束
+            with self._condition:
+                if current not in self._workers:
+                    return
+    
+    def _enter_postprocess(self, job: DownloadJob):
+        """
+        任務下載完成、開始後處理時的處理 (在工作線程中呼叫)
+        
+        任務離開網路階段：目前的工作線程不再計入同時下載數量，
+        另外啟動工作線程接手佇列中的下一個任務，此線程則繼續執行後處理
+        """
+        with self._condition:
+            if job.status != JobStatus.RUNNING:
+                return
+            
+            job.status = JobStatus.POSTPROCESSING
+            current = threading.current_thread()
+            if current in self._workers:
+                self._workers.remove(current)
+            self._ensure_workers()
+            self._condition.notify_all()
+        
+        self._notify_job(job)
+    
+    def _expand_playlist(self, expansion_id: str, url: str, output_path: str, format_str: str,
+                         audio_only: bool, priority: int, info: Optional[Dict[str, Any]],
+                         output_template: Optional[str], skip_archived: bool):
+        """展開線程：逐一將播放清單項目加入佇列"""
+        def log_callback(message, log_type=0):
+            if self.log_callback:
+                self.log_callback(expansion_id, message, log_type)
+        
+        seen = set()
+        stopped = False
+        try:
+            log_callback(f"正在展開播放清單: {url}", 0)
+            engine = self.factory.create_engine(url)
+            
+            for entry in engine.iter_playlist_entries(url, info):
+                with self._condition:
+                    if not self._running:
+                        stopped = True
+                        break
+                
+                entry_url = clean_url(entry['url'])
+                if entry_url in seen:
+                    continue
+                seen.add(entry_url)
+                
+                self.enqueue(entry_url, output_path, format_str, audio_only, priority,
+                             entry.get('info'), output_template, entry.get('title') or "",
+                             skip_archived)
+            
+            if seen or stopped:
+                log_callback(f"播放清單展開完成，共 {len(seen)} 個項目", 1)
+            else:
+                log_callback("播放清單沒有任何項目，改為直接下載此網址", 2)
+                self.enqueue(url, output_path, format_str, audio_only, priority,
+                             None, output_template)
+        except Exception as e:
+            log_callback(f"展開播放清單失敗: {str(e)}", 3)
+            if not seen:
+                self.enqueue(url, output_path, format_str, audio_only, priority,
+                             None, output_template)
+        finally:
+            with self._condition:
+                self._expanding -= 1
+                self._condition.notify_all()
+    
+    def _run_job(self, job: DownloadJob):
+        """執行單一下載任務"""
+        def log_callback(message, log_type=0):
+            if self.log_callback:
+                self.log_callback(job.job_id, message, log_type)
+        
+        token = job.cancel_token
+        job.postprocess_timer = PostprocessTimer()
+        
+        try:
+            # 短網址在工作線程中解析，讓下載記錄和影片資訊快取能以影片 ID 查詢
+            job.url = resolve_short_url(job.url)
+            
+            with activate(token):
+                result = self._download(job.url, job.output_path, job.format_str, job.audio_only,
+                                        job.job_id, log_callback, job.info, job.output_template,
+                                        token, job.postprocess_timer,
+                                        lambda: self._enter_postprocess(job))
+            if result:
+                archive_key = self._archive_key(job)
+                if archive_key is not None:
+                    self.archive.add(*archive_key)
+        except Exception as e:
+            job.error = str(e)
+            result = False
+        finally:
+            # 影片資訊可能很大，任務結束後即釋放
+            job.info = None
+            self.progress_aggregator.remove(job.job_id)
+        
+        with self._condition:
+            job.cancel_token = None
+            
+            if result:
+                job.status = JobStatus.COMPLETED
+                job.progress = 100.0
+            elif token.reason == CancellationToken.REASON_PAUSE:
+                job.status = JobStatus.PAUSED
+            elif token.reason == CancellationToken.REASON_SHUTDOWN:
+                # 維持未完成狀態，下次啟動時由任務日誌恢復
+                job.status = JobStatus.QUEUED
+            elif token.reason == CancellationToken.REASON_CANCEL:
+                job.status = JobStatus.CANCELLED
+            else:
+                job.status = JobStatus.FAILED
+            
+            if job.is_finished:
+                job.finished_at = time.time()
+            self._condition.notify_all()
+        
+        self._notify_job(job)
+    
+    def _archive_key(self, job: DownloadJob) -> Optional[Tuple[str, str, str]]:
+        """獲取任務在下載記錄中的鍵 (平台, 影片 ID, 格式設定)，URL 中沒有影片 ID 時返回 None"""
+        video_id = extract_video_id(job.url)
+        if not video_id:
+            return None
+        return detect_platform(job.url), video_id, make_format_profile(job.format_str, job.audio_only)
+    
+    def _on_progress_snapshots(self, snapshots: List[ProgressSnapshot]):
+        """將進度快照同步到任務物件"""
+        for snapshot in snapshots:
+            job = self._jobs.get(snapshot.job_id)
+            if job is None or job.status not in (JobStatus.RUNNING, JobStatus.POSTPROCESSING):
+                continue
+            job.progress = snapshot.progress
+            if snapshot.filename:
+                job.filename = snapshot.filename
+            job.speed = snapshot.speed_str
+            job.eta = snapshot.eta_str
+    
+    def _notify_job(self, job: DownloadJob):
+        """記錄並通知任務狀態變更"""
+        if self.journal is not None:
+            self.journal.append(job.to_record())
+        
+        if self.job_callback:
+            try:
+                self.job_callback(job)
+            except Exception as e:
+                print(f"任務狀態回調失敗: {str(e)}")
+    
+    # --- 下載介面 ---
+
     def get_available_formats(self, url: str) -> List[Dict[str, Any]]:
         """
         獲取影片可用的畫質選項
@@ -37,16 +827,20 @@ class DownloadManager:
         return engine.get_available_formats(url)
     
     def download_video(self, url: str, output_path: str, format_choice: str, 
-                      height: Optional[int] = None, progress_hook: Optional[Callable] = None) -> bool:
+                      height: Optional[int] = None, progress_hook: Optional[Callable] = None,
+                      info: Optional[Dict[str, Any]] = None,
+                      output_template: Optional[str] = None) -> bool:
         """
         下載影片
         
         Args:
             url: 影片 URL
             output_path: 輸出路徑
-            format_choice: 格式選擇 ("1" 表示影片, "2" 表示音訊)
+            format_choice: 格式選擇 ("1" 表示影片, "2" 表示 MP3, "3" 表示原始音訊)
             height: 影片高度 (畫質)，如 720, 1080 等
             progress_hook: 進度回調函數
+            info: 已解析的影片資訊，提供時不再重新解析
+            output_template: 輸出檔名模板 (yt-dlp outtmpl 語法)
             
         Returns:
             下載是否成功
@@ -61,26 +855,81 @@ class DownloadManager:
         engine = self.factory.create_engine(url)
         
         # 執行下載
-        return engine.download(url, output_path, format_choice, height, progress_hook)
+        return engine.download(url, output_path, format_choice, height, progress_hook, info,
+                               output_template)
     
     def download(self, url: str, output_path: str, format_str: str = "best", 
                 audio_only: bool = False, 
                 progress_callback: Optional[Callable] = None,
-                log_callback: Optional[Callable] = None) -> bool:
+                log_callback: Optional[Callable] = None,
+                info: Optional[Dict[str, Any]] = None,
+                output_template: Optional[str] = None) -> bool:
         """
         下載影片 (適用於 Qt 界面)
         
         Args:
             url: 影片 URL
             output_path: 輸出路徑
-            format_str: 格式字串，如 "best", "1080p", "720p" 等
+            format_str: 格式字串，如 "best", "1080p", "720p", "bestaudio" (原始音訊), "mp3" 等
             audio_only: 是否僅下載音訊
-            progress_callback: 進度回調函數，接收 (progress, filename, speed) 參數
+            progress_callback: 進度回調函數，接收 (progress, filename, speed) 參數，
+                               以固定頻率 (約 10 Hz) 在進度彙整線程中呼叫
             log_callback: 日誌回調函數，接收 (message, log_type) 參數
+            info: 已解析的影片資訊，提供時不再重新解析
+            output_template: 輸出檔名模板 (yt-dlp outtmpl 語法)
             
         Returns:
             下載是否成功
         """
+        # 以彙整後的進度快照 (固定頻率) 回報進度
+        progress_key = uuid.uuid4().hex[:12]
+        
+        def on_snapshots(snapshots):
+            for snapshot in snapshots:
+                if snapshot.job_id == progress_key:
+                    progress_callback(snapshot.progress, snapshot.filename, snapshot.speed_str)
+        
+        if progress_callback:
+            self.progress_aggregator.subscribe(on_snapshots)
+        
+        try:
+            return self._download(url, output_path, format_str, audio_only,
+                                  progress_key, log_callback, info, output_template)
+        finally:
+            if progress_callback:
+                self.progress_aggregator.flush()
+                self.progress_aggregator.unsubscribe(on_snapshots)
+            self.progress_aggregator.remove(progress_key)
+    
+    def _download(self, url: str, output_path: str, format_str: str, audio_only: bool,
+                  progress_key: str, log_callback: Optional[Callable] = None,
+                  info: Optional[Dict[str, Any]] = None,
+                  output_template: Optional[str] = None,
+                  cancel_token: Optional[CancellationToken] = None,
+                  postprocess_timer: Optional[PostprocessTimer] = None,
+                  on_postprocess: Optional[Callable] = None) -> bool:
+        """
+        執行下載，進度送往進度彙整器
+        
+        Args:
+            url: 影片 URL
+            output_path: 輸出路徑
+            format_str: 格式字串，如 "best", "1080p", "720p", "bestaudio" (原始音訊), "mp3" 等
+            audio_only: 是否僅下載音訊
+            progress_key: 進度彙整器中使用的任務 ID
+            log_callback: 日誌回調函數，接收 (message, log_type) 參數
+            info: 已解析的影片資訊，提供時不再重新解析
+            output_template: 輸出檔名模板 (yt-dlp outtmpl 語法)
+            cancel_token: 取消權杖，已取消時在進度回調中中止下載
+            postprocess_timer: 後處理計時器，記錄合併、轉檔等步驟的耗時
+            on_postprocess: 下載完成、開始第一個後處理步驟時呼叫的函數 (不接收參數)
+            
+        Returns:
+            下載是否成功
+        """
+        if postprocess_timer is None:
+            postprocess_timer = PostprocessTimer()
+        
         # 清理 URL
         url = clean_url(url)
         
@@ -90,57 +939,74 @@ class DownloadManager:
         # 創建適合的下載引擎
         engine = self.factory.create_engine(url)
         
-        # 設置進度回調
+        # 頻寬分配 (下載開始時取得)
+        allocation = None
+        
+        # 設置進度回調：原始事件只更新彙整器的記憶體狀態，不直接觸發 UI 或日誌
         def progress_hook(d):
-            if progress_callback:
-                progress = d.get('percentage', 0)
-                filename = d.get('filename', '').split('/')[-1].split('\\')[-1]
-                speed = d.get('speed', '')
-                
-                # 格式化速度
-                if isinstance(speed, (int, float)) and speed > 0:
-                    if speed < 1024:
-                        speed_str = f"{speed:.1f} B/s"
-                    elif speed < 1024 * 1024:
-                        speed_str = f"{speed/1024:.1f} KB/s"
-                    else:
-                        speed_str = f"{speed/(1024*1024):.1f} MB/s"
-                else:
-                    speed_str = ""
-                
-                progress_callback(progress, filename, speed_str)
+            if cancel_token is not None:
+                cancel_token.check()
+            
+            self.progress_aggregator.update(progress_key, d)
             
-            # 記錄下載狀態
+            # 超過分得的頻寬時在此等待 (分段下載時回調來自多個線程，因此不用線程區域的分配)
+            if allocation is not None:
+                allocation.throttle(d)
+            
+            # 只記錄狀態轉換，不記錄每次進度更新
             if log_callback:
                 status = d.get('status', '')
                 
-                if status == 'downloading':
-                    downloaded = d.get('downloaded_bytes', 0)
-                    total = d.get('total_bytes', 0) or d.get('total_bytes_estimate', 0)
-                    
-                    if total > 0:
-                        percent = downloaded / total * 100
-                        log_callback(f"下載中: {percent:.1f}% ({self._format_size(downloaded)}/{self._format_size(total)})", 0)
-                
-                elif status == 'finished':
+                if status == 'finished':
                     log_callback(f"下載完成: {d.get('filename', '')}", 1)
                 
                 elif status == 'error':
                     log_callback(f"下載錯誤: {d.get('error', '')}", 3)
         
+        # 設置後處理回調：第一個後處理步驟開始時讓出下載名額和頻寬，
+        # 每個使用 FFmpeg 的步驟都需取得後處理名額 (依 CPU 核心數限制)
+        postprocess_pool = get_postprocess_pool()
+        postprocessing = False
+        
+        def postprocessor_hook(d):
+            nonlocal postprocessing
+            
+            status = d.get('status')
+            gated = d.get('postprocessor') not in postprocess_pool.LIGHTWEIGHT_POSTPROCESSORS
+            
+            if status == 'started':
+                if not postprocessing:
+                    postprocessing = True
+                    if allocation is not None:
+                        self.governor.release(allocation)
+                    if on_postprocess:
+                        on_postprocess()
+                if gated:
+                    postprocess_pool.acquire(cancel_token)
+                postprocess_timer(d)
+            
+            elif status == 'finished':
+                postprocess_timer(d)
+                if gated:
+                    postprocess_pool.release()
+            
+            self.progress_aggregator.update_postprocess(progress_key, d)
+        
         # 設置格式
         format_choice = "1"  # 預設為影片
         height = None
         
-        if audio_only or format_str == "bestaudio":
-            format_choice = "2"  # 音訊
+        if format_str == "mp3":
+            format_choice = "2"  # MP3 音訊 (轉檔)
+        elif audio_only or format_str == "bestaudio":
+            format_choice = "3"  # 原始音訊 (不轉檔)
         elif format_str == "best":
             format_choice = "1"  # 最佳品質影片
-        elif format_str in ["1080p", "720p", "480p", "360p", "240p"]:
+        elif format_str.endswith("p"):
             format_choice = "1"
-            # 從格式字串中提取高度
+            # 從格式字串中提取高度 (如 "1080p", "720p")
             try:
-                height = int(format_str.replace("p", ""))
+                height = int(format_str[:-1])
             except ValueError:
                 if log_callback:
                     log_callback(f"無效的格式: {format_str}，使用最佳品質", 2)
@@ -154,16 +1020,42 @@ class DownloadManager:
         
         # 執行下載
         try:
-            result = engine.download(url, output_path, format_choice, height, progress_hook)
+            if cancel_token is not None:
+                cancel_token.check()
+            
+            # 下載前先解析 (結果會快取，引擎不會重新解析)，以選出的格式建立進度總量
+            if info is None:
+                info = engine.extract_info(url)
+            self.progress_aggregator.seed(progress_key, engine.select_streams(info, format_choice, height),
+                                          info.get('duration'))
+            
+            try:
+                with self.governor.allocate(engine.platform, engine.profile.max_connections,
+                                            engine.profile.max_rate) as allocation:
+                    result = engine.download(url, output_path, format_choice, height, progress_hook,
+                                             info, output_template, postprocessor_hook)
+            finally:
+                # 後處理中途失敗時歸還尚未歸還的名額
+                postprocess_pool.release_all()
             
             # 記錄下載結果
             if log_callback:
-                if result:
+                timing_summary = postprocess_timer.summary()
+                if timing_summary:
+                    log_callback(f"後處理耗時: {timing_summary}", 0)
+                
+                if cancel_token is not None and cancel_token.is_cancelled:
+                    log_callback(f"下載已中止 ({cancel_token.reason})", 2)
+                elif result:
                     log_callback("下載成功完成！", 1)
                 else:
                     log_callback("下載失敗！", 3)
             
             return result
+        except DownloadCancelled as e:
+            if log_callback:
+                log_callback(str(e), 2)
+            return False
         except Exception as e:
             # 記錄錯誤
             if log_callback:
@@ -172,14 +1064,7 @@ class DownloadManager:
     
     def _format_size(self, size_bytes):
         """格式化檔案大小"""
-        if size_bytes < 1024:
-            return f"{size_bytes} B"
-        elif size_bytes < 1024 * 1024:
-            return f"{size_bytes/1024:.1f} KB"
-        elif size_bytes < 1024 * 1024 * 1024:
-            return f"{size_bytes/(1024*1024):.1f} MB"
-        else:
-            return f"{size_bytes/(1024*1024*1024):.1f} GB"
+        return format_size(size_bytes)
     
     def get_video_info(self, url: str) -> Dict[str, Any]:
         """
@@ -191,8 +1076,8 @@ class DownloadManager:
         Returns:
             影片資訊字典
         """
-        # 清理 URL
-        url = clean_url(url)
+        # 解析短網址並清理 URL
+        url = clean_url(resolve_short_url(url))
         
         # 創建適合的下載引擎
         engine = self.factory.create_engine(url)
@@ -218,7 +1103,18 @@ class DownloadManager:
 
 
 # 為了方便使用，提供模組級別的函數
-_manager = DownloadManager()
+# (延遲建立，匯入本模組時不啟動任何下載元件)
+_manager = None
+_manager_lock = threading.Lock()
+
+def _get_manager() -> DownloadManager:
+    """獲取模組級別函數共用的下載管理器"""
+    global _manager
+    
+    with _manager_lock:
+        if _manager is None:
+            _manager = DownloadManager()
+        return _manager
 
 def get_available_formats(url: str) -> List[Dict[str, Any]]:
     """
@@ -230,44 +1126,48 @@ def get_available_formats(url: str) -> List[Dict[str, Any]]:
     Returns:
         格式列表，每個格式包含 height, ext, quality, filesize 等資訊
     """
-    return _manager.get_available_formats(url)
+    return _get_manager().get_available_formats(url)
 
 def download_video(url: str, output_path: str, format_choice: str, 
-                  height: Optional[int] = None, progress_hook: Optional[Callable] = None) -> bool:
+                  height: Optional[int] = None, progress_hook: Optional[Callable] = None,
+                  info: Optional[Dict[str, Any]] = None) -> bool:
     """
     下載影片 (模組級別函數)
     
     Args:
         url: 影片 URL
         output_path: 輸出路徑
-        format_choice: 格式選擇 ("1" 表示影片, "2" 表示音訊)
+        format_choice: 格式選擇 ("1" 表示影片, "2" 表示 MP3, "3" 表示原始音訊)
         height: 影片高度 (畫質)，如 720, 1080 等
         progress_hook: 進度回調函數
+        info: 已解析的影片資訊，提供時不再重新解析
         
     Returns:
         下載是否成功
     """
-    return _manager.download_video(url, output_path, format_choice, height, progress_hook)
+    return _get_manager().download_video(url, output_path, format_choice, height, progress_hook, info)
 
 def download(url: str, output_path: str, format_str: str = "best", 
             audio_only: bool = False, 
             progress_callback: Optional[Callable] = None,
-            log_callback: Optional[Callable] = None) -> bool:
+            log_callback: Optional[Callable] = None,
+            info: Optional[Dict[str, Any]] = None) -> bool:
     """
     下載影片 (適用於 Qt 界面) (模組級別函數)
     
     Args:
         url: 影片 URL
         output_path: 輸出路徑
-        format_str: 格式字串，如 "best", "1080p", "720p" 等
+        format_str: 格式字串，如 "best", "1080p", "720p", "bestaudio" (原始音訊), "mp3" 等
         audio_only: 是否僅下載音訊
         progress_callback: 進度回調函數，接收 (progress, filename, speed) 參數
         log_callback: 日誌回調函數，接收 (message, log_type) 參數
+        info: 已解析的影片資訊，提供時不再重新解析
         
     Returns:
         下載是否成功
     """
-    return _manager.download(url, output_path, format_str, audio_only, progress_callback, log_callback)
+    return _get_manager().download(url, output_path, format_str, audio_only, progress_callback, log_callback, info)
 
 def get_video_info(url: str) -> Dict[str, Any]:
     """
@@ -279,7 +1179,7 @@ def get_video_info(url: str) -> Dict[str, Any]:
     Returns:
         影片資訊字典
     """
-    return _manager.get_video_info(url)
+    return _get_manager().get_video_info(url)
 
 def get_platform(url: str) -> str:
     """
@@ -291,4 +1191,4 @@ def get_platform(url: str) -> str:
     Returns:
         平台名稱
     """
-    return _manager.get_platform(url)
+    return _get_manager().get_platform(url)
@@ -0,0 +1,183 @@
+"""
+下載器選擇策略模組
+
+依據外部工具是否可用、格式的傳輸協定、檔案大小和同時下載數，
+決定每種協定使用 yt-dlp 內建下載器或 aria2c，並調整分段和連線數
+"""
+
+import math
+import shutil
+import threading
+from typing import Dict, Any, Optional, List
+
+from core.bandwidth import Allocation
+from core.format_selection import estimate_format_size
+
+
+# 外部工具偵測結果 (只偵測一次)
+_tools = None
+_tools_lock = threading.Lock()
+
+def probe_tools() -> Dict[str, Optional[str]]:
+    """
+    偵測外部工具是否可用，結果會快取，之後的呼叫不再搜尋 PATH
+    
+    Returns:
+        工具名稱對應的執行檔路徑 (找不到時為 None)，包含 aria2c 和 ffmpeg
+    """
+    global _tools
+    
+    with _tools_lock:
+        if _tools is None:
+            _tools = {name: shutil.which(name) for name in ("aria2c", "ffmpeg")}
+        return dict(_tools)
+
+
+def estimate_filesize(formats: List[Dict[str, Any]], duration: Optional[float] = None) -> Optional[int]:
+    """
+    估計選出的格式合計的下載大小
+    
+    Args:
+        formats: 預計下載的 yt-dlp 格式字典列表 (如影片加音訊)
+        duration: 影片長度 (秒)，格式沒有檔案大小時以位元率估計
+    
+    Returns:
+        估計的位元組數，無法估計時返回 None
+    """
+    total = 0
+    for f in formats:
+        size, _ = estimate_format_size(f, duration)
+        if not size:
+            return None
+        total += size
+    return total or None
+
+
+class DownloaderStrategy:
+    """下載器選擇策略，決定各協定使用的下載器及其參數"""
+    
+    # 所有任務合計的 aria2c 連線數上限
+    DEFAULT_MAX_CONNECTIONS = 16
+    
+    # 所有任務合計的分段並行下載數上限 (DASH / HLS)
+    DEFAULT_MAX_FRAGMENTS = 16
+    
+    # 單一任務的分段並行下載數範圍
+    MIN_FRAGMENTS_PER_JOB = 2
+    MAX_FRAGMENTS_PER_JOB = 8
+    
+    # 每個 aria2c 連線至少負責的大小；小於兩段的檔案直接使用內建下載器
+    MIN_SPLIT_SIZE = 4 * 1024 * 1024
+    
+    # aria2c 的固定參數 (不含分段和連線數)
+    ARIA2C_BASE_ARGS = [
+        '--max-tries=10',
+        '--retry-wait=3',
+        '--auto-file-renaming=false',
+        '--allow-overwrite=true',
+        '--continue=true',
+        '--timeout=120',
+        '--connect-timeout=120',
+        '--stream-piece-selector=inorder',
+    ]
+    
+    def __init__(self, concurrent_jobs: int = 1,
+                 max_connections: int = DEFAULT_MAX_CONNECTIONS,
+                 max_fragments: int = DEFAULT_MAX_FRAGMENTS):
+        """
+        初始化下載器選擇策略
+        
+        Args:
+            concurrent_jobs: 同時下載的任務數 (連線和分段數會平均分配)
+            max_connections: 所有任務合計的 aria2c 連線數上限
+            max_fragments: 所有任務合計的分段並行下載數上限
+        """
+        self.concurrent_jobs = max(1, int(concurrent_jobs))
+        self.max_connections = max_connections
+        self.max_fragments = max_fragments
+    
+    @property
+    def aria2c_available(self) -> bool:
+        """aria2c 是否可用"""
+        return probe_tools().get("aria2c") is not None
+    
+    def get_connections(self, filesize: Optional[int] = None,
+                        allocation: Optional[Allocation] = None) -> int:
+        """
+        計算單一任務的 aria2c 連線數
+        
+        Args:
+            filesize: 檔案大小 (位元組)，未知時使用每個任務可分配的上限
+            allocation: 頻寬分配器分給任務的配額，提供時以其連線數為上限
+        
+        Returns:
+            連線數
+        """
+        if allocation is not None:
+            per_job = allocation.connections
+        else:
+            per_job = max(1, self.max_connections // self.concurrent_jobs)
+        if not filesize:
+            return per_job
+        return max(1, min(per_job, math.ceil(filesize / self.MIN_SPLIT_SIZE)))
+    
+    def get_fragment_concurrency(self, allocation: Optional[Allocation] = None) -> int:
+        """計算單一任務的分段並行下載數 (提供配額時以其分段數為準)"""
+        if allocation is not None:
+            return max(1, min(self.MAX_FRAGMENTS_PER_JOB, allocation.fragments))
+        per_job = self.max_fragments // self.concurrent_jobs
+        return max(self.MIN_FRAGMENTS_PER_JOB, min(self.MAX_FRAGMENTS_PER_JOB, per_job))
+    
+    def get_aria2c_args(self, connections: int, rate: Optional[float] = None) -> List[str]:
+        """
+        獲取 aria2c 參數
+        
+        Args:
+            connections: 連線數
+            rate: 頻寬上限 (位元組/秒)，None 表示不限制
+        
+        Returns:
+            aria2c 命令列參數
+        """
+        args = [
+            f'--split={connections}',
+            f'--max-connection-per-server={connections}',
+            f'--min-split-size={self.MIN_SPLIT_SIZE // (1024 * 1024)}M',
+        ]
+        if rate:
+            args.append(f'--max-download-limit={int(rate)}')
+        return args + self.ARIA2C_BASE_ARGS
+    
+    def build_options(self, filesize: Optional[int] = None,
+                      allocation: Optional[Allocation] = None) -> Dict[str, Any]:
+        """
+        產生下載器相關的 yt-dlp 選項
+        
+        一般 HTTP(S) 檔案在 aria2c 可用且大到值得分段時使用 aria2c 多連線下載；
+        DASH 和 HLS 分段串流使用 yt-dlp 內建下載器的分段並行下載 (較 aria2c 快)。
+        內建下載器的頻寬由進度回調中的 Allocation.throttle() 限制，aria2c 則在
+        啟動時以當下分得的頻寬設定上限
+        
+        Args:
+            filesize: 估計的下載大小 (位元組)
+            allocation: 頻寬分配器分給任務的配額
+        
+        Returns:
+            yt-dlp 選項字典
+        """
+        ydl_opts = {
+            'concurrent_fragment_downloads': self.get_fragment_concurrency(allocation),
+            'external_downloader': {
+                'default': 'native',
+                'dash': 'native',
+                'm3u8': 'native',
+            },
+        }
+        
+        connections = self.get_connections(filesize, allocation)
+        if self.aria2c_available and connections > 1:
+            rate = allocation.rate if allocation is not None else None
+            ydl_opts['external_downloader']['http'] = 'aria2c'
+            ydl_opts['external_downloader_args'] = {'aria2c': self.get_aria2c_args(connections, rate)}
+        
+        return ydl_opts
@@ -0,0 +1,296 @@
+"""
+格式選擇模組
+
+依畫質、幀率、編碼效率、與 MP4 容器的相容性和估計大小為 yt-dlp 的所有格式
+評分，選出不超過目標畫質的格式中最省頻寬和空間的組合。大小優先使用 yt-dlp
+提供的檔案大小，沒有時以平均位元率乘以影片長度估計
+"""
+
+from typing import List, Dict, Any, Optional, Tuple
+
+
+def get_codec_family(codec: Optional[str]) -> Optional[str]:
+    """
+    將 yt-dlp 的編碼字串 (如 "avc1.640028", "vp09.00.40.08") 轉為編碼名稱
+    
+    Args:
+        codec: vcodec 或 acodec 欄位
+    
+    Returns:
+        編碼名稱 (如 "h264", "vp9", "av1", "aac", "opus")，沒有該軌道時返回 None
+    """
+    if not codec or codec == 'none':
+        return None
+    
+    codec = codec.lower()
+    for prefix, family in FormatSelector.CODEC_PREFIXES:
+        if codec.startswith(prefix):
+            return family
+    return codec.split('.')[0]
+
+
+def estimate_format_size(fmt: Dict[str, Any], duration: Optional[float] = None) -> Tuple[Optional[int], bool]:
+    """
+    估計單一格式的大小
+    
+    Args:
+        fmt: yt-dlp 格式字典
+        duration: 影片長度 (秒)
+    
+    Returns:
+        (位元組數, 是否為估計值)，無法估計時位元組數為 None
+    """
+    if fmt.get('filesize'):
+        return int(fmt['filesize']), False
+    if fmt.get('filesize_approx'):
+        return int(fmt['filesize_approx']), True
+    
+    # tbr / vbr / abr 的單位為 kbit/s
+    bitrate = fmt.get('tbr') or ((fmt.get('vbr') or 0) + (fmt.get('abr') or 0))
+    if bitrate and duration:
+        return int(bitrate * 1000 / 8 * duration), True
+    return None, True
+
+
+class FormatCandidate:
+    """一個可下載的組合 (單一影音格式，或影片格式加音訊格式)"""
+    
+    def __init__(self, video: Dict[str, Any], audio: Optional[Dict[str, Any]],
+                 size: Optional[int], estimated: bool, cost: Optional[float]):
+        """
+        初始化候選組合
+        
+        Args:
+            video: 影片 (或影音合一) 格式
+            audio: 音訊格式，影音合一時為 None
+            size: 估計的總大小 (位元組)，未知時為 None
+            estimated: 大小是否為估計值
+            cost: 評分用的成本 (大小乘上相容性懲罰)，未知時為 None
+        """
+        self.video = video
+        self.audio = audio
+        self.size = size
+        self.estimated = estimated
+        self.cost = cost
+    
+    @property
+    def height(self) -> int:
+        """畫質高度"""
+        return self.video.get('height') or 0
+    
+    @property
+    def fps(self) -> float:
+        """幀率"""
+        return self.video.get('fps') or 0
+    
+    @property
+    def format_id(self) -> str:
+        """yt-dlp 格式 ID (影片加音訊時以 "+" 連接)"""
+        if self.audio is None:
+            return self.video['format_id']
+        return f"{self.video['format_id']}+{self.audio['format_id']}"
+    
+    @property
+    def vcodec(self) -> Optional[str]:
+        """影片編碼名稱"""
+        return get_codec_family(self.video.get('vcodec'))
+
+
+class FormatSelector:
+    """格式評分與選擇"""
+    
+    # 編碼字串前綴對應的編碼名稱
+    CODEC_PREFIXES = (
+        ('av01', 'av1'), ('vp09', 'vp9'), ('vp9', 'vp9'), ('vp8', 'vp8'),
+        ('hev1', 'hevc'), ('hvc1', 'hevc'), ('avc', 'h264'), ('h264', 'h264'),
+        ('mp4a', 'aac'), ('aac', 'aac'), ('opus', 'opus'), ('vorbis', 'vorbis'),
+        ('mp3', 'mp3'), ('ec-3', 'eac3'), ('ac-3', 'ac3'),
+    )
+    
+    # 同畫質下的編碼效率 (大小未知時，越高越可能較小)
+    CODEC_EFFICIENCY = {'av1': 3, 'hevc': 2, 'vp9': 2, 'h264': 1}
+    
+    # 可以串流複製到 MP4 的編碼；其他編碼的成本乘上懲罰係數
+    # (音訊需要重新編碼，影片則可能無法合併)
+    MP4_VIDEO_CODECS = ('h264', 'hevc', 'vp9', 'av1')
+    MP4_AUDIO_CODECS = ('aac', 'mp3')
+    INCOMPATIBLE_PENALTY = 1.15
+    
+    # H.264 + AAC 的組合合併時一定是串流複製，播放器相容性也最好 (與平台格式排序的
+    # vcodec:h264 / acodec:aac 偏好相同)；成本不超過同畫質最佳組合的此倍數時優先選擇
+    PREFERRED_VIDEO_CODEC = 'h264'
+    PREFERRED_AUDIO_CODEC = 'aac'
+    PREFERRED_TOLERANCE = 1.25
+    
+    # 音訊位元率目標 (kbit/s)：選擇達到此位元率的音訊中最小的
+    DEFAULT_AUDIO_BITRATE = 128
+    
+    def __init__(self, audio_bitrate: int = DEFAULT_AUDIO_BITRATE):
+        """
+        初始化格式選擇器
+        
+        Args:
+            audio_bitrate: 音訊位元率目標 (kbit/s)
+        """
+        self.audio_bitrate = audio_bitrate
+    
+    def rank(self, info: Dict[str, Any]) -> List[FormatCandidate]:
+        """
+        列出所有影片候選組合，依畫質和幀率由高到低、同畫質下成本由低到高排序
+        
+        Args:
+            info: 已解析的影片資訊
+        
+        Returns:
+            候選組合列表
+        """
+        formats = [f for f in info.get('formats') or [] if self._is_usable(f)]
+        duration = info.get('duration')
+        
+        # 成本最低的音訊不是 AAC 時，另外與最佳的 AAC 音訊組合 (見 _pick())
+        audios = [self.select_audio(formats, duration)]
+        if audios[0] is not None and get_codec_family(audios[0].get('acodec')) != self.PREFERRED_AUDIO_CODEC:
+            aac = [f for f in formats if get_codec_family(f.get('acodec')) == self.PREFERRED_AUDIO_CODEC]
+            audios.append(self.select_audio(aac, duration))
+        audios = [audio for audio in audios if audio is not None]
+        
+        candidates = []
+        for f in formats:
+            if get_codec_family(f.get('vcodec')) is None or not f.get('height'):
+                continue
+            if get_codec_family(f.get('acodec')) is not None:
+                candidates.append(self._make_candidate(f, None, duration))
+            else:
+                candidates.extend(self._make_candidate(f, audio, duration) for audio in audios)
+        
+        candidates.sort(key=lambda c: (-c.height, -c.fps) + self._cost_key(c))
+        return candidates
+    
+    def select(self, info: Dict[str, Any], height: Optional[int] = None) -> Optional[FormatCandidate]:
+        """
+        選出目標畫質的組合中成本最低的
+        
+        目標畫質為不超過指定高度的最高畫質 (都超過時使用最低畫質，與 yt-dlp 的
+        res:高度 排序相同) 及該畫質的最高幀率；同一畫質和幀率中選擇估計大小
+        最小的 (考慮容器相容性)，H.264 + AAC 的組合大小相近時優先
+        
+        Args:
+            info: 已解析的影片資訊
+            height: 目標高度，None 表示最高畫質
+        
+        Returns:
+            選出的組合，沒有可用格式時返回 None
+        """
+        candidates = self.rank(info)
+        if not candidates:
+            return None
+        
+        heights = sorted({c.height for c in candidates})
+        if height:
+            target = next((h for h in reversed(heights) if h <= height), heights[0])
+        else:
+            target = heights[-1]
+        
+        return self._pick([c for c in candidates if c.height == target])
+    
+    def select_audio(self, formats: List[Dict[str, Any]],
+                     duration: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        選出達到位元率目標的音訊中成本最低的 (沒有時選擇位元率最高的)
+        
+        Args:
+            formats: 格式列表
+            duration: 影片長度 (秒)
+        
+        Returns:
+            音訊格式，沒有純音訊格式時返回 None
+        """
+        audio = [f for f in formats if get_codec_family(f.get('vcodec')) is None
+                 and get_codec_family(f.get('acodec')) is not None]
+        if not audio:
+            return None
+        
+        enough = [f for f in audio if (f.get('abr') or f.get('tbr') or 0) >= self.audio_bitrate]
+        if not enough:
+            return max(audio, key=lambda f: f.get('abr') or f.get('tbr') or 0)
+        
+        def cost(f):
+            size, _ = estimate_format_size(f, duration)
+            penalty = self._penalty(None, f)
+            return (size is None, (size or 0) * penalty, penalty)
+        
+        return min(enough, key=cost)
+    
+    def list_qualities(self, info: Dict[str, Any]) -> List[FormatCandidate]:
+        """
+        列出每個畫質的最佳組合 (該畫質最高幀率中成本最低的)
+        
+        Args:
+            info: 已解析的影片資訊
+        
+        Returns:
+            依畫質由高到低排列的組合列表
+        """
+        by_height = {}
+        for candidate in self.rank(info):
+            by_height.setdefault(candidate.height, []).append(candidate)
+        return [self._pick(group) for group in by_height.values()]
+    
+    @staticmethod
+    def _is_usable(fmt: Dict[str, Any]) -> bool:
+        """排除縮圖故事板、DRM 等無法下載為影音的格式"""
+        if fmt.get('has_drm') or fmt.get('ext') == 'mhtml':
+            return False
+        return fmt.get('format_id') is not None
+    
+    def _pick(self, candidates: List[FormatCandidate]) -> FormatCandidate:
+        """
+        從同一畫質的候選組合 (依 rank() 的順序) 中選出最佳組合
+        
+        只考慮最高幀率；成本最低的組合不是 H.264 + AAC 時，若有成本在
+        PREFERRED_TOLERANCE 倍以內 (或大小同樣未知) 的 H.264 + AAC 組合則改選該組合
+        """
+        best = candidates[0]
+        for candidate in candidates:
+            if candidate.fps != best.fps:
+                break
+            if self._is_preferred(candidate):
+                if best.cost is None or (candidate.cost is not None
+                                         and candidate.cost <= best.cost * self.PREFERRED_TOLERANCE):
+                    return candidate
+                break  # 之後的組合成本更高
+        return best
+    
+    def _is_preferred(self, candidate: FormatCandidate) -> bool:
+        """組合是否為 H.264 影片加 AAC 音訊"""
+        audio = candidate.audio or candidate.video
+        return (candidate.vcodec == self.PREFERRED_VIDEO_CODEC
+                and get_codec_family(audio.get('acodec')) == self.PREFERRED_AUDIO_CODEC)
+    
+    def _make_candidate(self, video: Dict[str, Any], audio: Optional[Dict[str, Any]],
+                        duration: Optional[float]) -> FormatCandidate:
+        """計算組合的大小和成本"""
+        size, estimated = estimate_format_size(video, duration)
+        if audio is not None:
+            audio_size, audio_estimated = estimate_format_size(audio, duration)
+            size = size + audio_size if size is not None and audio_size is not None else None
+            estimated = estimated or audio_estimated
+        
+        cost = size * self._penalty(video, audio or video) if size is not None else None
+        return FormatCandidate(video, audio, size, estimated, cost)
+    
+    def _penalty(self, video: Optional[Dict[str, Any]], audio: Optional[Dict[str, Any]]) -> float:
+        """合併為 MP4 時的相容性懲罰係數"""
+        penalty = 1.0
+        if video is not None and get_codec_family(video.get('vcodec')) not in self.MP4_VIDEO_CODECS:
+            penalty *= self.INCOMPATIBLE_PENALTY
+        if audio is not None and get_codec_family(audio.get('acodec')) not in self.MP4_AUDIO_CODECS:
+            penalty *= self.INCOMPATIBLE_PENALTY
+        return penalty
+    
+    def _cost_key(self, candidate: FormatCandidate) -> Tuple:
+        """同畫質和幀率下的排序鍵：大小已知的優先，再依成本和編碼效率"""
+        efficiency = self.CODEC_EFFICIENCY.get(candidate.vcodec, 0)
+        if candidate.cost is None:
+            return (1, 0, -efficiency)
+        return (0, candidate.cost, -efficiency)
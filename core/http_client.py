@@ -0,0 +1,230 @@
+"""
+HTTP 連線模組
+
+yt-dlp 以外的網路請求 (縮圖、平台 API 等) 共用同一個 HTTP 連線池：
+保持連線 (keep-alive) 以省去重複的 TCP/TLS 握手，限制每個主機的連線數，
+設定逾時和失敗重試，並以 ETag / Last-Modified 進行條件式請求，
+內容未變更時直接使用先前的回應
+"""
+
+import json
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+
+class HttpClient:
+    """共用的 HTTP 用戶端，所有方法都可以在多個線程中同時呼叫"""
+    
+    # 每個主機同時使用的連線數上限 (超過時等待其他請求歸還連線)
+    DEFAULT_MAX_CONNECTIONS_PER_HOST = 4
+    
+    # 連線池保留的主機數量
+    DEFAULT_MAX_HOSTS = 16
+    
+    # (連線逾時, 讀取逾時) 秒數
+    DEFAULT_TIMEOUT = (5, 15)
+    
+    # 失敗重試次數與退避係數 (第 n 次重試前等待 backoff * 2^(n-1) 秒)
+    DEFAULT_RETRIES = 3
+    DEFAULT_BACKOFF = 0.5
+    
+    # 需要重試的 HTTP 狀態碼
+    RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+    
+    # 條件式請求快取的項目數、保存內容的總大小和單一回應大小上限
+    VALIDATOR_CACHE_SIZE = 256
+    VALIDATOR_CACHE_BYTES = 8 * 1024 * 1024
+    VALIDATOR_MAX_BODY_BYTES = 1024 * 1024
+    
+    def __init__(self, max_connections_per_host: int = DEFAULT_MAX_CONNECTIONS_PER_HOST,
+                 max_hosts: int = DEFAULT_MAX_HOSTS,
+                 timeout: Tuple[float, float] = DEFAULT_TIMEOUT,
+                 retries: int = DEFAULT_RETRIES,
+                 backoff: float = DEFAULT_BACKOFF):
+        """
+        初始化 HTTP 用戶端
+        
+        Args:
+            max_connections_per_host: 每個主機同時使用的連線數上限
+            max_hosts: 連線池保留的主機數量
+            timeout: 預設的 (連線逾時, 讀取逾時) 秒數
+            retries: 連線錯誤和暫時性錯誤 (見 RETRY_STATUS_CODES) 的重試次數
+            backoff: 重試的退避係數 (秒)
+        """
+        import requests  # 延遲匯入，縮短程式啟動時間
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+        
+        self.timeout = timeout
+        
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff,
+            status_forcelist=self.RETRY_STATUS_CODES,
+            allowed_methods=frozenset(['GET', 'HEAD']),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=max_hosts,
+            pool_maxsize=max_connections_per_host,
+            pool_block=True,
+            max_retries=retry,
+        )
+        
+        self.session = requests.Session()
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        
+        self._lock = threading.Lock()
+        self._validators = OrderedDict()  # URL -> (ETag, Last-Modified, 內容)
+        self._validator_bytes = 0         # 快取中內容的總大小
+    
+    def get(self, url: str, headers: Optional[Dict[str, str]] = None,
+            timeout: Optional[Tuple[float, float]] = None, **kwargs):
+        """
+        發送 GET 請求
+        
+        Args:
+            url: 網址
+            headers: 額外的 HTTP headers
+            timeout: (連線逾時, 讀取逾時) 秒數，預設使用 DEFAULT_TIMEOUT
+            **kwargs: 傳給 requests 的其他參數
+        
+        Returns:
+            requests.Response
+        
+        Raises:
+            requests.RequestException: 連線失敗、逾時或重試後仍失敗
+        """
+        return self.session.get(url, headers=headers, timeout=timeout or self.timeout, **kwargs)
+    
+    def head(self, url: str, headers: Optional[Dict[str, str]] = None,
+             timeout: Optional[Tuple[float, float]] = None, **kwargs):
+        """
+        發送 HEAD 請求 (預設不追蹤重新導向)
+        
+        Args:
+            url: 網址
+            headers: 額外的 HTTP headers
+            timeout: (連線逾時, 讀取逾時) 秒數，預設使用 DEFAULT_TIMEOUT
+            **kwargs: 傳給 requests 的其他參數
+        
+        Returns:
+            requests.Response
+        
+        Raises:
+            requests.RequestException: 連線失敗、逾時或重試後仍失敗
+        """
+        return self.session.head(url, headers=headers, timeout=timeout or self.timeout, **kwargs)
+    
+    def get_content(self, url: str, headers: Optional[Dict[str, str]] = None,
+                    timeout: Optional[Tuple[float, float]] = None,
+                    conditional: bool = True) -> bytes:
+        """
+        下載內容，曾下載過的網址以條件式請求確認是否變更
+        
+        Args:
+            url: 網址
+            headers: 額外的 HTTP headers
+            timeout: (連線逾時, 讀取逾時) 秒數
+            conditional: 是否使用並保存條件式請求快取 (呼叫端已自行快取內容時，
+                         如縮圖的磁碟快取，應設為 False 以免重複佔用記憶體)
+        
+        Returns:
+            回應內容
+        
+        Raises:
+            requests.RequestException: 請求失敗或 HTTP 狀態碼表示錯誤
+        """
+        if not conditional:
+            response = self.get(url, headers=headers, timeout=timeout)
+            response.raise_for_status()
+            return response.content
+        
+        request_headers = dict(headers or {})
+        with self._lock:
+            cached = self._validators.get(url)
+        if cached is not None:
+            etag, last_modified, _ = cached
+            if etag:
+                request_headers['If-None-Match'] = etag
+            if last_modified:
+                request_headers['If-Modified-Since'] = last_modified
+        
+        response = self.get(url, headers=request_headers, timeout=timeout)
+        if response.status_code == 304 and cached is not None:
+            with self._lock:
+                if url in self._validators:
+                    self._validators.move_to_end(url)
+            return cached[2]
+        
+        response.raise_for_status()
+        content = response.content
+        self._remember(url, response.headers, content)
+        return content
+    
+    def get_json(self, url: str, headers: Optional[Dict[str, str]] = None,
+                 timeout: Optional[Tuple[float, float]] = None) -> Any:
+        """
+        下載並解析 JSON (同樣使用條件式請求)
+        
+        Args:
+            url: 網址
+            headers: 額外的 HTTP headers
+            timeout: (連線逾時, 讀取逾時) 秒數
+        
+        Returns:
+            解析後的 JSON
+        
+        Raises:
+            requests.RequestException: 請求失敗
+            ValueError: 回應不是有效的 JSON
+        """
+        return json.loads(self.get_content(url, headers=headers, timeout=timeout))
+    
+    def close(self):
+        """關閉所有連線"""
+        self.session.close()
+    
+    def _remember(self, url: str, response_headers, content: bytes):
+        """保存回應的驗證資訊，供之後的條件式請求使用"""
+        etag = response_headers.get('ETag')
+        last_modified = response_headers.get('Last-Modified')
+        
+        with self._lock:
+            previous = self._validators.pop(url, None)
+            if previous is not None:
+                self._validator_bytes -= len(previous[2])
+            
+            if not (etag or last_modified) or len(content) > self.VALIDATOR_MAX_BODY_BYTES:
+                return
+            
+            self._validators[url] = (etag, last_modified, content)
+            self._validator_bytes += len(content)
+            
+            # 超過項目數或總大小上限時淘汰最久未使用的項目
+            while (len(self._validators) > self.VALIDATOR_CACHE_SIZE
+                   or self._validator_bytes > self.VALIDATOR_CACHE_BYTES):
+                _, (_, _, evicted) = self._validators.popitem(last=False)
+                self._validator_bytes -= len(evicted)
+
+
+# 全域共用的 HTTP 用戶端 (延遲建立)
+_client = None
+_client_lock = threading.Lock()
+
+def get_http_client() -> HttpClient:
+    """
+    獲取全域 HTTP 用戶端
+    
+    Returns:
+        HTTP 用戶端實例
+    """
+    global _client
+    
+    with _client_lock:
+        if _client is None:
+            _client = HttpClient()
+        return _client
@@ -0,0 +1,108 @@
+"""
+下載任務日誌模組
+
+以預寫式日誌 (JSON Lines) 記錄下載任務的參數和狀態，每次狀態變更都立即
+寫入磁碟。程式異常結束後重新啟動時，可以從日誌找回尚未完成的任務
+"""
+
+import json
+import os
+import threading
+from typing import List, Dict, Any, Optional
+
+from utils.paths import get_data_dir
+
+
+class JobJournal:
+    """下載任務日誌，每一行為一個任務在某次狀態變更後的完整記錄"""
+    
+    # 日誌檔案名稱
+    FILENAME = "jobs.jsonl"
+    
+    def __init__(self, path: Optional[str] = None):
+        """
+        初始化任務日誌
+        
+        Args:
+            path: 日誌檔路徑，預設為使用者資料目錄
+        """
+        self.path = path or os.path.join(get_data_dir(), self.FILENAME)
+        
+        self._lock = threading.Lock()
+        self._file = None
+    
+    def append(self, record: Dict[str, Any]):
+        """
+        寫入一筆任務記錄 (寫入後同步到磁碟，確保異常結束時不會遺失)
+        
+        Args:
+            record: 任務記錄，必須包含 job_id
+        """
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        
+        with self._lock:
+            try:
+                if self._file is None:
+                    self._file = open(self.path, "a", encoding="utf-8")
+                self._file.write(line)
+                self._file.flush()
+                os.fsync(self._file.fileno())
+            except OSError as e:
+                print(f"寫入任務日誌失敗: {str(e)}")
+    
+    def load(self) -> List[Dict[str, Any]]:
+        """
+        讀取每個任務的最新記錄
+        
+        Returns:
+            任務記錄列表 (依首次出現的順序)，損毀的行 (如寫入一半時中斷) 會被略過
+        """
+        records = {}
+        
+        with self._lock:
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    for line in f:
+                        try:
+                            record = json.loads(line)
+                        except ValueError:
+                            continue
+                        if isinstance(record, dict) and record.get('job_id'):
+                            records[record['job_id']] = record
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                print(f"讀取任務日誌失敗: {str(e)}")
+        
+        return list(records.values())
+    
+    def rewrite(self, records: List[Dict[str, Any]]):
+        """
+        以指定的記錄取代日誌內容 (用於清除已結束的任務，避免日誌無限增長)
+        
+        Args:
+            records: 要保留的任務記錄
+        """
+        temp_path = f"{self.path}.tmp"
+        
+        with self._lock:
+            try:
+                with open(temp_path, "w", encoding="utf-8") as f:
+                    for record in records:
+                        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    f.flush()
+                    os.fsync(f.fileno())
+                
+                if self._file is not None:
+                    self._file.close()
+                    self._file = None
+                os.replace(temp_path, self.path)
+            except OSError as e:
+                print(f"整理任務日誌失敗: {str(e)}")
+    
+    def close(self):
+        """關閉日誌檔"""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
@@ -0,0 +1,186 @@
+"""
+影片資訊快取模組
+
+將 yt-dlp 的影片資訊 (extract_info 結果) 保存在磁碟上的 SQLite 資料庫，
+讓預覽、畫質列表和下載共用同一次解析結果
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Dict, Any, Optional
+
+from utils.paths import get_cache_dir
+
+
+class MetadataCache:
+    """影片資訊快取類別，以 (平台, 影片 ID) 為鍵，支援 TTL 和容量淘汰"""
+    
+    # 預設存活時間 (秒)，影片串流網址通常數小時後失效，因此不宜過長
+    DEFAULT_TTL = 60 * 60
+    
+    # 預設容量上限 (壓縮後的位元組數)
+    DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+    
+    # 資料庫檔案名稱
+    DB_FILENAME = "metadata.sqlite3"
+    
+    def __init__(self, db_path: Optional[str] = None, ttl: float = DEFAULT_TTL,
+                 max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        初始化影片資訊快取
+        
+        Args:
+            db_path: 資料庫路徑，預設為使用者快取目錄
+            ttl: 快取存活時間 (秒)
+            max_bytes: 快取容量上限 (位元組)
+        """
+        self.db_path = db_path or os.path.join(get_cache_dir(), self.DB_FILENAME)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS info_cache (
+                platform TEXT NOT NULL,
+                video_id TEXT NOT NULL,
+                data BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                PRIMARY KEY (platform, video_id)
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_info_cache_accessed ON info_cache (accessed_at)")
+        self._conn.commit()
+    
+    def get(self, platform: str, video_id: str) -> Optional[Dict[str, Any]]:
+        """
+        讀取快取的影片資訊
+        
+        Args:
+            platform: 平台名稱
+            video_id: 影片 ID
+        
+        Returns:
+            影片資訊字典 (每次返回新的副本)，未命中或已過期時返回 None
+        """
+        now = time.time()
+        
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data, created_at FROM info_cache WHERE platform = ? AND video_id = ?",
+                (platform, video_id)
+            ).fetchone()
+            
+            if row is None:
+                return None
+            
+            data, created_at = row
+            if now - created_at > self.ttl:
+                self._conn.execute(
+                    "DELETE FROM info_cache WHERE platform = ? AND video_id = ?",
+                    (platform, video_id)
+                )
+                self._conn.commit()
+                return None
+            
+            self._conn.execute(
+                "UPDATE info_cache SET accessed_at = ? WHERE platform = ? AND video_id = ?",
+                (now, platform, video_id)
+            )
+            self._conn.commit()
+        
+        try:
+            return json.loads(zlib.decompress(data).decode("utf-8"))
+        except (zlib.error, ValueError) as e:
+            print(f"讀取影片資訊快取失敗: {str(e)}")
+            self.invalidate(platform, video_id)
+            return None
+    
+    def put(self, platform: str, video_id: str, info: Dict[str, Any]):
+        """
+        寫入影片資訊
+        
+        Args:
+            platform: 平台名稱
+            video_id: 影片 ID
+            info: 可序列化為 JSON 的影片資訊字典
+        """
+        data = zlib.compress(json.dumps(info, ensure_ascii=False).encode("utf-8"))
+        now = time.time()
+        
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO info_cache (platform, video_id, data, size, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (platform, video_id, sqlite3.Binary(data), len(data), now, now)
+            )
+            self._evict(now)
+            self._conn.commit()
+    
+    def invalidate(self, platform: str, video_id: str):
+        """移除單筆快取"""
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM info_cache WHERE platform = ? AND video_id = ?",
+                (platform, video_id)
+            )
+            self._conn.commit()
+    
+    def clear(self):
+        """清除所有快取"""
+        with self._lock:
+            self._conn.execute("DELETE FROM info_cache")
+            self._conn.commit()
+    
+    def _evict(self, now: float):
+        """移除過期項目，並依最近使用時間淘汰直到低於容量上限 (呼叫時需持有鎖)"""
+        self._conn.execute("DELETE FROM info_cache WHERE created_at < ?", (now - self.ttl,))
+        
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM info_cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        
+        rows = self._conn.execute(
+            "SELECT platform, video_id, size FROM info_cache ORDER BY accessed_at ASC"
+        ).fetchall()
+        
+        for platform, video_id, size in rows:
+            if total <= self.max_bytes:
+                break
+            self._conn.execute(
+                "DELETE FROM info_cache WHERE platform = ? AND video_id = ?",
+                (platform, video_id)
+            )
+            total -= size
+
+
+# 全域共用的快取實例 (延遲建立)
+_cache = None
+_cache_failed = False
+_cache_lock = threading.Lock()
+
+def get_metadata_cache() -> Optional[MetadataCache]:
+    """
+    獲取全域影片資訊快取
+    
+    Returns:
+        快取實例，無法建立資料庫時返回 None (此時不使用快取)
+    """
+    global _cache, _cache_failed
+    
+    with _cache_lock:
+        if _cache is None and not _cache_failed:
+            try:
+                _cache = MetadataCache()
+            except (sqlite3.Error, OSError) as e:
+                print(f"無法建立影片資訊快取: {str(e)}")
+                _cache_failed = True
+        return _cache
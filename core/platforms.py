@@ -0,0 +1,97 @@
+"""
+平台設定模組
+
+以宣告式的平台設定描述各平台之間的差異 (HTTP headers、格式排序、連線數和
+頻寬上限等)，下載引擎依設定產生 yt-dlp 選項。新增平台只需新增一筆設定，
+並在 url_utils 中加入網址判斷
+"""
+
+from typing import Dict, Any, Optional, List
+
+
+class PlatformProfile:
+    """單一平台的下載設定"""
+    
+    # MP4 的格式排序：解析度和幀率優先，同畫質下偏好 H.264 + AAC，
+    # 讓合併為 MP4 時只需串流複製
+    DEFAULT_VIDEO_FORMAT_SORT = ['res', 'fps', 'vcodec:h264', 'acodec:aac']
+    
+    # 同一平台所有任務合計的連線數上限
+    DEFAULT_MAX_CONNECTIONS = 16
+    
+    def __init__(self, name: str, display_name: str,
+                 http_headers: Optional[Dict[str, str]] = None,
+                 video_format_sort: Optional[List[str]] = None,
+                 max_connections: int = DEFAULT_MAX_CONNECTIONS,
+                 max_rate: Optional[float] = None,
+                 ydl_options: Optional[Dict[str, Any]] = None):
+        """
+        初始化平台設定
+        
+        Args:
+            name: 平台識別字串 (與 url_utils.detect_platform 的結果相同)
+            display_name: 顯示名稱
+            http_headers: 解析和下載時附加的 HTTP headers
+            video_format_sort: MP4 影片的 yt-dlp 格式排序
+            max_connections: 同一平台所有任務合計的連線數上限 (由頻寬分配器平均分配)
+            max_rate: 同一平台所有任務合計的頻寬上限 (位元組/秒)，None 表示不限制
+            ydl_options: 覆蓋預設值的 yt-dlp 下載選項
+        """
+        self.name = name
+        self.display_name = display_name
+        self.http_headers = dict(http_headers or {})
+        self.video_format_sort = list(video_format_sort or self.DEFAULT_VIDEO_FORMAT_SORT)
+        self.max_connections = max(1, int(max_connections))
+        self.max_rate = max_rate
+        self.ydl_options = dict(ydl_options or {})
+    
+    def apply_headers(self, ydl_opts: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        將平台的 HTTP headers 加入 yt-dlp 選項
+        
+        Args:
+            ydl_opts: yt-dlp 選項字典 (會直接修改)
+        
+        Returns:
+            同一個選項字典
+        """
+        if self.http_headers:
+            ydl_opts['http_headers'] = dict(self.http_headers)
+        return ydl_opts
+
+
+# 平台設定
+PLATFORM_PROFILES = {profile.name: profile for profile in (
+    PlatformProfile(
+        name="youtube",
+        display_name="YouTube",
+        # YouTube 對同一 IP 的大量連線容易回應 HTTP 429，連線數較保守
+        max_connections=8,
+    ),
+    PlatformProfile(
+        name="bilibili",
+        display_name="Bilibili",
+        http_headers={  # Bilibili 需要特定的 headers
+            'Referer': 'https://www.bilibili.com',
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+        },
+        # Bilibili 的 CDN 對單一連線限速，多連線下載效果明顯
+        max_connections=16,
+    ),
+)}
+
+# 無法判斷平台時使用的設定
+DEFAULT_PLATFORM = "youtube"
+
+
+def get_platform_profile(platform: str) -> PlatformProfile:
+    """
+    獲取平台設定
+    
+    Args:
+        platform: 平台識別字串
+    
+    Returns:
+        平台設定，未知平台返回預設平台的設定
+    """
+    return PLATFORM_PROFILES.get(platform) or PLATFORM_PROFILES[DEFAULT_PLATFORM]
@@ -0,0 +1,220 @@
+"""
+後處理模組
+
+下載流程分為網路和後處理兩個階段：下載完成的任務離開網路階段 (讓出下載名額)，
+再取得後處理名額執行 FFmpeg (合併、轉封裝、轉檔)。後處理名額依 CPU 核心數
+限制，避免 CPU 密集的工作互相搶占，拖慢仍在下載的任務
+"""
+
+import os
+import subprocess
+import threading
+import time
+from typing import List, Dict, Any, Optional
+
+from core.cancellation import CancellationToken
+from core.downloader_strategy import probe_tools
+
+
+class PostprocessPool:
+    """後處理工作池，限制同時執行的 FFmpeg 程序數量"""
+    
+    # 依 CPU 核心數決定同時執行的後處理數量
+    DEFAULT_MAX_WORKERS = os.cpu_count() or 1
+    
+    # 不使用 FFmpeg 的輕量步驟 (不佔用後處理名額)，
+    # 名稱為 yt-dlp 後處理回調中的 postprocessor 欄位 (PostProcessor.pp_key())
+    LIGHTWEIGHT_POSTPROCESSORS = ('MoveFilesAfterDownload',)
+    
+    # 等待名額時檢查取消的間隔 (秒)
+    ACQUIRE_POLL_INTERVAL = 0.5
+    
+    # 音訊轉檔參數
+    AUDIO_CODECS = {
+        'mp3': ['-c:a', 'libmp3lame', '-b:a', '192k'],
+    }
+    
+    def __init__(self, max_workers: int = DEFAULT_MAX_WORKERS):
+        """
+        初始化工作池
+        
+        Args:
+            max_workers: 同時執行的後處理數量
+        """
+        self.max_workers = max(1, int(max_workers))
+        
+        self._semaphore = threading.BoundedSemaphore(self.max_workers)
+        self._local = threading.local()  # 各線程持有名額的層數 (同一線程可重複取得)
+    
+    def acquire(self, cancel_token: Optional[CancellationToken] = None):
+        """
+        取得後處理名額，名額用完時等待 (同一線程重複取得時不再佔用名額)
+        
+        Args:
+            cancel_token: 取消權杖，等待期間被取消時拋出 DownloadCancelled
+        """
+        depth = getattr(self._local, 'depth', 0)
+        if depth == 0:
+            while not self._semaphore.acquire(timeout=self.ACQUIRE_POLL_INTERVAL):
+                if cancel_token is not None:
+                    cancel_token.check()
+        self._local.depth = depth + 1
+    
+    def release(self):
+        """歸還目前線程取得的後處理名額"""
+        depth = getattr(self._local, 'depth', 0)
+        if depth == 0:
+            return
+        self._local.depth = depth - 1
+        if depth == 1:
+            self._semaphore.release()
+    
+    def release_all(self):
+        """歸還目前線程持有的所有名額 (後處理中途失敗時使用)"""
+        if getattr(self._local, 'depth', 0) > 0:
+            self._local.depth = 1
+            self.release()
+    
+    def run_ffmpeg(self, args: List[str], cancel_token: Optional[CancellationToken] = None):
+        """
+        取得後處理名額後執行 FFmpeg，等待其完成
+        
+        Args:
+            args: FFmpeg 參數 (不含執行檔)
+            cancel_token: 取消權杖，取消時終止 FFmpeg 程序
+        
+        Raises:
+            DownloadCancelled: 任務在轉檔期間被取消
+            RuntimeError: FFmpeg 不存在或執行失敗
+        """
+        self.acquire(cancel_token)
+        try:
+            self._run(args, cancel_token)
+        finally:
+            self.release()
+    
+    def transcode_audio(self, source: str, codec: str = 'mp3',
+                        cancel_token: Optional[CancellationToken] = None) -> str:
+        """
+        將音訊檔轉檔，成功後刪除原始檔
+        
+        Args:
+            source: 原始檔路徑
+            codec: 目標格式 (見 AUDIO_CODECS)
+            cancel_token: 取消權杖
+        
+        Returns:
+            轉檔後的檔案路徑 (原始檔已是目標格式時直接返回原始檔路徑)
+        """
+        base, ext = os.path.splitext(source)
+        if ext.lower() == f".{codec}":
+            return source
+        
+        target = f"{base}.{codec}"
+        args = ['-y', '-loglevel', 'error', '-i', source, '-vn', '-map_metadata', '0']
+        args += self.AUDIO_CODECS[codec] + [target]
+        
+        try:
+            self.run_ffmpeg(args, cancel_token)
+        except BaseException:
+            if os.path.exists(target):
+                os.remove(target)
+            raise
+        
+        os.remove(source)
+        return target
+    
+    def _run(self, args: List[str], cancel_token: Optional[CancellationToken]):
+        """執行 FFmpeg 程序"""
+        if cancel_token is not None:
+            cancel_token.check()
+        
+        ffmpeg = probe_tools().get("ffmpeg")
+        if ffmpeg is None:
+            raise RuntimeError("找不到 FFmpeg")
+        
+        process = subprocess.Popen([ffmpeg] + args, stdin=subprocess.DEVNULL,
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        if cancel_token is not None:
+            cancel_token.register_process(process)
+        try:
+            _, stderr = process.communicate()
+        finally:
+            if cancel_token is not None:
+                cancel_token.unregister_process(process)
+        
+        if cancel_token is not None:
+            cancel_token.check()
+        if process.returncode != 0:
+            message = stderr.decode('utf-8', 'replace').strip().splitlines()
+            raise RuntimeError(f"FFmpeg 執行失敗: {message[-1] if message else process.returncode}")
+
+
+class PostprocessTimer:
+    """記錄單一任務各個後處理步驟 (合併、轉封裝、轉檔等) 的耗時"""
+    
+    def __init__(self):
+        """初始化計時器"""
+        self._lock = threading.Lock()
+        self._timings = {}  # 步驟名稱 -> 累計秒數
+        self._started = {}
+    
+    def __call__(self, status: Dict[str, Any]):
+        """
+        後處理回調 (yt-dlp postprocessor_hooks 格式)
+        
+        Args:
+            status: 包含 status ("started", "processing", "finished") 和 postprocessor 的字典
+        """
+        name = status.get('postprocessor') or 'unknown'
+        now = time.monotonic()
+        
+        with self._lock:
+            if status.get('status') == 'started':
+                self._started[name] = now
+            elif status.get('status') == 'finished' and name in self._started:
+                elapsed = now - self._started.pop(name)
+                self._timings[name] = self._timings.get(name, 0.0) + elapsed
+    
+    def get_timings(self) -> Dict[str, float]:
+        """
+        獲取各步驟的耗時
+        
+        Returns:
+            步驟名稱對應累計秒數的字典 (副本)
+        """
+        with self._lock:
+            return dict(self._timings)
+    
+    def summary(self) -> str:
+        """
+        獲取耗時摘要
+        
+        Returns:
+            如 "Merger 3.2s, VideoRemuxer 0.1s (共 3.3s)"，沒有後處理時返回空字串
+        """
+        timings = self.get_timings()
+        if not timings:
+            return ""
+        
+        parts = ", ".join(f"{name} {seconds:.1f}s" for name, seconds in timings.items())
+        return f"{parts} (共 {sum(timings.values()):.1f}s)"
+
+
+# 全域共用的工作池 (延遲建立)
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_postprocess_pool() -> PostprocessPool:
+    """
+    獲取全域後處理工作池
+    
+    Returns:
+        工作池實例
+    """
+    global _pool
+    
+    with _pool_lock:
+        if _pool is None:
+            _pool = PostprocessPool()
+        return _pool
@@ -0,0 +1,390 @@
+"""
+下載進度彙整模組
+
+收集 yt-dlp 進度和後處理回調，為每個任務只保留最新狀態，並以固定頻率
+發布進度快照 (含平滑後的速度和剩餘時間)，避免大量事件湧入 UI。
+任務的進度以位元組計算，涵蓋所有要下載的串流 (如分開下載的影片和音訊)，
+最後一段進度保留給後處理
+"""
+
+import threading
+import time
+from typing import List, Dict, Any, Optional, Callable
+
+from core.format_selection import estimate_format_size
+
+
+def format_size(size_bytes: float) -> str:
+    """格式化檔案大小"""
+    if size_bytes < 1024:
+        return f"{size_bytes:.0f} B"
+    elif size_bytes < 1024 * 1024:
+        return f"{size_bytes/1024:.1f} KB"
+    elif size_bytes < 1024 * 1024 * 1024:
+        return f"{size_bytes/(1024*1024):.1f} MB"
+    else:
+        return f"{size_bytes/(1024*1024*1024):.1f} GB"
+
+
+def format_speed(speed: Optional[float]) -> str:
+    """格式化下載速度，沒有速度時返回空字串"""
+    if not speed or speed <= 0:
+        return ""
+    return f"{format_size(speed)}/s"
+
+
+def format_eta(eta: Optional[float]) -> str:
+    """格式化剩餘時間，沒有剩餘時間時返回空字串"""
+    if eta is None or eta < 0:
+        return ""
+    
+    minutes, seconds = divmod(int(eta), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours > 0:
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+    return f"{minutes:02d}:{seconds:02d}"
+
+
+class ProgressSnapshot:
+    """單一任務在某個時間點的進度快照"""
+    
+    def __init__(self, job_id: str, status: str, progress: float, downloaded_bytes: int,
+                 total_bytes: Optional[int], speed: Optional[float], eta: Optional[float],
+                 filename: str, postprocessor: str = ""):
+        """
+        初始化進度快照
+        
+        Args:
+            job_id: 任務 ID
+            status: yt-dlp 狀態 ("downloading", "finished", "error") 或 "postprocessing"
+            progress: 進度百分比 (0 - 100)
+            downloaded_bytes: 所有串流合計的已下載位元組數
+            total_bytes: 所有串流合計的總位元組數 (未知時為 None)
+            speed: 平滑後的下載速度 (位元組/秒)
+            eta: 預估剩餘下載時間 (秒)
+            filename: 目前下載的檔案名稱 (不含路徑)
+            postprocessor: 目前的後處理步驟名稱 (後處理中時)
+        """
+        self.job_id = job_id
+        self.status = status
+        self.progress = progress
+        self.downloaded_bytes = downloaded_bytes
+        self.total_bytes = total_bytes
+        self.speed = speed
+        self.eta = eta
+        self.filename = filename
+        self.postprocessor = postprocessor
+    
+    @property
+    def speed_str(self) -> str:
+        """格式化後的下載速度"""
+        return format_speed(self.speed)
+    
+    @property
+    def eta_str(self) -> str:
+        """格式化後的剩餘時間"""
+        return format_eta(self.eta)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """轉換為字典"""
+        return {
+            'job_id': self.job_id,
+            'status': self.status,
+            'progress': self.progress,
+            'downloaded_bytes': self.downloaded_bytes,
+            'total_bytes': self.total_bytes,
+            'speed': self.speed,
+            'eta': self.eta,
+            'filename': self.filename,
+            'postprocessor': self.postprocessor,
+        }
+
+
+class _JobProgressState:
+    """任務的內部進度狀態"""
+    
+    def __init__(self):
+        self.status = ""
+        self.filename = ""
+        self.streams = {}           # 串流鍵 (格式 ID 或檔名) -> [已下載位元組數, 總位元組數或 None]
+        self.raw_speed = None
+        self.progress = 0.0
+        self.smoothed_speed = None
+        self.sample_bytes = 0
+        self.sample_time = None
+        self.postprocessor = ""     # 目前的後處理步驟
+        self.postprocess_done = 0   # 已完成的後處理步驟數
+        self.dirty = False
+    
+    @property
+    def downloaded_bytes(self) -> int:
+        """所有串流合計的已下載位元組數"""
+        return sum(downloaded for downloaded, _ in self.streams.values())
+    
+    @property
+    def total_bytes(self) -> Optional[int]:
+        """所有串流合計的總位元組數，有任何串流大小未知時返回 None"""
+        if not self.streams or any(total is None for _, total in self.streams.values()):
+            return None
+        return sum(max(downloaded, total) for downloaded, total in self.streams.values())
+
+
+class ProgressAggregator:
+    """進度彙整器，以固定頻率向訂閱者發布有變更的任務快照"""
+    
+    # 預設發布間隔 (秒)，即 10 Hz
+    DEFAULT_INTERVAL = 0.1
+    
+    # 速度指數平滑係數 (越小越平滑)
+    SPEED_SMOOTHING = 0.3
+    
+    # 下載階段佔整體進度的比例，其餘保留給後處理 (每完成一個步驟前進剩餘部分的一半，
+    # 步驟數事先未知，因此任務完成前不會到達 100%)
+    DOWNLOAD_SHARE = 0.95
+    
+    def __init__(self, interval: float = DEFAULT_INTERVAL):
+        """
+        初始化進度彙整器
+        
+        Args:
+            interval: 發布間隔 (秒)
+        """
+        self.interval = interval
+        
+        self._lock = threading.Lock()
+        self._states: Dict[str, _JobProgressState] = {}
+        self._subscribers: List[Callable[[List[ProgressSnapshot]], None]] = []
+        self._thread = None
+        self._stop_event = threading.Event()
+    
+    def subscribe(self, callback: Callable[[List[ProgressSnapshot]], None]):
+        """
+        訂閱進度快照
+        
+        Args:
+            callback: 回調函數，在發布線程中接收有變更的快照列表
+        """
+        with self._lock:
+            if callback not in self._subscribers:
+                self._subscribers.append(callback)
+    
+    def unsubscribe(self, callback: Callable[[List[ProgressSnapshot]], None]):
+        """取消訂閱"""
+        with self._lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+    
+    def seed(self, job_id: str, formats: List[Dict[str, Any]], duration: Optional[float] = None):
+        """
+        以預計下載的所有串流 (如影片加音訊) 的估計大小建立任務的總量
+        
+        yt-dlp 的進度回調只帶有目前下載中的格式，因此需在下載開始前由選出的
+        格式建立所有串流，進度才不會在第一個串流完成時就接近完成
+        
+        Args:
+            job_id: 任務 ID
+            formats: 選出的 yt-dlp 格式字典列表
+            duration: 影片長度 (秒)，用於以位元率估計大小
+        """
+        with self._lock:
+            state = self._states.get(job_id)
+            if state is None:
+                state = self._states[job_id] = _JobProgressState()
+            
+            for f in formats:
+                if not f or not f.get('format_id'):
+                    continue
+                # 重試時保留已下載的位元組數
+                stream = state.streams.setdefault(f['format_id'], [0, None])
+                size = estimate_format_size(f, duration)[0]
+                if size:
+                    stream[1] = max(size, stream[0])
+    
+    def update(self, job_id: str, d: Dict[str, Any]):
+        """
+        記錄 yt-dlp 進度回調的最新狀態 (可在任何線程呼叫，只更新記憶體)
+        
+        Args:
+            job_id: 任務 ID
+            d: yt-dlp progress_hooks 收到的字典
+        """
+        filename = (d.get('filename') or '').replace('\\', '/').split('/')[-1]
+        status = d.get('status')
+        downloaded = d.get('downloaded_bytes') or 0
+        total = d.get('total_bytes') or d.get('total_bytes_estimate')
+        speed = d.get('speed')
+        
+        info = d.get('info_dict') or {}
+        key = info.get('format_id') or filename
+        
+        with self._lock:
+            state = self._states.get(job_id)
+            if state is None:
+                state = self._states[job_id] = _JobProgressState()
+            
+            if key not in state.streams:
+                # yt-dlp 改用備用格式時 (選出的格式無法下載)，捨棄尚未收到資料的預估串流
+                for stale in [k for k, (done, _) in state.streams.items() if not done]:
+                    del state.streams[stale]
+            
+            stream = state.streams.setdefault(key, [0, None])
+            if status == 'finished':
+                # 完成時以實際大小為準
+                stream[0] = stream[1] = total or downloaded or stream[0]
+            else:
+                stream[0] = downloaded
+                if total:
+                    stream[1] = max(total, downloaded)
+            
+            state.status = status or state.status
+            state.filename = filename or state.filename
+            state.raw_speed = speed if isinstance(speed, (int, float)) and status == 'downloading' else None
+            state.dirty = True
+        
+        self._ensure_thread()
+    
+    def update_postprocess(self, job_id: str, d: Dict[str, Any]):
+        """
+        記錄 yt-dlp 後處理回調的狀態 (可在任何線程呼叫，只更新記憶體)
+        
+        Args:
+            job_id: 任務 ID
+            d: yt-dlp postprocessor_hooks 收到的字典
+        """
+        with self._lock:
+            state = self._states.get(job_id)
+            if state is None:
+                state = self._states[job_id] = _JobProgressState()
+            
+            state.status = 'postprocessing'
+            state.raw_speed = None
+            state.smoothed_speed = None
+            if d.get('status') == 'started':
+                state.postprocessor = d.get('postprocessor') or ""
+            elif d.get('status') == 'finished':
+                state.postprocess_done += 1
+            state.dirty = True
+        
+        self._ensure_thread()
+    
+    def get_totals(self) -> Dict[str, Any]:
+        """
+        獲取所有下載中任務的合計進度 (可用於估計整體吞吐量和完成時間)
+        
+        Returns:
+            包含 jobs (下載中任務數), downloaded_bytes, total_bytes (有未知大小時為 None),
+            speed (合計速度，位元組/秒) 和 eta (秒，無法估計時為 None) 的字典
+        """
+        with self._lock:
+            states = [state for state in self._states.values() if state.status == 'downloading']
+            downloaded = sum(state.downloaded_bytes for state in states)
+            totals = [state.total_bytes for state in states]
+            speed = sum(state.smoothed_speed or 0 for state in states)
+        
+        total = sum(totals) if totals and None not in totals else None
+        eta = None
+        if total is not None and speed > 0:
+            eta = max(total - downloaded, 0) / speed
+        
+        return {
+            'jobs': len(states),
+            'downloaded_bytes': downloaded,
+            'total_bytes': total,
+            'speed': speed or None,
+            'eta': eta,
+        }
+    
+    def remove(self, job_id: str):
+        """移除任務的進度狀態"""
+        with self._lock:
+            self._states.pop(job_id, None)
+    
+    def flush(self):
+        """立即發布所有有變更的快照"""
+        snapshots = self._collect(time.monotonic())
+        if snapshots:
+            self._publish(snapshots)
+    
+    def stop(self):
+        """停止發布線程"""
+        self._stop_event.set()
+    
+    def _ensure_thread(self):
+        """需要時啟動發布線程"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop_event.clear()
+                self._thread = threading.Thread(target=self._run, name="progress-publisher", daemon=True)
+                self._thread.start()
+    
+    def _run(self):
+        """發布線程主迴圈"""
+        while not self._stop_event.wait(self.interval):
+            self.flush()
+    
+    def _collect(self, now: float) -> List[ProgressSnapshot]:
+        """計算有變更任務的快照並清除變更標記"""
+        snapshots = []
+        
+        with self._lock:
+            for job_id, state in self._states.items():
+                if not state.dirty:
+                    continue
+                state.dirty = False
+                
+                downloaded = state.downloaded_bytes
+                total = state.total_bytes
+                
+                # 速度：優先使用 yt-dlp 提供的速度，否則以位元組差計算
+                # (已下載量為所有串流的合計，換檔時不會倒退)
+                sample = state.raw_speed
+                if (sample is None and state.status == 'downloading'
+                        and state.sample_time is not None and now > state.sample_time):
+                    sample = max(downloaded - state.sample_bytes, 0) / (now - state.sample_time)
+                state.sample_bytes = downloaded
+                state.sample_time = now
+                
+                if sample is not None:
+                    if state.smoothed_speed is None:
+                        state.smoothed_speed = sample
+                    else:
+                        state.smoothed_speed = (self.SPEED_SMOOTHING * sample
+                                                + (1 - self.SPEED_SMOOTHING) * state.smoothed_speed)
+                
+                # 進度只增不減 (估計的總量可能在下載中途變大)
+                if state.status == 'postprocessing':
+                    remaining = (1 - self.DOWNLOAD_SHARE) * 0.5 ** state.postprocess_done
+                    progress = (1 - remaining) * 100
+                elif total:
+                    progress = min(downloaded / total, 1.0) * self.DOWNLOAD_SHARE * 100
+                else:
+                    progress = 0.0
+                state.progress = max(state.progress, progress)
+                
+                eta = None
+                if state.status == 'downloading' and total and state.smoothed_speed:
+                    eta = max(total - downloaded, 0) / state.smoothed_speed
+                
+                snapshots.append(ProgressSnapshot(
+                    job_id, state.status, state.progress, downloaded, total,
+                    state.smoothed_speed, eta, state.filename,
+                    state.postprocessor if state.status == 'postprocessing' else ""
+                ))
+            
+            subscribers = list(self._subscribers)
+        
+        return snapshots if subscribers else []
+    
+    def _publish(self, snapshots: List[ProgressSnapshot]):
+        """將快照交給所有訂閱者"""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        
+        for callback in subscribers:
+            try:
+                callback(snapshots)
+            except Exception as e:
+                print(f"進度訂閱者處理失敗: {str(e)}")
@@ -0,0 +1,285 @@
+"""
+短網址解析模組
+
+將 b23.tv 等短網址解析為標準網址，讓以影片 ID 為鍵的去重、下載記錄和快取
+也能用於短網址。解析以 HEAD 請求追蹤重新導向 (批量時並行)，結果永久保存在
+磁碟上的 SQLite 資料庫，之後的查詢不再需要網路請求。youtu.be 短網址的路徑
+就是影片 ID，不需要網路請求
+"""
+
+import os
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, List, Iterable
+from urllib.parse import urljoin
+
+from core.url_utils import UrlProcessor, detect_platform
+from core.platforms import get_platform_profile
+from utils.paths import get_cache_dir
+
+
+class ShortLinkResolver:
+    """短網址解析器，以短網址代碼為鍵保存解析結果"""
+    
+    # 需要網路請求才能解析的短網址 (群組 1 為短網址代碼)
+    _SHORT_URL_PATTERN = re.compile(r'(?:https?://)?b23\.tv/([0-9A-Za-z]+)')
+    
+    # 追蹤重新導向的次數上限
+    MAX_REDIRECTS = 5
+    
+    # 批量解析時的並行請求數
+    DEFAULT_MAX_WORKERS = 8
+    
+    # 保存的對應數量上限 (超過時淘汰最早解析的項目)
+    DEFAULT_MAX_ENTRIES = 10000
+    
+    # 資料庫檔案名稱
+    DB_FILENAME = "short_links.sqlite3"
+    
+    def __init__(self, db_path: Optional[str] = None,
+                 max_workers: int = DEFAULT_MAX_WORKERS,
+                 max_entries: int = DEFAULT_MAX_ENTRIES):
+        """
+        初始化短網址解析器
+        
+        Args:
+            db_path: 資料庫路徑，預設為使用者快取目錄 (":memory:" 表示不寫入磁碟)
+            max_workers: 批量解析時的並行請求數
+            max_entries: 保存的對應數量上限
+        """
+        self.db_path = db_path or os.path.join(get_cache_dir(), self.DB_FILENAME)
+        self.max_workers = max(1, int(max_workers))
+        self.max_entries = max_entries
+        
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS short_links (
+                code TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                resolved_at REAL NOT NULL
+            )
+        """)
+        self._conn.commit()
+    
+    @classmethod
+    def is_short_url(cls, url: str) -> bool:
+        """
+        判斷 URL 是否為短網址 (b23.tv 或 youtu.be)
+        
+        Args:
+            url: 要判斷的 URL
+        
+        Returns:
+            布林值
+        """
+        return bool(url) and ("b23.tv/" in url or "youtu.be/" in url)
+    
+    def lookup(self, url: str) -> Optional[str]:
+        """
+        查詢已解析的標準網址 (不發出網路請求)
+        
+        Args:
+            url: 短網址
+        
+        Returns:
+            標準網址，不是短網址或尚未解析過時返回 None
+        """
+        if not url:
+            return None
+        
+        if "youtu.be/" in url:
+            extracted = UrlProcessor.extract_urls(url)
+            return extracted[0].url if extracted else None
+        
+        code = self._code(url)
+        if code is None:
+            return None
+        
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url FROM short_links WHERE code = ?", (code,)
+            ).fetchone()
+        return row[0] if row else None
+    
+    def resolve(self, url: str) -> str:
+        """
+        解析短網址，尚未解析過時發出網路請求
+        
+        Args:
+            url: 任意 URL
+        
+        Returns:
+            標準網址，不是短網址或解析失敗時返回原網址
+        """
+        resolved = self.lookup(url)
+        if resolved:
+            return resolved
+        
+        code = self._code(url)
+        if code is None:
+            return url
+        
+        try:
+            resolved = self._fetch(f"https://b23.tv/{code}")
+        except Exception as e:
+            print(f"解析短網址失敗: {str(e)}")
+            return url
+        
+        if not resolved:
+            print(f"解析短網址失敗: {url} 沒有導向影片網址")
+            return url
+        
+        self._store(code, resolved)
+        return resolved
+    
+    def resolve_many(self, urls: Iterable[str]) -> List[str]:
+        """
+        批量解析短網址，尚未解析過的短網址以多個 HEAD 請求並行解析
+        
+        Args:
+            urls: URL 列表 (可以混合一般網址)
+        
+        Returns:
+            與輸入順序相同的網址列表，短網址已替換為標準網址 (解析失敗時保留原網址)
+        """
+        urls = list(urls)
+        results = {url: self.lookup(url) for url in urls}
+        pending = [url for url, resolved in results.items()
+                   if resolved is None and self._code(url) is not None]
+        
+        if len(pending) == 1:
+            results[pending[0]] = self.resolve(pending[0])
+        elif pending:
+            workers = min(self.max_workers, len(pending))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="short-link") as executor:
+                for url, resolved in zip(pending, executor.map(self.resolve, pending)):
+                    results[url] = resolved
+        
+        return [results[url] or url for url in urls]
+    
+    def clear(self):
+        """清除所有解析結果"""
+        with self._lock:
+            self._conn.execute("DELETE FROM short_links")
+            self._conn.commit()
+    
+    def _code(self, url: str) -> Optional[str]:
+        """取得短網址代碼，不是需要網路解析的短網址時返回 None"""
+        if not url:
+            return None
+        match = self._SHORT_URL_PATTERN.search(url)
+        return match.group(1) if match else None
+    
+    def _fetch(self, url: str) -> Optional[str]:
+        """
+        以 HEAD 請求追蹤重新導向，直到離開短網址網域
+        
+        Args:
+            url: 短網址
+        
+        Returns:
+            標準網址，沒有導向支援的平台時返回 None
+        """
+        from core.http_client import get_http_client  # 延遲匯入，只查詢快取時不載入 requests
+        
+        client = get_http_client()
+        headers = get_platform_profile(detect_platform(url)).http_headers
+        
+        for _ in range(self.MAX_REDIRECTS):
+            response = client.head(url, headers=headers, allow_redirects=False)
+            location = response.headers.get('Location')
+            if not response.is_redirect or not location:
+                break
+            
+            url = urljoin(url, location)
+            if self._code(url) is None:
+                # 與批量擷取相同的標準化網址 (去除分享參數等)
+                extracted = UrlProcessor.extract_urls(url)
+                return extracted[0].url if extracted else None
+        
+        return None
+    
+    def _store(self, code: str, url: str):
+        """保存解析結果，超過數量上限時淘汰最早解析的項目"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO short_links (code, url, resolved_at) VALUES (?, ?, ?)",
+                (code, url, time.time())
+            )
+            self._conn.execute(
+                "DELETE FROM short_links WHERE code IN ("
+                "SELECT code FROM short_links ORDER BY resolved_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+            self._conn.commit()
+
+
+# 全域共用的解析器 (延遲建立)
+_resolver = None
+_resolver_lock = threading.Lock()
+
+def get_short_link_resolver() -> ShortLinkResolver:
+    """
+    獲取全域短網址解析器
+    
+    Returns:
+        解析器實例，無法建立資料庫時改用記憶體中的資料庫 (解析結果不會保存)
+    """
+    global _resolver
+    
+    with _resolver_lock:
+        if _resolver is None:
+            try:
+                _resolver = ShortLinkResolver()
+            except (sqlite3.Error, OSError) as e:
+                print(f"無法建立短網址快取: {str(e)}")
+                _resolver = ShortLinkResolver(":memory:")
+        return _resolver
+
+def lookup_short_url(url: str) -> Optional[str]:
+    """
+    查詢已解析的短網址 (不發出網路請求)
+    
+    Args:
+        url: 短網址
+    
+    Returns:
+        標準網址，不是短網址或尚未解析過時返回 None
+    """
+    if not ShortLinkResolver.is_short_url(url):
+        return None
+    return get_short_link_resolver().lookup(url)
+
+def resolve_short_url(url: str) -> str:
+    """
+    解析短網址 (尚未解析過時發出網路請求)
+    
+    Args:
+        url: 任意 URL
+    
+    Returns:
+        標準網址，不是短網址或解析失敗時返回原網址
+    """
+    if not ShortLinkResolver.is_short_url(url):
+        return url
+    return get_short_link_resolver().resolve(url)
+
+def resolve_short_urls(urls: Iterable[str]) -> List[str]:
+    """
+    批量並行解析短網址
+    
+    Args:
+        urls: URL 列表
+    
+    Returns:
+        與輸入順序相同的網址列表，短網址已替換為標準網址
+    """
+    urls = list(urls)
+    if not any(ShortLinkResolver.is_short_url(url) for url in urls):
+        return urls
+    return get_short_link_resolver().resolve_many(urls)
@@ -5,7 +5,15 @@ URL 處理工具模組
 """
 
 import re
-from typing import Optional, List, Dict, Tuple
+from typing import Optional, List, Dict, Tuple, Iterable, Iterator, NamedTuple, Union
+
+
+class ExtractedUrl(NamedTuple):
+    """從文字中擷取的網址"""
+    platform: str               # 平台識別字串
+    video_id: Optional[str]     # 影片 ID (與 extract_video_id 相同)，播放清單、頻道和短網址為 None
+    url: str                    # 標準化後的網址
+
 
 class UrlProcessor:
     """URL 處理器類別，負責處理和清理不同平台的影片 URL"""
@@ -33,6 +41,51 @@ class UrlProcessor:
         ]
     }
     
+    # 播放清單、頻道等包含多個影片的 URL 模式
+    _PLAYLIST_PATTERNS = {
+        PLATFORM_YOUTUBE: [
+            # 播放清單
+            r'(https?://(?:www\.|m\.)?youtube\.com/playlist\?list=[\w\-]+)',
+            # 頻道 (@名稱、channel ID、自訂網址或舊版使用者網址，可帶分頁)
+            r'(https?://(?:www\.|m\.)?youtube\.com/(?:@[\w\-\.]+|channel/[\w\-]+|c/[\w\-]+|user/[\w\-]+)'
+            r'(?:/(?:videos|shorts|streams|playlists))?)'
+        ],
+        PLATFORM_BILIBILI: [
+            # 使用者空間 (投稿、合集、收藏夾等)
+            r'(https?://space\.bilibili\.com/\d+(?:/[^\s"]*)?)',
+            # 播放清單和收藏夾
+            r'(https?://(?:www\.)?bilibili\.com/(?:list|medialist/detail)/[^\s"]+)'
+        ]
+    }
+    
+    # 批量擷取用的合併模式：一次掃描即可找出文字中所有平台的網址，
+    # 影片 ID 只接受 ASCII 字元，避免吃進緊接在網址後的中文
+    _BULK_PATTERN = re.compile(
+        # 先以開頭字元快速排除不可能是網址的位置
+        r'(?<![0-9A-Za-z_.\-])(?=[hwmybs])(?:https?://)?(?:'
+        # YouTube 影片 (v= 不一定是第一個參數)
+        r'(?:www\.|m\.)?youtube\.com/watch\?(?:[^\s"\'<>#]*?&)?v=(?P<youtube>[0-9A-Za-z_\-]+)'
+        r'|(?:www\.)?youtu\.be/(?P<youtu_be>[0-9A-Za-z_\-]+)'
+        # YouTube 播放清單和頻道
+        r'|(?:www\.|m\.)?youtube\.com/playlist\?(?:[^\s"\'<>#]*?&)?list=(?P<youtube_list>[0-9A-Za-z_\-]+)'
+        r'|(?:www\.|m\.)?youtube\.com/(?P<youtube_channel>(?:@[0-9A-Za-z_\-.]+|(?:channel|c|user)/[0-9A-Za-z_\-]+)'
+        r'(?:/(?:videos|shorts|streams|playlists))?)'
+        # Bilibili 影片 (保留分P參數)
+        r'|(?:www\.|m\.)?bilibili\.com/video/(?P<bilibili>BV[0-9A-Za-z]+|av\d+)/?'
+        r'(?:\?(?:[^\s"\'<>#]*?&)?p=(?P<bilibili_part>\d+))?'
+        # Bilibili 使用者空間、播放清單和短網址
+        r'|space\.bilibili\.com/(?P<bilibili_space>\d+(?:/[^\s"\'<>?#]*)?)'
+        r'|(?:www\.)?bilibili\.com/(?P<bilibili_list>(?:list|medialist/detail)/[^\s"\'<>]+)'
+        r'|b23\.tv/(?P<b23>[0-9A-Za-z]+)'
+        r')'
+    )
+    
+    # 合併模式能比對的網域關鍵字，不含任何關鍵字的片段直接略過 (聊天記錄等大多數行都沒有網址)
+    _BULK_KEYWORDS = ('youtu', 'bilibili.com', 'b23.tv')
+    
+    # 可以出現在網址中的最長長度，用於串流擷取時判斷區塊結尾是否為被切斷的網址
+    MAX_URL_LENGTH = 2048
+    
     @classmethod
     def clean_url(cls, url: str) -> str:
         """
@@ -52,6 +105,12 @@ class UrlProcessor:
         
         if platform == cls.PLATFORM_UNKNOWN:
             return url
+        
+        # 播放清單和頻道保留完整網址 (其參數如 list= 是必要的)
+        for pattern in cls._PLAYLIST_PATTERNS.get(platform, []):
+            match = re.search(pattern, url)
+            if match:
+                return match.group(1)
             
         patterns = cls._URL_PATTERNS.get(platform, [])
         
@@ -68,9 +127,12 @@ class UrlProcessor:
                         video_id = video_id_match.group(1)
                         return f"https://www.youtube.com/watch?v={video_id}"
                 
-                # 移除 Bilibili URL 中的多餘參數
-                if platform == cls.PLATFORM_BILIBILI and '?' in clean_url:
+                # 移除 Bilibili URL 中的多餘參數，但保留分P參數 (p=N)
+                if platform == cls.PLATFORM_BILIBILI:
                     clean_url = clean_url.split('?')[0]
+                    part_match = re.search(r'[?&]p=(\d+)', url)
+                    if part_match and "/video/" in clean_url:
+                        clean_url = f"{clean_url}?p={part_match.group(1)}"
                 
                 return clean_url
         
@@ -120,7 +182,50 @@ class UrlProcessor:
         cleaned_url = cls.clean_url(url)
         return cleaned_url != url or any(
             re.search(pattern, url) for pattern in cls._URL_PATTERNS.get(platform, [])
-        )
+        ) or cls.is_playlist_url(url)
+    
+    @classmethod
+    def is_collection_url(cls, url: str) -> bool:
+        """
+        判斷 URL 是否為播放清單、頻道或使用者空間
+        
+        Args:
+            url: 要判斷的 URL
+            
+        Returns:
+            布林值，表示 URL 是否符合播放清單或頻道的模式
+        """
+        if not url:
+            return False
+        
+        platform = cls.detect_platform(url)
+        return any(re.search(pattern, url) for pattern in cls._PLAYLIST_PATTERNS.get(platform, []))
+    
+    @classmethod
+    def is_playlist_url(cls, url: str) -> bool:
+        """
+        判斷 URL 是否可能包含多個影片
+        
+        包含播放清單、頻道、Bilibili 使用者空間，以及未指定分P的 Bilibili 影片
+        (可能為多P投稿，需解析後才能得知)
+        
+        Args:
+            url: 要判斷的 URL
+            
+        Returns:
+            布林值，表示下載前是否需要展開項目
+        """
+        if not url:
+            return False
+        
+        if cls.is_collection_url(url):
+            return True
+        
+        platform = cls.detect_platform(url)
+        if platform == cls.PLATFORM_BILIBILI and re.search(r'bilibili\.com/video/(?:BV|av)', url):
+            return not re.search(r'[?&]p=\d+', url)
+        
+        return False
     
     @classmethod
     def extract_video_id(cls, url: str) -> Optional[str]:
@@ -152,20 +257,149 @@ class UrlProcessor:
         elif platform == cls.PLATFORM_BILIBILI:
             # 提取 Bilibili 影片 ID
             if "bilibili.com" in url:
+                # 指定分P時以 "_p" 加上分P編號區分 (未指定分P表示整部影片)
+                part_match = re.search(r'[?&]p=(\d+)', url)
+                part_suffix = f"_p{part_match.group(1)}" if part_match else ""
+                
                 # BV 格式
                 bv_match = re.search(r'video/(BV[\w]+)', url)
                 if bv_match:
-                    return bv_match.group(1)
+                    return bv_match.group(1) + part_suffix
                     
                 # av 格式
                 av_match = re.search(r'video/av(\d+)', url)
                 if av_match:
-                    return f"av{av_match.group(1)}"
+                    return f"av{av_match.group(1)}{part_suffix}"
             
-            # 短網址需要額外處理，這裡暫不實現
+            # 短網址使用已解析過的對應 (只查詢快取，不發出網路請求；解析見 core.short_links)
+            elif "b23.tv" in url:
+                from core.short_links import lookup_short_url  # 延遲匯入，避免循環匯入
+                
+                resolved = lookup_short_url(url)
+                if resolved and "b23.tv" not in resolved:
+                    return cls.extract_video_id(resolved)
                     
         return None
 
+    @classmethod
+    def iter_urls(cls, source: Union[str, Iterable[str]]) -> Iterator[ExtractedUrl]:
+        """
+        從任意文字中擷取所有影片、播放清單和頻道網址 (已標準化並去除重複)
+        
+        以單一合併模式掃描，每段文字只比對一次。輸入可以是字串，或是依序產生
+        文字片段的可迭代物件 (如檔案物件，會逐行讀取而不會載入整個檔案)；
+        片段可以在任意位置切開，被切斷的網址會與下一個片段合併後再比對
+        
+        Args:
+            source: 文字，或文字片段的可迭代物件
+        
+        Yields:
+            擷取到的網址，依出現順序排列
+        """
+        if isinstance(source, str):
+            source = (source,)
+        
+        seen = set()
+        carry = ""
+        for fragment in source:
+            text = carry + fragment
+            cut = cls._find_safe_cut(text)
+            carry = text[cut:]
+            yield from cls._scan(text[:cut], seen)
+        
+        if carry:
+            yield from cls._scan(carry, seen)
+    
+    @classmethod
+    def extract_urls(cls, source: Union[str, Iterable[str]]) -> List[ExtractedUrl]:
+        """
+        從任意文字中擷取所有網址 (見 iter_urls)
+        
+        Args:
+            source: 文字，或文字片段的可迭代物件
+        
+        Returns:
+            擷取到的網址列表
+        """
+        return list(cls.iter_urls(source))
+    
+    @staticmethod
+    def _is_url_delimiter(char: str) -> bool:
+        """字元是否一定不屬於網址"""
+        return char.isspace() or char in '"\'<>'
+    
+    @classmethod
+    def _find_safe_cut(cls, text: str) -> int:
+        """
+        找出可以安全比對的範圍：最後一個分隔字元之後可能是被切斷的網址，留待下一個片段
+        
+        Args:
+            text: 目前累積的文字
+        
+        Returns:
+            可以比對的長度
+        """
+        end = len(text)
+        if not text or cls._is_url_delimiter(text[-1]):
+            return end
+        
+        limit = max(0, end - cls.MAX_URL_LENGTH)
+        cut = end
+        while cut > limit and not cls._is_url_delimiter(text[cut - 1]):
+            cut -= 1
+        
+        # 結尾的連續字元已超過網址長度上限，不可能是網址的一部分
+        if cut == limit and limit > 0:
+            return end
+        return cut
+    
+    @classmethod
+    def _scan(cls, text: str, seen: set) -> Iterator[ExtractedUrl]:
+        """比對一段文字，產生尚未出現過的網址"""
+        if not any(keyword in text for keyword in cls._BULK_KEYWORDS):
+            return
+        
+        for match in cls._BULK_PATTERN.finditer(text):
+            item = cls._normalize_match(match)
+            key = (item.platform, item.video_id) if item.video_id else item.url
+            if key in seen:
+                continue
+            seen.add(key)
+            yield item
+    
+    @classmethod
+    def _normalize_match(cls, match: "re.Match") -> ExtractedUrl:
+        """將合併模式的比對結果轉為標準化網址"""
+        groups = match.groupdict()
+        
+        video_id = groups['youtube'] or groups['youtu_be']
+        if video_id:
+            return ExtractedUrl(cls.PLATFORM_YOUTUBE, video_id,
+                                f"https://www.youtube.com/watch?v={video_id}")
+        if groups['youtube_list']:
+            return ExtractedUrl(cls.PLATFORM_YOUTUBE, None,
+                                f"https://www.youtube.com/playlist?list={groups['youtube_list']}")
+        if groups['youtube_channel']:
+            # @名稱可以包含 "."，但句尾的 "." 不屬於網址
+            return ExtractedUrl(cls.PLATFORM_YOUTUBE, None,
+                                f"https://www.youtube.com/{groups['youtube_channel'].rstrip('.')}")
+        
+        if groups['bilibili']:
+            url = f"https://www.bilibili.com/video/{groups['bilibili']}"
+            video_id = groups['bilibili']
+            if groups['bilibili_part']:
+                url += f"?p={groups['bilibili_part']}"
+                video_id += f"_p{groups['bilibili_part']}"
+            return ExtractedUrl(cls.PLATFORM_BILIBILI, video_id, url)
+        if groups['bilibili_space']:
+            return ExtractedUrl(cls.PLATFORM_BILIBILI, None,
+                                f"https://space.bilibili.com/{groups['bilibili_space'].rstrip('/')}")
+        if groups['bilibili_list']:
+            return ExtractedUrl(cls.PLATFORM_BILIBILI, None,
+                                f"https://www.bilibili.com/{groups['bilibili_list']}")
+        
+        return ExtractedUrl(cls.PLATFORM_BILIBILI, None, f"https://b23.tv/{groups['b23']}")
+
 # 為了向後兼容，提供模組級別的函數
 def clean_url(url: str) -> str:
     """
@@ -203,6 +437,18 @@ def validate_url(url: str) -> bool:
     """
     return UrlProcessor.validate_url(url)
 
+def is_playlist_url(url: str) -> bool:
+    """
+    判斷 URL 是否可能包含多個影片 (向後兼容函數)
+    
+    Args:
+        url: 要判斷的 URL
+        
+    Returns:
+        布林值，表示下載前是否需要展開項目
+    """
+    return UrlProcessor.is_playlist_url(url)
+
 def extract_video_id(url: str) -> Optional[str]:
     """
     從 URL 中提取影片 ID (向後兼容函數)
@@ -214,3 +460,27 @@ def extract_video_id(url: str) -> Optional[str]:
         影片 ID 或 None (如果無法提取)
     """
     return UrlProcessor.extract_video_id(url)
+
+def iter_urls(source: Union[str, Iterable[str]]) -> Iterator[ExtractedUrl]:
+    """
+    從任意文字或文字串流中擷取所有網址 (已標準化並去除重複)
+    
+    Args:
+        source: 文字，或文字片段的可迭代物件 (如檔案物件)
+        
+    Returns:
+        依出現順序產生 (平台, 影片 ID, 網址) 的迭代器
+    """
+    return UrlProcessor.iter_urls(source)
+
+def extract_urls(source: Union[str, Iterable[str]]) -> List[ExtractedUrl]:
+    """
+    從任意文字或文字串流中擷取所有網址 (已標準化並去除重複)
+    
+    Args:
+        source: 文字，或文字片段的可迭代物件 (如檔案物件)
+        
+    Returns:
+        (平台, 影片 ID, 網址) 列表，依出現順序排列
+    """
+    return UrlProcessor.extract_urls(source)
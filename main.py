@@ -1,26 +1,28 @@
 """
 影片下載器主程式入口點
 
-啟動應用程式的主視窗
+帶有下載參數時執行命令列介面，否則 (或指定 --gui 時) 啟動應用程式的主視窗
 """
 
 import sys
 import os
-from PySide6.QtWidgets import QApplication
-from PySide6.QtCore import QCoreApplication, Qt
 
-from ui.main_window import MainWindow
-from ui.theme import ThemeManager
-
-def main():
-    """主程式入口點"""
+def run_gui():
+    """啟動圖形界面"""
+    # 延遲匯入 PySide6，命令列模式不需要載入
+    from PySide6.QtWidgets import QApplication
+    from PySide6.QtCore import QCoreApplication, Qt
+    
+    from ui.main_window import MainWindow
+    from ui.theme import ThemeManager
+    
     # 設置高 DPI 支援 (使用新的非棄用 API)
     # 在 Qt 6 中，高 DPI 縮放默認已啟用，不需要顯式設置
     # QCoreApplication.setAttribute(Qt.AA_EnableHighDpiScaling, True)
     # QCoreApplication.setAttribute(Qt.AA_UseHighDpiPixmaps, True)
     
     # 創建應用程式
-    app = QApplication(sys.argv)
+    app = QApplication([arg for arg in sys.argv if arg != "--gui"])
     app.setApplicationName("影片下載器")
     
     # 設置應用程式圖示
@@ -39,5 +41,15 @@ def main():
     # 執行應用程式
     sys.exit(app.exec())
 
+def main():
+    """主程式入口點"""
+    args = sys.argv[1:]
+    
+    if args and "--gui" not in args:
+        from cli import main as cli_main
+        sys.exit(cli_main(args))
+    
+    run_gui()
+
 if __name__ == "__main__":
     main()
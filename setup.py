@@ -12,7 +12,8 @@ setup(
     long_description=long_description,
     long_description_content_type="text/markdown",
     url="https://github.com/yourusername/youtube_downloader",
-    packages=find_packages(),
+    packages=find_packages(exclude=["tests", "tests.*"]),
+    py_modules=["main", "cli"],
     classifiers=[
         "Programming Language :: Python :: 3",
         "License :: OSI Approved :: MIT License",
@@ -21,10 +22,11 @@ setup(
     python_requires=">=3.6",
     install_requires=[
         "yt-dlp>=2023.3.4",
+        "requests>=2.26.0",
     ],
     entry_points={
         "console_scripts": [
-            "ytdl=youtube_downloader.main:main",
+            "ytdl=cli:main",
         ],
     },
 ) 
\ No newline at end of file
@@ -0,0 +1,43 @@
+"""
+下載佇列測試
+
+以阻塞的 _run_job 佔住工作線程，只測試佇列的狀態轉換 (不實際下載)
+"""
+
+import threading
+
+import pytest
+
+from core.download_manager import DownloadManager, JobStatus
+
+
+URL = "https://www.youtube.com/watch?v=dQw4w9WgXcQ"
+
+
+@pytest.fixture
+def manager():
+    release = threading.Event()
+    manager = DownloadManager(max_workers=1)
+    manager._run_job = lambda job: release.wait(5)
+    yield manager
+    release.set()
+    manager.shutdown()
+
+
+@pytest.mark.parametrize("stop", ["dequeue", "cancel", "pause"])
+def test_stopped_job_leaves_queue(manager, stop):
+    manager.enqueue(URL, "/tmp")                  # 佔住唯一的工作線程
+    job_id = manager.enqueue(URL, "/tmp")         # 等待中
+    
+    assert getattr(manager, stop)(job_id)
+    assert all(entry[2] != job_id for entry in manager._queue)
+    
+    if stop == "pause":
+        assert manager.resume(job_id)
+        assert [entry[2] for entry in manager._queue].count(job_id) == 1
+        assert manager.cancel(job_id)
+    
+    manager.clear_finished()
+    new_id = manager.enqueue(URL, "/tmp")
+    assert manager.get_job(new_id).status == JobStatus.QUEUED
+    manager.set_max_workers(2)
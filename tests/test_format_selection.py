@@ -0,0 +1,70 @@
+"""
+格式選擇測試
+"""
+
+from core.download_engine import DownloadEngine
+from core.format_selection import FormatSelector
+from core.platforms import get_platform_profile
+
+
+def make_info(*heights):
+    """每個畫質一個 H.264 影片格式，加上一個 AAC 音訊格式"""
+    formats = [{'format_id': f'v{h}', 'height': h, 'fps': 30, 'vcodec': 'avc1.640028',
+                'acodec': 'none', 'tbr': h * 3} for h in heights]
+    formats.append({'format_id': 'a', 'vcodec': 'none', 'acodec': 'mp4a.40.2', 'abr': 128})
+    return {'duration': 60, 'formats': formats}
+
+
+def test_select_height_between_available():
+    selection = FormatSelector().select(make_info(480, 720, 1080), 900)
+    assert selection.height == 720
+
+
+def test_select_height_below_all_available():
+    selection = FormatSelector().select(make_info(720, 1080), 360)
+    assert selection.height == 720
+
+
+def test_fallback_uses_same_rule():
+    engine = DownloadEngine(get_platform_profile("youtube"))
+    
+    preloaded = engine.get_video_options(900, make_info(480, 720, 1080))
+    assert preloaded['format'].startswith('v720+a/')
+    
+    fallback = engine.get_video_options(900)
+    assert fallback['format'].startswith('bestvideo[height<=900]')
+    assert fallback['format_sort'][0] == 'res:900'
+
+
+def make_codec_info(h264_size, av1_size, audio_codec='mp4a.40.2'):
+    """1080p 的 H.264 和 AV1 影片，加上 AAC 和 (可選的) 較小的 Opus 音訊"""
+    formats = [
+        {'format_id': 'h264', 'height': 1080, 'fps': 30, 'vcodec': 'avc1.640028',
+         'acodec': 'none', 'filesize': h264_size},
+        {'format_id': 'av1', 'height': 1080, 'fps': 30, 'vcodec': 'av01.0.08M.08',
+         'acodec': 'none', 'filesize': av1_size},
+        {'format_id': 'aac', 'vcodec': 'none', 'acodec': 'mp4a.40.2', 'abr': 128, 'filesize': 1000},
+    ]
+    if audio_codec == 'opus':
+        formats.append({'format_id': 'opus', 'vcodec': 'none', 'acodec': 'opus', 'abr': 128,
+                        'filesize': 800})
+    return {'duration': 60, 'formats': formats}
+
+
+def test_prefers_h264_aac_when_size_is_comparable():
+    # H.264 比 AV1 大 20%，在 PREFERRED_TOLERANCE (25%) 以內
+    selection = FormatSelector().select(make_codec_info(120_000, 100_000, 'opus'), 1080)
+    assert selection.format_id == 'h264+aac'
+
+
+def test_keeps_smaller_codec_when_h264_is_much_larger():
+    # H.264 比 AV1 大一倍，選擇較小的 AV1；Opus 的相容性懲罰乘在整個組合上，
+    # 因此仍搭配可串流複製的 AAC
+    selection = FormatSelector().select(make_codec_info(200_000, 100_000, 'opus'), 1080)
+    assert selection.format_id == 'av1+aac'
+
+
+def test_list_qualities_matches_select():
+    info = make_codec_info(120_000, 100_000, 'opus')
+    selector = FormatSelector()
+    assert selector.list_qualities(info)[0].format_id == selector.select(info, 1080).format_id
@@ -0,0 +1,69 @@
+"""
+後處理名額測試
+
+以只呼叫後處理回調的下載引擎執行 DownloadManager._download，檢查各步驟
+是否佔用後處理名額 (回調字典與 yt-dlp PostProcessor._hook_progress 產生的相同)
+"""
+
+import pytest
+
+from core.download_engine import DownloadEngine
+from core.download_manager import DownloadManager
+from core.postprocess import get_postprocess_pool
+
+
+URL = "https://www.youtube.com/watch?v=dQw4w9WgXcQ"
+
+
+class HookEngine(DownloadEngine):
+    """不下載，只依序呼叫後處理回調並記錄當時是否持有後處理名額"""
+    
+    def __init__(self, profile, downloader_strategy, steps):
+        super().__init__(profile, downloader_strategy)
+        self.steps = steps
+        self.held = {}
+    
+    def download(self, url, output_path, format_choice, height=None, progress_hook=None,
+                 info=None, output_template=None, postprocessor_hook=None):
+        pool = get_postprocess_pool()
+        for step in self.steps:
+            d = {'status': 'started', 'postprocessor': step, 'info_dict': info}
+            postprocessor_hook(d)
+            self.held[step] = getattr(pool._local, 'depth', 0) > 0
+            postprocessor_hook(dict(d, status='finished'))
+        return True
+
+
+def run_steps(tmp_path, steps):
+    manager = DownloadManager(max_workers=1)
+    factory_create = manager.factory.create_engine
+    engine = None
+    
+    def create_engine(url):
+        nonlocal engine
+        base = factory_create(url)
+        engine = HookEngine(base.profile, base.downloader_strategy, steps)
+        return engine
+    
+    manager.factory.create_engine = create_engine
+    try:
+        assert manager._download(URL, str(tmp_path), "bestaudio", True, "job",
+                                 info={'id': 'dQw4w9WgXcQ', 'formats': []})
+    finally:
+        manager.shutdown()
+    return engine.held
+
+
+def test_move_files_does_not_hold_ffmpeg_slot(tmp_path):
+    held = run_steps(tmp_path, ['MoveFilesAfterDownload'])
+    assert held == {'MoveFilesAfterDownload': False}
+
+
+def test_ffmpeg_steps_hold_slot(tmp_path):
+    held = run_steps(tmp_path, ['FFmpegExtractAudio', 'MoveFilesAfterDownload'])
+    assert held == {'FFmpegExtractAudio': True, 'MoveFilesAfterDownload': False}
+
+
+def test_lightweight_names_match_yt_dlp():
+    postprocessor = pytest.importorskip("yt_dlp.postprocessor")
+    assert postprocessor.MoveFilesAfterDownloadPP.pp_key() in get_postprocess_pool().LIGHTWEIGHT_POSTPROCESSORS
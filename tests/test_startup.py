@@ -0,0 +1,94 @@
+"""
+啟動時間測試
+
+命令列和下載管理器的匯入不應載入 yt-dlp、requests 或 PySide6
+(這些模組只在實際下載、發出網路請求或開啟視窗時才延遲匯入)；
+主視窗的匯入 (含任務日誌、進度彙整、縮圖載入和 HTTP 連線模組) 除 PySide6
+外同樣不應載入這些模組。匯入的總耗時也必須在固定預算內
+"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+
+# 專案根目錄
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 啟動時不應匯入的重量級模組
+HEAVY_MODULES = ("yt_dlp", "requests", "PySide6")
+
+# 匯入總耗時預算 (微秒)
+IMPORT_BUDGET_US = 500_000
+
+# 主視窗匯入路徑上需要檢查的模組
+GUI_MODULES = {"ui.main_window", "core.job_journal", "core.progress",
+               "ui.thumbnail_loader", "core.http_client"}
+
+# 主視窗匯入總耗時預算 (微秒，包含 PySide6)
+GUI_IMPORT_BUDGET_US = 1_500_000
+
+
+def run_importtime(statement):
+    """
+    在子程序中以 -X importtime 執行匯入語句
+    
+    Args:
+        statement: 要執行的 Python 語句
+    
+    Returns:
+        {模組名稱: 累計耗時 (微秒)}，只包含最上層的匯入
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue  # 標題行
+        modules[parts[2][1:].rstrip()] = int(parts[1])  # 去掉分隔符號後的空格，保留表示層級的縮排
+    return modules
+
+
+@pytest.mark.parametrize("module", ["cli", "core.download_manager"])
+def test_startup_skips_heavy_modules(module):
+    imported = {name.strip() for name in run_importtime(f"import {module}")}
+    
+    for heavy in HEAVY_MODULES:
+        loaded = [name for name in imported if name == heavy or name.startswith(heavy + ".")]
+        assert not loaded, f"匯入 {module} 時載入了 {heavy}"
+
+
+def total_time(modules):
+    """最上層 (沒有縮排) 的項目的累計耗時合計即為總匯入時間"""
+    return sum(us for name, us in modules.items() if not name.startswith(" "))
+
+
+def test_startup_import_budget():
+    total = total_time(run_importtime("import cli; import core.download_manager"))
+    assert total < IMPORT_BUDGET_US, f"匯入耗時 {total / 1000:.1f} ms，超過預算 {IMPORT_BUDGET_US / 1000:.0f} ms"
+
+
+def test_gui_startup():
+    pytest.importorskip("PySide6")
+    
+    modules = run_importtime("import main; import ui.main_window")
+    imported = {name.strip() for name in modules}
+    assert GUI_MODULES <= imported
+    
+    for heavy in HEAVY_MODULES:
+        if heavy == "PySide6":
+            continue
+        loaded = [name for name in imported if name == heavy or name.startswith(heavy + ".")]
+        assert not loaded, f"匯入主視窗時載入了 {heavy}"
+    
+    total = total_time(modules)
+    assert total < GUI_IMPORT_BUDGET_US, \
+        f"主視窗匯入耗時 {total / 1000:.1f} ms，超過預算 {GUI_IMPORT_BUDGET_US / 1000:.0f} ms"
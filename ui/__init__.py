@@ -4,16 +4,39 @@ Qt UI 模組
 提供 Qt 版本的 UI 元件
 """
 
+import importlib
+
 __version__ = "1.0.0"
 
-# 導出主要類別，方便導入
-from .theme import ThemeManager
-from .base import BaseFrame, BaseDialog
-from .main_window import MainWindow
-from .url_frame import UrlInputFrame
-from .path_frame import PathSelectionFrame
-from .format_frame import FormatSelectionFrame
-from .progress_frame import ProgressFrame
-from .output_frame import OutputFrame
-from .quality_dialog import QualityDialog
-from .preview_frame import PreviewFrame
+# 導出主要類別，方便導入 (首次存取時才載入對應模組，避免啟動時載入所有元件)
+_EXPORTS = {
+    'ThemeManager': '.theme',
+    'BaseFrame': '.base',
+    'BaseDialog': '.base',
+    'MainWindow': '.main_window',
+    'UrlInputFrame': '.url_frame',
+    'PathSelectionFrame': '.path_frame',
+    'FormatSelectionFrame': '.format_frame',
+    'JobListFrame': '.job_list_frame',
+    'OutputFrame': '.output_frame',
+    'QualityDialog': '.quality_dialog',
+    'PreviewFrame': '.preview_frame',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    """延遲載入導出的類別"""
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    """列出可用的屬性 (包含尚未載入的導出類別)"""
+    return sorted(list(globals()) + __all__)
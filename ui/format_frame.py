@@ -28,9 +28,13 @@ class FormatSelectionFrame(BaseFrame):
         {"value": "480p", "label": "480p"},
         {"value": "360p", "label": "360p"},
         {"value": "240p", "label": "240p"},
-        {"value": "bestaudio", "label": "最佳音訊"}
+        {"value": "bestaudio", "label": "最佳音訊 (原始格式)"},
+        {"value": "mp3", "label": "MP3 音訊"}
     ]
     
+    # 音訊格式 (選擇時自動勾選僅音訊)
+    AUDIO_FORMATS = ("bestaudio", "mp3")
+    
     def __init__(self, parent=None):
         """初始化格式選擇框架"""
         super().__init__(parent)
@@ -76,7 +80,7 @@ class FormatSelectionFrame(BaseFrame):
         self.format_changed.emit(format_value)
         
         # 如果選擇了音訊格式，自動勾選僅音訊選項
-        if format_value == "bestaudio":
+        if format_value in self.AUDIO_FORMATS:
             self.audio_only_check.setChecked(True)
     
     def _on_audio_only_changed(self, state):
@@ -84,8 +88,8 @@ class FormatSelectionFrame(BaseFrame):
         is_checked = state == Qt.Checked
         self.audio_only_changed.emit(is_checked)
         
-        # 如果勾選了僅音訊，自動選擇最佳音訊格式
-        if is_checked:
+        # 如果勾選了僅音訊且目前不是音訊格式，自動選擇最佳音訊格式
+        if is_checked and self.get_format() not in self.AUDIO_FORMATS:
             for i in range(self.format_combo.count()):
                 if self.format_combo.itemData(i) == "bestaudio":
                     self.format_combo.setCurrentIndex(i)
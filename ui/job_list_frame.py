@@ -0,0 +1,242 @@
+"""
+Qt 版本的下載佇列框架
+
+以每個任務一列的方式顯示佇列中的下載進度和狀態
+"""
+
+from PySide6.QtWidgets import (
+    QFrame, QLabel, QHBoxLayout, QVBoxLayout, QProgressBar, QPushButton,
+    QScrollArea, QWidget, QSpinBox
+)
+from PySide6.QtCore import Qt, Signal
+
+from .base import BaseFrame
+from .theme import ThemeManager
+
+from core.download_manager import JobStatus
+
+
+class JobRow(QFrame):
+    """單一下載任務的顯示列"""
+    
+    # 自定義信號
+    cancel_requested = Signal(str)  # 要求取消任務時發出 (job_id)
+    pause_requested = Signal(str)  # 要求暫停任務時發出 (job_id)
+    resume_requested = Signal(str)  # 要求繼續任務時發出 (job_id)
+    
+    # 狀態顯示文字
+    STATUS_TEXT = {
+        JobStatus.QUEUED: "等待中",
+        JobStatus.RUNNING: "下載中...",
+        JobStatus.POSTPROCESSING: "後處理中...",
+        JobStatus.COMPLETED: "下載完成",
+        JobStatus.FAILED: "下載失敗",
+        JobStatus.REMOVED: "已移除",
+        JobStatus.SKIPPED: "已下載過",
+        JobStatus.PAUSED: "已暫停",
+        JobStatus.CANCELLED: "已取消",
+    }
+    
+    def __init__(self, job_id, title, parent=None):
+        """初始化任務列"""
+        super().__init__(parent)
+        self.job_id = job_id
+        self.status = JobStatus.QUEUED
+        self.setObjectName("jobRow")
+        self.setStyleSheet(f"""
+            #jobRow {{
+                border-bottom: 1px solid {ThemeManager.BORDER_COLOR};
+            }}
+        """)
+        
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, ThemeManager.PADDING_SMALL, 0, ThemeManager.PADDING_SMALL)
+        layout.setSpacing(ThemeManager.PADDING_SMALL)
+        
+        # 標題與狀態
+        header_layout = QHBoxLayout()
+        header_layout.setSpacing(ThemeManager.PADDING_NORMAL)
+        layout.addLayout(header_layout)
+        
+        self.title_label = QLabel(title, self)
+        self.title_label.setProperty("subheading", True)
+        header_layout.addWidget(self.title_label, 1)
+        
+        self.speed_label = QLabel("", self)
+        self.speed_label.setAlignment(Qt.AlignRight | Qt.AlignVCenter)
+        self.speed_label.setProperty("subheading", True)
+        header_layout.addWidget(self.speed_label)
+        
+        self.status_label = QLabel(self.STATUS_TEXT[JobStatus.QUEUED], self)
+        self.status_label.setAlignment(Qt.AlignRight | Qt.AlignVCenter)
+        header_layout.addWidget(self.status_label)
+        
+        # 暫停 / 繼續 / 取消按鈕 (依任務狀態顯示)
+        self.pause_button = QPushButton("暫停", self)
+        self.pause_button.clicked.connect(lambda: self.pause_requested.emit(self.job_id))
+        header_layout.addWidget(self.pause_button)
+        
+        self.resume_button = QPushButton("繼續", self)
+        self.resume_button.clicked.connect(lambda: self.resume_requested.emit(self.job_id))
+        self.resume_button.setVisible(False)
+        header_layout.addWidget(self.resume_button)
+        
+        self.cancel_button = QPushButton("取消", self)
+        self.cancel_button.clicked.connect(lambda: self.cancel_requested.emit(self.job_id))
+        header_layout.addWidget(self.cancel_button)
+        
+        # 進度條
+        self.progress_bar = QProgressBar(self)
+        self.progress_bar.setMinimum(0)
+        self.progress_bar.setMaximum(100)
+        self.progress_bar.setValue(0)
+        self.progress_bar.setTextVisible(True)
+        self.progress_bar.setFormat("%p%")
+        layout.addWidget(self.progress_bar)
+    
+    def set_status(self, status):
+        """設置任務狀態"""
+        self.status = status
+        self.status_label.setText(self.STATUS_TEXT.get(status, status))
+        self.pause_button.setVisible(status in (JobStatus.QUEUED, JobStatus.RUNNING,
+                                                JobStatus.POSTPROCESSING))
+        self.resume_button.setVisible(status == JobStatus.PAUSED)
+        self.cancel_button.setVisible(status not in JobStatus.FINISHED_STATES)
+        
+        if status == JobStatus.COMPLETED:
+            self.progress_bar.setValue(100)
+            self.speed_label.setText("")
+            self.status_label.setStyleSheet(f"color: {ThemeManager.SUCCESS_COLOR};")
+        elif status == JobStatus.FAILED:
+            self.speed_label.setText("")
+            self.status_label.setStyleSheet(f"color: {ThemeManager.ERROR_COLOR};")
+        elif status == JobStatus.RUNNING:
+            self.status_label.setStyleSheet(f"color: {ThemeManager.SECONDARY_COLOR};")
+        elif status == JobStatus.POSTPROCESSING:
+            self.speed_label.setText("")
+            self.status_label.setStyleSheet(f"color: {ThemeManager.SECONDARY_COLOR};")
+        else:
+            self.speed_label.setText("")
+            self.status_label.setStyleSheet("")
+    
+    def set_progress(self, progress, filename="", speed=""):
+        """設置任務進度"""
+        self.progress_bar.setValue(int(progress))
+        
+        if filename:
+            self.title_label.setText(filename)
+        
+        self.speed_label.setText(speed)
+    
+    def apply_snapshot(self, snapshot):
+        """套用進度快照 (含平滑後的速度和剩餘時間)"""
+        speed = snapshot.speed_str
+        if speed and snapshot.eta_str:
+            speed = f"{speed} · 剩餘 {snapshot.eta_str}"
+        elif snapshot.postprocessor:
+            speed = snapshot.postprocessor
+        self.set_progress(snapshot.progress, snapshot.filename, speed)
+
+
+class JobListFrame(BaseFrame):
+    """下載佇列框架，每個下載任務顯示為一列"""
+    
+    # 自定義信號
+    cancel_requested = Signal(str)  # 要求取消任務時發出 (job_id)
+    pause_requested = Signal(str)  # 要求暫停任務時發出 (job_id)
+    resume_requested = Signal(str)  # 要求繼續任務時發出 (job_id)
+    clear_requested = Signal()  # 要求清除已結束任務時發出
+    max_workers_changed = Signal(int)  # 同時下載數變更時發出
+    
+    def __init__(self, parent=None, max_workers=3):
+        """初始化下載佇列框架"""
+        self.rows = {}
+        self.initial_max_workers = max_workers
+        super().__init__(parent)
+    
+    def setup_ui(self):
+        """設置 UI 元件"""
+        # 標題
+        title_layout = QHBoxLayout()
+        self.main_layout.addLayout(title_layout)
+        
+        self.title_label = self.create_heading("下載佇列")
+        title_layout.addWidget(self.title_label)
+        title_layout.addStretch(1)
+        
+        # 同時下載數
+        self.workers_label = QLabel("同時下載:", self)
+        self.workers_label.setProperty("subheading", True)
+        title_layout.addWidget(self.workers_label)
+        
+        self.workers_spin = QSpinBox(self)
+        self.workers_spin.setRange(1, 16)
+        self.workers_spin.setValue(self.initial_max_workers)
+        self.workers_spin.valueChanged.connect(self.max_workers_changed.emit)
+        title_layout.addWidget(self.workers_spin)
+        
+        # 清除已完成按鈕
+        self.clear_button = QPushButton("清除已完成", self)
+        self.clear_button.clicked.connect(self.clear_requested.emit)
+        title_layout.addWidget(self.clear_button)
+        
+        # 任務列表 (可捲動)
+        self.scroll_area = QScrollArea(self)
+        self.scroll_area.setWidgetResizable(True)
+        self.scroll_area.setFrameShape(QFrame.NoFrame)
+        self.scroll_area.setMinimumHeight(120)
+        
+        self.list_widget = QWidget(self.scroll_area)
+        self.list_layout = QVBoxLayout(self.list_widget)
+        self.list_layout.setContentsMargins(0, 0, 0, 0)
+        self.list_layout.setSpacing(0)
+        self.list_layout.addStretch(1)
+        self.scroll_area.setWidget(self.list_widget)
+        
+        self.main_layout.addWidget(self.scroll_area)
+        
+        # 空佇列提示
+        self.empty_label = QLabel("佇列中沒有下載任務", self)
+        self.empty_label.setProperty("subheading", True)
+        self.empty_label.setAlignment(Qt.AlignCenter)
+        self.list_layout.insertWidget(0, self.empty_label)
+    
+    def add_job(self, job_id, title):
+        """新增任務列"""
+        if job_id in self.rows:
+            return self.rows[job_id]
+        
+        row = JobRow(job_id, title, self.list_widget)
+        row.cancel_requested.connect(self.cancel_requested.emit)
+        row.pause_requested.connect(self.pause_requested.emit)
+        row.resume_requested.connect(self.resume_requested.emit)
+        
+        # 插入在彈性空間之前
+        self.list_layout.insertWidget(self.list_layout.count() - 1, row)
+        self.rows[job_id] = row
+        self.empty_label.setVisible(False)
+        return row
+    
+    def has_job(self, job_id):
+        """是否已有該任務的任務列"""
+        return job_id in self.rows
+    
+    def update_job(self, job_id, status):
+        """更新任務狀態"""
+        row = self.rows.get(job_id)
+        if row is not None:
+            row.set_status(status)
+    
+    def apply_snapshot(self, snapshot):
+        """套用進度快照"""
+        row = self.rows.get(snapshot.job_id)
+        if row is not None and row.status in (JobStatus.RUNNING, JobStatus.POSTPROCESSING):
+            row.apply_snapshot(snapshot)
+    
+    def remove_job(self, job_id):
+        """移除任務列"""
+        row = self.rows.pop(job_id, None)
+        if row is not None:
+            self.list_layout.removeWidget(row)
+            row.deleteLater()
+        self.empty_label.setVisible(not self.rows)
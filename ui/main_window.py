@@ -13,27 +13,24 @@ from PySide6.QtGui import QIcon, QPixmap, QFontMetrics
 
 import os
 import sys
-import threading
 
 from .theme import ThemeManager
 from .url_frame import UrlInputFrame
 from .path_frame import PathSelectionFrame
 from .format_frame import FormatSelectionFrame
-from .progress_frame import ProgressFrame
+from .job_list_frame import JobListFrame
 from .output_frame import OutputFrame
-from .quality_dialog import QualityDialog
 from .preview_frame import PreviewFrame
 
-from core.download_manager import DownloadManager
+from core.download_manager import DownloadManager, JobStatus
+from core.job_journal import JobJournal
 
 class MainWindow(QMainWindow):
     """主視窗，整合所有 UI 元件"""
     
     # 自定義信號
-    download_started = Signal()  # 下載開始時發出
-    download_finished = Signal(bool)  # 下載完成時發出 (success)
-    download_progress = Signal(float, str, str)  # 下載進度更新時發出 (progress, filename, speed)
-    log_message = Signal(str, int)  # 日誌消息時發出 (message, log_type)
+    job_updated = Signal(str, str)  # 任務狀態變更時發出 (job_id, status)
+    progress_snapshots = Signal(list)  # 進度快照發布時發出 (ProgressSnapshot 列表，約每秒 10 次)
     
     def __init__(self):
         """初始化主視窗"""
@@ -48,14 +45,17 @@ class MainWindow(QMainWindow):
         if os.path.exists(icon_path):
             self.setWindowIcon(QIcon(icon_path))
         
-        # 下載管理器
-        self.download_manager = DownloadManager()
-        
-        # 下載線程
-        self.download_thread = None
+        # 下載管理器 (任務狀態由工作線程回調，透過信號轉回 UI 線程；
+        # 日誌直接寫入輸出框架的緩衝區，由其在 UI 線程批次顯示；
+        # 任務狀態寫入任務日誌，異常結束後可恢復)
+        self.download_manager = DownloadManager(
+            job_callback=lambda job: self.job_updated.emit(job.job_id, job.status),
+            log_callback=lambda job_id, message, log_type: self.output_frame.add_log(message, log_type),
+            journal=JobJournal()
+        )
         
-        # 正在下載標誌
-        self.is_downloading = False
+        # 訂閱彙整後的進度快照，而非每個原始進度事件
+        self.download_manager.progress_aggregator.subscribe(self.progress_snapshots.emit)
         
         # 設置中央部件
         self.central_widget = QWidget()
@@ -71,6 +71,11 @@ class MainWindow(QMainWindow):
         
         # 連接信號
         self.connect_signals()
+        
+        # 恢復上次未完成的下載任務
+        restored = self.download_manager.restore_jobs()
+        if restored:
+            self.output_frame.add_info(f"已恢復 {len(restored)} 個未完成的下載任務")
     
     def setup_ui(self):
         """設置 UI 元件"""
@@ -130,9 +135,9 @@ class MainWindow(QMainWindow):
         download_hint.setAlignment(Qt.AlignCenter)
         right_layout.addWidget(download_hint)
         
-        # 進度框架
-        self.progress_frame = ProgressFrame(self)
-        right_layout.addWidget(self.progress_frame)
+        # 下載佇列框架 (每個任務一列)
+        self.job_list_frame = JobListFrame(self, self.download_manager.max_workers)
+        right_layout.addWidget(self.job_list_frame)
         
         # 底部區域 - 輸出日誌
         self.output_frame = OutputFrame(self)
@@ -149,11 +154,16 @@ class MainWindow(QMainWindow):
         # 預覽框架標題變更時調整視窗大小
         self.preview_frame.title_changed.connect(self.adjust_window_for_title)
         
+        # 下載佇列
+        self.job_list_frame.cancel_requested.connect(self.download_manager.cancel)
+        self.job_list_frame.pause_requested.connect(self.download_manager.pause)
+        self.job_list_frame.resume_requested.connect(self.download_manager.resume)
+        self.job_list_frame.clear_requested.connect(self.clear_finished_jobs)
+        self.job_list_frame.max_workers_changed.connect(self.download_manager.set_max_workers)
+        
         # 下載信號
-        self.download_started.connect(self.on_download_started)
-        self.download_finished.connect(self.on_download_finished)
-        self.download_progress.connect(self.on_download_progress)
-        self.log_message.connect(self.on_log_message)
+        self.job_updated.connect(self.on_job_updated)
+        self.progress_snapshots.connect(self.on_progress_snapshots)
     
     def load_video_preview(self, url: str):
         """載入影片預覽"""
@@ -191,7 +201,7 @@ class MainWindow(QMainWindow):
     def keyPressEvent(self, event):
         """按鍵事件處理"""
         if event.key() == Qt.Key_Return or event.key() == Qt.Key_Enter:
-            if not self.is_downloading and self.download_button.isEnabled():
+            if self.download_button.isEnabled():
                 self.start_download()
         elif event.key() == Qt.Key_Escape:
             self.close()
@@ -199,10 +209,7 @@ class MainWindow(QMainWindow):
             super().keyPressEvent(event)
     
     def start_download(self):
-        """開始下載"""
-        if self.is_downloading:
-            return
-        
+        """將目前的網址加入下載佇列"""
         url = self.url_frame.get_url()
         if not url:
             QMessageBox.warning(self, "錯誤", "請輸入影片網址")
@@ -218,92 +225,69 @@ class MainWindow(QMainWindow):
         
         self.url_frame.add_to_history(url)
         
-        self.is_downloading = True
-        
-        self.download_started.emit()
-        
-        self.download_thread = threading.Thread(
-            target=self._download_thread,
-            args=(url, download_path, download_format, audio_only)
-        )
-        self.download_thread.daemon = True
-        self.download_thread.start()
-    
-    def _download_thread(self, url, download_path, download_format, audio_only):
-        """下載線程"""
-        try:
-            self.log_message.emit(f"開始下載: {url}", OutputFrame.LOG_INFO)
-            self.log_message.emit(f"下載位置: {download_path}", OutputFrame.LOG_INFO)
-            self.log_message.emit(f"下載格式: {download_format}", OutputFrame.LOG_INFO)
-            
-            def progress_callback(progress, filename, speed):
-                self.download_progress.emit(progress, filename, speed)
-            
-            def log_callback(message, log_type=OutputFrame.LOG_INFO):
-                self.log_message.emit(message, log_type)
-            
-            result = self.download_manager.download(
-                url, 
-                download_path, 
-                download_format, 
-                audio_only=audio_only,
-                progress_callback=progress_callback,
-                log_callback=log_callback
-            )
-            
-            self.download_finished.emit(result)
-            
-        except Exception as e:
-            self.log_message.emit(f"下載錯誤: {str(e)}", OutputFrame.LOG_ERROR)
-            
-            self.download_finished.emit(False)
-    
-    @Slot()
-    def on_download_started(self):
-        """下載開始時的處理"""
-        self.download_button.setEnabled(False)
-        self.download_button.setText("下載中...")
+        # 預覽時已解析的影片資訊直接交給下載任務，不再重新解析
+        video_info = self.preview_frame.get_info_for_url(url)
         
-        self.progress_frame.start_download()
+        # 播放清單、頻道和多P影片會在背景展開，每個項目各自成為一個任務；
+        # 任務列在收到任務的第一次狀態通知時建立
+        self.download_manager.submit(url, download_path, download_format, audio_only,
+                                     info=video_info)
         
-        self.output_frame.add_info("下載已開始...")
+        self.output_frame.add_info(f"已加入下載佇列: {url} ({download_format})")
     
-    @Slot(bool)
-    def on_download_finished(self, success):
-        """下載完成時的處理"""
-        self.is_downloading = False
-        
-        self.download_button.setEnabled(True)
-        self.download_button.setText("下載影片")
-        
-        self.progress_frame.finish_download(success)
-        
-        if success:
-            self.output_frame.add_success("下載完成！")
-        else:
-            self.output_frame.add_error("下載失敗！")
+    def clear_finished_jobs(self):
+        """清除已結束的任務"""
+        for job_id in self.download_manager.clear_finished():
+            self.job_list_frame.remove_job(job_id)
     
-    @Slot(float, str, str)
-    def on_download_progress(self, progress, filename, speed):
-        """下載進度更新時的處理"""
-        self.progress_frame.set_progress(progress, filename, speed)
+    @Slot(str, str)
+    def on_job_updated(self, job_id, status):
+        """任務狀態變更時的處理"""
+        job = self.download_manager.get_job(job_id)
+        title = (job.title or job.url) if job is not None else job_id
+        
+        if not self.job_list_frame.has_job(job_id):
+            if job is None:
+                return
+            self.job_list_frame.add_job(job_id, title)
+        
+        self.job_list_frame.update_job(job_id, status)
+        
+        if status == JobStatus.RUNNING:
+            self.output_frame.add_info(f"下載已開始: {title}")
+        elif status == JobStatus.POSTPROCESSING:
+            self.output_frame.add_info(f"下載完成，後處理中: {title}")
+        elif status == JobStatus.COMPLETED:
+            self.output_frame.add_success(f"下載完成: {title}")
+        elif status == JobStatus.FAILED:
+            self.output_frame.add_error(f"下載失敗: {title}")
+        elif status == JobStatus.SKIPPED:
+            self.output_frame.add_info(f"已下載過，略過: {title}")
+        elif status == JobStatus.PAUSED:
+            self.output_frame.add_warning(f"已暫停: {title}")
+        elif status == JobStatus.CANCELLED:
+            self.output_frame.add_warning(f"已取消: {title}")
     
-    @Slot(str, int)
-    def on_log_message(self, message, log_type):
-        """日誌消息時的處理"""
-        self.output_frame.add_log(message, log_type)
+    @Slot(list)
+    def on_progress_snapshots(self, snapshots):
+        """進度快照發布時的處理"""
+        for snapshot in snapshots:
+            self.job_list_frame.apply_snapshot(snapshot)
     
     def show_quality_dialog(self, formats):
         """顯示畫質選擇對話框"""
+        # 對話框只在需要時載入
+        from .quality_dialog import QualityDialog
+        
         return QualityDialog.show_dialog(self, "選擇畫質", formats)
     
     def closeEvent(self, event):
         """關閉視窗事件處理"""
-        if self.is_downloading:
+        if self.download_manager.get_active_count() > 0:
             reply = QMessageBox.question(
                 self,
                 "確認退出",
-                "正在下載中，確定要退出嗎？",
+                "仍有下載任務進行中，確定要退出嗎？\n未完成的任務會在下次啟動時繼續。",
                 QMessageBox.Yes | QMessageBox.No,
                 QMessageBox.No
             )
@@ -312,4 +296,7 @@ class MainWindow(QMainWindow):
                 event.ignore()
                 return
         
+        self.download_manager.shutdown()
+        self.preview_frame.shutdown()
+        self.output_frame.shutdown()
         event.accept()
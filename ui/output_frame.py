@@ -4,16 +4,53 @@ Qt 版本的輸出框架
 顯示下載日誌和輸出資訊
 """
 
+import os
+import queue
+import logging
+import logging.handlers
+import threading
+from collections import deque
+
 from PySide6.QtWidgets import (
     QPlainTextEdit, QPushButton, QLabel, QHBoxLayout, QVBoxLayout,
     QCheckBox
 )
-from PySide6.QtCore import Qt, Signal
+from PySide6.QtCore import Qt, Signal, QTimer
 from PySide6.QtGui import QColor, QTextCursor, QTextCharFormat
 
 from .base import BaseFrame
 from .theme import ThemeManager
 
+from utils.paths import get_data_dir
+
+
+def create_log_file_listener(filename="download.log", max_bytes=5 * 1024 * 1024, backup_count=3):
+    """
+    建立寫入輪替日誌檔的背景監聽器
+    
+    Args:
+        filename: 日誌檔名稱 (位於資料目錄的 logs 子目錄)
+        max_bytes: 單一日誌檔大小上限
+        backup_count: 保留的舊日誌檔數量
+        
+    Returns:
+        (日誌佇列, 已啟動的 QueueListener)，無法建立日誌檔時返回 (None, None)
+    """
+    try:
+        path = os.path.join(get_data_dir("logs"), filename)
+        handler = logging.handlers.RotatingFileHandler(
+            path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8"
+        )
+    except OSError as e:
+        print(f"無法建立日誌檔: {str(e)}")
+        return None, None
+    
+    handler.setFormatter(logging.Formatter("%(asctime)s [%(levelname)s] %(message)s"))
+    log_queue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(log_queue, handler)
+    listener.start()
+    return log_queue, listener
+
 class OutputFrame(BaseFrame):
     """輸出框架，顯示下載日誌和輸出資訊"""
     
@@ -26,13 +63,45 @@ class OutputFrame(BaseFrame):
     LOG_WARNING = 2
     LOG_ERROR = 3
     
-    def __init__(self, parent=None):
+    # 日誌類型對應的 logging 等級 (寫入日誌檔時使用)
+    LOG_LEVELS = {
+        LOG_INFO: logging.INFO,
+        LOG_SUCCESS: logging.INFO,
+        LOG_WARNING: logging.WARNING,
+        LOG_ERROR: logging.ERROR,
+    }
+    
+    # 預設設定
+    DEFAULT_MAX_BLOCKS = 5000  # 顯示的最大行數，超過時捨棄最舊的行
+    FLUSH_INTERVAL_MS = 100  # 批次寫入文字框的間隔
+    
+    def __init__(self, parent=None, max_blocks=DEFAULT_MAX_BLOCKS):
         """初始化輸出框架"""
+        self.max_blocks = max_blocks
+        
+        # 待顯示的日誌 (任何線程都可寫入，由計時器在 UI 線程批次取出)
+        self.pending_logs = deque()
+        self.pending_lock = threading.Lock()
+        
         super().__init__(parent)
         
         # 自動滾動標誌
         self.auto_scroll = True
         
+        # 完整日誌寫入磁碟上的輪替日誌檔 (由背景線程寫入)
+        self.file_logger = logging.getLogger(f"{__name__}.{id(self)}")
+        self.file_logger.setLevel(logging.INFO)
+        self.file_logger.propagate = False
+        self.log_queue, self.log_listener = create_log_file_listener()
+        if self.log_queue is not None:
+            self.file_logger.addHandler(logging.handlers.QueueHandler(self.log_queue))
+        
+        # 批次寫入計時器
+        self.flush_timer = QTimer(self)
+        self.flush_timer.setInterval(self.FLUSH_INTERVAL_MS)
+        self.flush_timer.timeout.connect(self.flush)
+        self.flush_timer.start()
+        
     def setup_ui(self):
         """設置 UI 元件"""
         # 標題區域
@@ -59,6 +128,7 @@ class OutputFrame(BaseFrame):
         self.output_text.setReadOnly(True)
         self.output_text.setMinimumHeight(150)
         self.output_text.setPlaceholderText("下載日誌將顯示在這裡...")
+        self.output_text.setMaximumBlockCount(self.max_blocks)
         
         # 設置文本框樣式
         self.output_text.setStyleSheet(f"""
@@ -75,30 +145,47 @@ class OutputFrame(BaseFrame):
         self.main_layout.addWidget(self.output_text)
     
     def add_log(self, message, log_type=LOG_INFO):
-        """添加日誌"""
+        """
+        添加日誌
+        
+        可在任何線程呼叫：訊息先放入緩衝區，由計時器在 UI 線程批次顯示，
+        同時交給背景線程寫入日誌檔
+        """
         if not message:
             return
         
-        # 獲取文本顏色
-        color = self._get_color_for_log_type(log_type)
+        with self.pending_lock:
+            self.pending_logs.append((message, log_type))
         
-        # 創建文本格式
-        text_format = QTextCharFormat()
-        text_format.setForeground(QColor(color))
+        self.file_logger.log(self.LOG_LEVELS.get(log_type, logging.INFO), message)
+    
+    def flush(self):
+        """將緩衝區中的日誌一次寫入文字框"""
+        with self.pending_lock:
+            if not self.pending_logs:
+                return
+            entries = list(self.pending_logs)
+            self.pending_logs.clear()
+        
+        # 只保留最後 max_blocks 行，較早的行寫入後也會立即被捨棄
+        entries = entries[-self.max_blocks:]
         
-        # 添加文本
         cursor = self.output_text.textCursor()
         cursor.movePosition(QTextCursor.End)
+        cursor.beginEditBlock()
         
-        # 如果不是第一行，先添加換行
-        if not self.output_text.toPlainText() == "":
-            cursor.insertText("\n")
-        
-        # 設置文本格式
-        cursor.setCharFormat(text_format)
-        
-        # 插入文本
-        cursor.insertText(message)
+        text_format = QTextCharFormat()
+        for message, log_type in entries:
+            # 如果不是第一行，先添加換行
+            if not self.output_text.document().isEmpty():
+                cursor.insertText("\n")
+            
+            # 設置文本格式並插入文本
+            text_format.setForeground(QColor(self._get_color_for_log_type(log_type)))
+            cursor.setCharFormat(text_format)
+            cursor.insertText(message)
+        
+        cursor.endEditBlock()
         
         # 自動滾動
         if self.auto_scroll:
@@ -106,7 +193,8 @@ class OutputFrame(BaseFrame):
             self.output_text.ensureCursorVisible()
         
         # 發出日誌添加信號
-        self.log_added.emit(message)
+        for message, _ in entries:
+            self.log_added.emit(message)
     
     def add_info(self, message):
         """添加資訊日誌"""
@@ -125,13 +213,24 @@ class OutputFrame(BaseFrame):
         self.add_log(message, self.LOG_ERROR)
     
     def clear(self):
-        """清除日誌"""
+        """清除日誌 (日誌檔中的完整記錄不受影響)"""
+        with self.pending_lock:
+            self.pending_logs.clear()
         self.output_text.clear()
     
     def get_text(self):
-        """獲取日誌文本"""
+        """獲取日誌文本 (僅包含仍顯示在文字框中的行)"""
+        self.flush()
         return self.output_text.toPlainText()
     
+    def shutdown(self):
+        """停止批次寫入並將剩餘日誌寫入日誌檔"""
+        self.flush_timer.stop()
+        self.flush()
+        if self.log_listener is not None:
+            self.log_listener.stop()
+            self.log_listener = None
+    
     def _on_auto_scroll_changed(self, state):
         """自動滾動選項變更時的處理"""
         self.auto_scroll = state == Qt.Checked
@@ -4,9 +4,6 @@
 提供影片縮圖和標題預覽功能
 """
 
-import os
-import tempfile
-import requests
 import logging  # 添加日誌
 from typing import Optional, Callable
 from PySide6.QtWidgets import (
@@ -17,18 +14,22 @@ from PySide6.QtWidgets import (
     QWidget,
     QHBoxLayout,
 )
-from PySide6.QtCore import Qt, Signal, QSize, QUrl, QThread, QObject
-from PySide6.QtGui import QPixmap, QImage, QFont, QFontMetrics
+from PySide6.QtCore import Qt, Signal, QSize, QUrl, QThread, QObject, QTimer
+from PySide6.QtGui import QPixmap, QFont, QFontMetrics
 
 import re
-import json
 from urllib.parse import urlparse
 import datetime  # 用於格式化日期
 import locale    # 用於格式化數字
+from collections import OrderedDict
 
 from ui.base import BaseFrame
 from ui.theme import ThemeManager
+from ui.thumbnail_loader import ThumbnailLoader
 from core.download_manager import get_video_info
+from core.url_utils import extract_video_id, detect_platform
+from core.http_client import get_http_client
+from core.platforms import get_platform_profile
 
 # 設置日誌
 logger = logging.getLogger(__name__)
@@ -37,21 +38,22 @@ logger = logging.getLogger(__name__)
 class VideoInfoWorker(QObject):
     """影片資訊獲取工作線程"""
     
-    finished = Signal(dict)
-    error = Signal(str)
+    finished = Signal(str, dict)  # (請求鍵, 影片資訊)
+    error = Signal(str, str)  # (請求鍵, 錯誤訊息)
     
-    def __init__(self, url: str):
+    def __init__(self, url: str, request_key: str):
         super().__init__()
         self.url = url
+        self.request_key = request_key
     
     def run(self):
         """執行影片資訊獲取"""
         try:
             info = get_video_info(self.url)
-            self.finished.emit(info)
+            self.finished.emit(self.request_key, info)
         except Exception as e:
             logger.error(f"獲取影片資訊時發生錯誤: {e}", exc_info=True)
-            self.error.emit(str(e))
+            self.error.emit(self.request_key, str(e))
 
 
 class VideoInfoThread(QThread):
@@ -76,11 +78,37 @@ class PreviewFrame(BaseFrame):
     # 縮圖比例常數
     ASPECT_RATIO = 16.0 / 9.0  # 使用浮點數確保精度
     
+    # 縮放設定
+    SMOOTH_SCALE_DELAY_MS = 150  # 停止調整大小多久後才進行平滑縮放
+    SCALED_CACHE_SIZE = 8  # 保留的縮放結果數量
+    
     def __init__(self, parent=None, **kwargs):
         self.video_info = None
-        self.temp_thumbnail_path = None
         self.original_pixmap = None  # 保存原始縮圖
+        
+        # 影片資訊請求狀態
+        self.active_request_key = None  # 目前要顯示的影片 (平台:影片 ID)
+        self.info_threads = {}  # 進行中的解析線程 (請求鍵 -> 線程)，同一影片只解析一次
+        self.retired_threads = []  # 已交回結果、等待結束的線程 (保留參照避免線程執行中被回收)
+        
+        self.thumbnail_key = None  # 目前要顯示的縮圖快取鍵
+        
+        # 縮放快取：原圖先縮成接近最大顯示尺寸的工作副本，平滑縮放結果依目標尺寸快取
+        self.working_pixmap = None
+        self.working_source_key = None  # 工作副本對應的原圖 cacheKey
+        self.scaled_cache = OrderedDict()  # (寬, 高) -> 平滑縮放後的 QPixmap
         super().__init__(parent, **kwargs)
+        
+        # 調整大小時先快速縮放，停止後再平滑縮放一次
+        self.smooth_scale_timer = QTimer(self)
+        self.smooth_scale_timer.setSingleShot(True)
+        self.smooth_scale_timer.setInterval(self.SMOOTH_SCALE_DELAY_MS)
+        self.smooth_scale_timer.timeout.connect(self._set_scaled_pixmap)
+        
+        # 縮圖載入器 (背景下載 + 記憶體/磁碟快取)
+        self.thumbnail_loader = ThumbnailLoader(self)
+        self.thumbnail_loader.thumbnail_ready.connect(self._on_thumbnail_ready)
+        self.thumbnail_loader.thumbnail_failed.connect(self._on_thumbnail_failed)
     
     def setup_ui(self):
         """設置 UI"""
@@ -172,22 +200,90 @@ class PreviewFrame(BaseFrame):
 
     # --- 影片資訊處理 --- 
     def load_video_info(self, url: str):
-        """載入影片資訊"""
+        """
+        載入影片資訊
+        
+        同一部影片重複要求時不會重新解析；切換影片後，舊請求的結果會被捨棄
+        """
         if not url:
             self.clear_preview()
             return
         
+        request_key = self._make_request_key(url)
+        if request_key == self.active_request_key:
+            logger.debug(f"影片已在預覽或載入中，略過: {request_key}")
+            return
+        
+        self.active_request_key = request_key
+        logger.debug(f"載入影片資訊: {request_key}")
+        
         # 顯示加載中
         self.show_loading()
         
+        # 清理已結束的線程
+        self.retired_threads = [thread for thread in self.retired_threads if not thread.isFinished()]
+        
+        # 同一部影片已在解析中，等待其結果即可
+        if request_key in self.info_threads:
+            return
+        
         # 創建工作線程
-        worker = VideoInfoWorker(url)
-        worker.finished.connect(self._on_video_info_received)
-        worker.error.connect(self._on_video_info_error)
+        worker = VideoInfoWorker(url, request_key)
+        worker.finished.connect(self._on_worker_finished)
+        worker.error.connect(self._on_worker_error)
         
         # 啟動線程
-        self.thread = VideoInfoThread(worker)
-        self.thread.start()
+        thread = VideoInfoThread(worker)
+        self.info_threads[request_key] = thread
+        thread.start()
+    
+    def _make_request_key(self, url: str) -> str:
+        """以平台和影片 ID 作為請求鍵，無法提取 ID 時使用 URL 本身"""
+        video_id = extract_video_id(url)
+        if not video_id:
+            return url
+        return f"{detect_platform(url)}:{video_id}"
+    
+    def _retire_thread(self, request_key: str):
+        """將已交回結果的線程移出進行中列表"""
+        thread = self.info_threads.pop(request_key, None)
+        if thread is not None:
+            self.retired_threads.append(thread)
+    
+    def _on_worker_finished(self, request_key: str, info: dict):
+        """解析線程完成時的處理，只接受目前請求的結果"""
+        self._retire_thread(request_key)
+        if request_key != self.active_request_key:
+            logger.debug(f"捨棄過期的影片資訊: {request_key}")
+            return
+        self._on_video_info_received(info)
+    
+    def _on_worker_error(self, request_key: str, error: str):
+        """解析線程失敗時的處理，只處理目前請求的錯誤"""
+        self._retire_thread(request_key)
+        if request_key != self.active_request_key:
+            return
+        # 允許使用者重新輸入同一網址再試一次
+        self.active_request_key = None
+        self._on_video_info_error(error)
+    
+    def get_info_for_url(self, url: str) -> Optional[dict]:
+        """
+        獲取指定網址的已載入影片資訊
+        
+        Args:
+            url: 影片 URL
+            
+        Returns:
+            目前預覽的影片資訊 (與網址為同一部影片時)，否則返回 None
+        """
+        if not self.video_info:
+            return None
+        
+        video_id = extract_video_id(url)
+        if video_id and video_id == extract_video_id(self.video_info.get('webpage_url', '')):
+            return self.video_info
+        return None
     
     def _on_video_info_received(self, info: dict):
         """接收到影片資訊時的處理"""
@@ -210,28 +306,35 @@ class PreviewFrame(BaseFrame):
         # 更新影片詳細資訊
         self._update_video_details(info)
         
+        # 縮圖以影片 ID 為快取鍵，重新瀏覽同一影片時直接使用快取
+        webpage_url = info.get('webpage_url') or ''
+        self.thumbnail_key = self._make_request_key(webpage_url) if webpage_url else info.get('id')
+        
+        cached_pixmap = self.thumbnail_loader.get_cached(self.thumbnail_key) if self.thumbnail_key else None
+        if cached_pixmap is not None:
+            self.original_pixmap = cached_pixmap
+            self._set_scaled_pixmap()
+            return
+        
         # 獲取縮圖 URL
         thumbnail_url = self._get_best_thumbnail(info)
+        url_resolver = None
         
         if not thumbnail_url:
-            logger.error("未找到合適的縮圖 URL")
-            
-            # 嘗試從 URL 直接獲取 bilibili 縮圖
-            if 'webpage_url' in info and info['webpage_url']:
-                url = info['webpage_url']
-                if 'bilibili' in url:
-                    logger.info("嘗試直接從 bilibili URL 獲取縮圖")
-                    thumbnail_url = self._get_bilibili_thumbnail_from_url(url)
-                    if thumbnail_url:
-                        logger.info(f"成功從 bilibili URL 獲取縮圖: {thumbnail_url}")
-            
-            if not thumbnail_url:
+            # bilibili 影片可改由 API 取得縮圖 (在背景線程執行)
+            if 'bilibili' in webpage_url:
+                logger.info("未找到縮圖 URL，改由 bilibili API 取得")
+                url_resolver = lambda: self._get_bilibili_thumbnail_from_url(webpage_url)
+            else:
+                logger.error("未找到合適的縮圖 URL")
+                self._clear_thumbnail()
                 return
-            
-        logger.info(f"使用縮圖 URL: {thumbnail_url}")
         
-        # 下載縮圖
-        self._load_thumbnail(thumbnail_url)
+        if not self.thumbnail_key:
+            self.thumbnail_key = thumbnail_url
+        
+        # 在背景載入縮圖
+        self._load_thumbnail(self.thumbnail_key, thumbnail_url, url_resolver)
 
     def _update_video_details(self, info: dict):
         """更新影片詳細資訊 (上傳日期、觀看次數、影片長度)"""
@@ -290,58 +393,38 @@ class PreviewFrame(BaseFrame):
         self.title_changed.emit(f"載入失敗: {error}")
     
     # --- 縮圖載入和顯示 --- 
-    def _load_thumbnail(self, url: str):
-        """下載並顯示縮圖"""
-        logger.info(f"開始下載縮圖: {url}")
-        try:
-            # 使用 requests 下載縮圖
-            response = requests.get(url)
-            response.raise_for_status()  # 確保請求成功
-            
-            # 從響應內容創建 QImage
-            image_data = response.content
-            image = QImage()
-            image.loadFromData(image_data)
-            
-            if image.isNull():
-                logger.error(f"無法從 URL 加載圖片: {url}")
-                self._clear_thumbnail()
-                return
-                
-            logger.info(f"成功下載縮圖，尺寸: {image.width()}x{image.height()}")
-            
-            # 創建 QPixmap 並設置
-            pixmap = QPixmap.fromImage(image)
-            self.original_pixmap = pixmap
-            
-            # 縮放並顯示
-            self._set_scaled_pixmap()
-            
-        except Exception as e:
-            logger.error(f"下載或設置縮圖時出錯: {e}", exc_info=True)
-            self._clear_thumbnail()
-
+    def _load_thumbnail(self, key: str, url: Optional[str], url_resolver: Optional[Callable] = None):
+        """在背景下載縮圖，完成後由 _on_thumbnail_ready 顯示"""
+        self.thumbnail_label.setText("載入縮圖中...")
+        self.thumbnail_loader.load(key, url, url_resolver)
+    
+    def _on_thumbnail_ready(self, key: str, pixmap: QPixmap):
+        """縮圖載入完成時的處理，只顯示目前影片的縮圖"""
+        if key != self.thumbnail_key:
+            return
+        
+        logger.info(f"縮圖已載入，尺寸: {pixmap.width()}x{pixmap.height()}")
+        self.original_pixmap = pixmap
+        self._set_scaled_pixmap()
+    
+    def _on_thumbnail_failed(self, key: str, error: str):
+        """縮圖載入失敗時的處理"""
+        if key != self.thumbnail_key:
+            return
+        
+        logger.error(f"無法載入縮圖: {error}")
+        self._clear_thumbnail()
+    
     def _clear_thumbnail(self):
         """清除縮圖"""
         self.thumbnail_label.clear()
         self.thumbnail_label.setText("無法載入縮圖")
         self.original_pixmap = None
-        self._cleanup_temp_file()
         logger.debug("縮圖已清除")
 
-    def _cleanup_temp_file(self):
-        """清理舊的臨時縮圖文件"""
-        if self.temp_thumbnail_path and os.path.exists(self.temp_thumbnail_path):
-            try:
-                os.unlink(self.temp_thumbnail_path)
-                logger.debug(f"已刪除臨時縮圖文件: {self.temp_thumbnail_path}")
-                self.temp_thumbnail_path = None
-            except OSError as e:
-                logger.warning(f"刪除臨時縮圖文件失敗: {e}")
-                self.temp_thumbnail_path = None # 即使刪除失敗也重置路徑
-
     def show_loading(self):
         """顯示加載中狀態"""
+        self.thumbnail_key = None
         self.title_label.setText("載入中...")
         self.thumbnail_label.clear()
         self.thumbnail_label.setText("載入中...") # 在標籤上顯示文字
@@ -352,6 +435,8 @@ class PreviewFrame(BaseFrame):
     def clear_preview(self):
         """清除所有預覽信息"""
         self.video_info = None
+        self.active_request_key = None
+        self.thumbnail_key = None
         self.title_label.setText("尚未載入影片")
         self._clear_thumbnail()
         self.title_changed.emit("尚未載入影片")
@@ -360,98 +445,109 @@ class PreviewFrame(BaseFrame):
         self.view_count_label.setText("觀看次數: --")
         self.duration_label.setText("影片長度: --")
         logger.debug("預覽已清除")
+    
+    def shutdown(self):
+        """停止縮圖載入線程池 (關閉視窗時呼叫)"""
+        self.thumbnail_loader.shutdown()
 
     # --- 事件處理 --- 
     def resizeEvent(self, event):
         """處理視窗或元件大小變化事件"""
         super().resizeEvent(event)
-        logger.debug(f"resizeEvent 觸發，新尺寸: {event.size().width()}x{event.size().height()}")
-        # 延遲一點調用縮放，確保佈局已經更新
-        # QtCore.QTimer.singleShot(0, self._set_scaled_pixmap)
-        # 或者直接調用，看看效果
-        self._set_scaled_pixmap()
-
-    def _set_scaled_pixmap(self):
-        """根據 QLabel 的可用空間縮放並設置 QPixmap，保持 16:9 的寬高比。"""
-        if self.original_pixmap is None:
-            self.thumbnail_label.clear()
-            logger.debug("_set_scaled_pixmap: 清除縮圖")
-            return
-
+        # 調整大小期間使用快速縮放，停止後由計時器進行一次平滑縮放
+        self._set_scaled_pixmap(fast=True)
+        self.smooth_scale_timer.start()
+    
+    def _get_target_size(self) -> Optional[QSize]:
+        """根據縮圖容器的可用空間計算 16:9 的目標尺寸"""
         container_size = self.thumbnail_container.size()
         available_width = container_size.width()
         available_height = container_size.height()
-        logger.debug(f"_set_scaled_pixmap: 容器尺寸 = {available_width}x{available_height}")
-
+        
         if available_width <= 0 or available_height <= 0:
-            logger.warning(f"_set_scaled_pixmap: 容器尺寸無效 ({available_width}x{available_height})，跳過縮放")
-            # 即使尺寸無效，也嘗試設置原始圖片，或者一個預設/錯誤圖片
-            # self.thumbnail_label.setPixmap(self.original_pixmap)
-            return
-
-        # 計算基於寬度的目標尺寸
-        target_width_from_width = available_width
-        target_height_from_width = int(target_width_from_width / self.ASPECT_RATIO)
-
-        # 計算基於高度的目標尺寸
-        target_height_from_height = available_height
-        target_width_from_height = int(target_height_from_height * self.ASPECT_RATIO)
-
-        # 決定最終目標尺寸
-        if target_height_from_width <= available_height:
-            # 使用基於寬度的尺寸 (寬度受限或剛好)
-            target_width = target_width_from_width
-            target_height = target_height_from_width
-            logger.debug(f"縮放決策: 寬度限制. 目標尺寸: {target_width}x{target_height}")
-        else:
-            # 使用基於高度的尺寸 (高度受限)
-            target_width = target_width_from_height
-            target_height = target_height_from_height
-            logger.debug(f"縮放決策: 高度限制. 目標尺寸: {target_width}x{target_height}")
-
-        # 確保目標尺寸有效
+            return None
+        
+        # 寬度受限時以寬度計算，否則以高度計算
+        target_width = available_width
+        target_height = int(available_width / self.ASPECT_RATIO)
+        if target_height > available_height:
+            target_height = available_height
+            target_width = int(available_height * self.ASPECT_RATIO)
+        
         if target_width <= 0 or target_height <= 0:
-            logger.warning(f"_set_scaled_pixmap: 計算出的目標尺寸無效 ({target_width}x{target_height})，跳過縮放")
+            return None
+        return QSize(target_width, target_height)
+    
+    def _ensure_working_pixmap(self):
+        """原圖變更時，建立縮小至螢幕可用尺寸的工作副本並清除縮放快取"""
+        source_key = self.original_pixmap.cacheKey()
+        if source_key == self.working_source_key:
             return
-
-        logger.debug(f"_set_scaled_pixmap: 原始 pixmap 尺寸 = {self.original_pixmap.width()}x{self.original_pixmap.height()}")
-        logger.debug(f"_set_scaled_pixmap: 最終目標縮放尺寸 = {target_width}x{target_height}")
-        # 新增日誌: 比較原始尺寸和目標尺寸，判斷是放大還是縮小
-        if self.original_pixmap.width() < target_width or self.original_pixmap.height() < target_height:
-            logger.warning(f"需要放大縮圖！原始: {self.original_pixmap.width()}x{self.original_pixmap.height()}, 目標: {target_width}x{target_height}")
-        else:
-            logger.debug(f"需要縮小或維持縮圖。原始: {self.original_pixmap.width()}x{self.original_pixmap.height()}, 目標: {target_width}x{target_height}")
-
-        try:
-            # 縮放 pixmap 並保持寬高比，使用更平滑的轉換模式
-            scaled_pixmap = self.original_pixmap.scaled(
-                target_width,
-                target_height,
+        
+        self.working_source_key = source_key
+        self.scaled_cache.clear()
+        
+        # 縮圖不會大於螢幕，超過螢幕的部分只會拖慢每次縮放
+        screen = self.screen()
+        max_size = screen.availableGeometry().size() if screen is not None else QSize(1920, 1080)
+        
+        if (self.original_pixmap.width() > max_size.width()
+                or self.original_pixmap.height() > max_size.height()):
+            self.working_pixmap = self.original_pixmap.scaled(
+                max_size,
                 Qt.AspectRatioMode.KeepAspectRatio,
-                Qt.TransformationMode.SmoothTransformation  # 使用平滑轉換
+                Qt.TransformationMode.SmoothTransformation
             )
-            logger.debug(f"_set_scaled_pixmap: 縮放後 pixmap 尺寸 = {scaled_pixmap.width()}x{scaled_pixmap.height()}")
-
-            # 確保縮放後的尺寸不超過容器，理論上不應發生，但作為安全檢查
-            if scaled_pixmap.width() > available_width or scaled_pixmap.height() > available_height:
-                logger.warning(f"縮放後的 pixmap ({scaled_pixmap.width()}x{scaled_pixmap.height()}) 超出容器 ({available_width}x{available_height})，重新裁剪")
-                # 如果縮放結果超出，則以容器大小再次強制縮放（可能破壞比例，但不應發生）
-                scaled_pixmap = scaled_pixmap.scaled(
-                    available_width,
-                    available_height,
+        else:
+            self.working_pixmap = self.original_pixmap
+    
+    def _set_scaled_pixmap(self, fast: bool = False):
+        """
+        根據 QLabel 的可用空間縮放並設置 QPixmap，保持 16:9 的寬高比。
+        
+        Args:
+            fast: 是否使用快速縮放 (調整大小期間使用，結果不快取)
+        """
+        if self.original_pixmap is None:
+            self.thumbnail_label.clear()
+            return
+        
+        target_size = self._get_target_size()
+        if target_size is None:
+            return
+        
+        try:
+            self._ensure_working_pixmap()
+            
+            cache_key = (target_size.width(), target_size.height())
+            scaled_pixmap = self.scaled_cache.get(cache_key)
+            
+            if scaled_pixmap is not None:
+                self.scaled_cache.move_to_end(cache_key)
+            elif fast:
+                scaled_pixmap = self.working_pixmap.scaled(
+                    target_size,
+                    Qt.AspectRatioMode.KeepAspectRatio,
+                    Qt.TransformationMode.FastTransformation
+                )
+            else:
+                scaled_pixmap = self.working_pixmap.scaled(
+                    target_size,
                     Qt.AspectRatioMode.KeepAspectRatio,
                     Qt.TransformationMode.SmoothTransformation
                 )
-
+                self.scaled_cache[cache_key] = scaled_pixmap
+                while len(self.scaled_cache) > self.SCALED_CACHE_SIZE:
+                    self.scaled_cache.popitem(last=False)
+            
             self.thumbnail_label.setPixmap(scaled_pixmap)
             # 確保 QLabel 尺寸與縮放後的 pixmap 同步，以便佈局正確置中
             self.thumbnail_label.setFixedSize(scaled_pixmap.size())
-            logger.info(f"成功設置縮放後的縮圖，尺寸：{scaled_pixmap.width()}x{scaled_pixmap.height()}")
-
+        
         except Exception as e:
             logger.error(f"縮放或設置 pixmap 時發生錯誤: {e}", exc_info=True)
             self.thumbnail_label.clear() # 出錯時清除
-
+    
     def _get_bilibili_thumbnail_from_url(self, url):
         """從 bilibili URL 直接提取縮圖"""
         try:
@@ -476,16 +572,9 @@ class PreviewFrame(BaseFrame):
             api_url = f"https://api.bilibili.com/x/web-interface/view?bvid={video_id}" if video_id.startswith('BV') else f"https://api.bilibili.com/x/web-interface/view?aid={video_id[2:]}"
             logger.info(f"使用 bilibili API URL: {api_url}")
             
-            # 請求 API
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-                'Referer': 'https://www.bilibili.com'
-            }
-            response = requests.get(api_url, headers=headers)
-            response.raise_for_status()
-            
-            # 解析 JSON 響應
-            data = response.json()
+            # 請求 API (使用 bilibili 平台設定的 headers)
+            headers = get_platform_profile("bilibili").http_headers
+            data = get_http_client().get_json(api_url, headers=headers)
             if data['code'] == 0 and 'data' in data:
                 pic_url = data['data'].get('pic')
                 if pic_url:
@@ -509,10 +598,7 @@ class PreviewFrame(BaseFrame):
                 logger.info(f"使用 bilibili 'thumbnail' 字段: {info['thumbnail']}")
                 return info['thumbnail']
             
-            # 嘗試直接從 URL 獲取縮圖
-            bilibili_thumbnail = self._get_bilibili_thumbnail_from_url(info['webpage_url'])
-            if bilibili_thumbnail:
-                return bilibili_thumbnail
+            # 沒有縮圖字段時由呼叫端改用 bilibili API (需網路請求，不在此處執行)
         
         # 檢查 info 中的縮圖信息
         thumbnails = info.get('thumbnails', [])
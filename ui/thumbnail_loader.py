@@ -0,0 +1,254 @@
+"""
+縮圖載入元件
+
+在背景線程下載縮圖，並提供兩層快取：
+記憶體中已解碼的 QPixmap (依位元組預算淘汰) 和以影片 ID 為鍵的磁碟快取
+"""
+
+import os
+import re
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Callable
+
+from PySide6.QtCore import QObject, Signal
+from PySide6.QtGui import QPixmap, QImage
+
+from core.http_client import get_http_client
+from utils.paths import get_cache_dir
+
+# 設置日誌
+logger = logging.getLogger(__name__)
+
+
+class PixmapMemoryCache:
+    """已解碼縮圖的記憶體 LRU 快取，以位元組預算限制容量"""
+    
+    def __init__(self, max_bytes: int):
+        """
+        初始化記憶體快取
+        
+        Args:
+            max_bytes: 容量上限 (位元組)
+        """
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._items = OrderedDict()  # key -> (pixmap, 位元組數)
+    
+    @staticmethod
+    def _pixmap_bytes(pixmap: QPixmap) -> int:
+        """估算 QPixmap 佔用的記憶體"""
+        return pixmap.width() * pixmap.height() * max(pixmap.depth(), 8) // 8
+    
+    def get(self, key: str) -> Optional[QPixmap]:
+        """讀取快取，命中時移到最近使用的位置"""
+        item = self._items.get(key)
+        if item is None:
+            return None
+        self._items.move_to_end(key)
+        return item[0]
+    
+    def put(self, key: str, pixmap: QPixmap):
+        """寫入快取，超出預算時淘汰最久未使用的項目"""
+        size = self._pixmap_bytes(pixmap)
+        if size > self.max_bytes:
+            return
+        
+        old = self._items.pop(key, None)
+        if old is not None:
+            self.total_bytes -= old[1]
+        
+        self._items[key] = (pixmap, size)
+        self.total_bytes += size
+        
+        while self.total_bytes > self.max_bytes and self._items:
+            _, (_, evicted_size) = self._items.popitem(last=False)
+            self.total_bytes -= evicted_size
+
+
+class ThumbnailDiskCache:
+    """以影片 ID 為鍵的縮圖磁碟快取，依最近使用時間淘汰"""
+    
+    def __init__(self, directory: str, max_bytes: int):
+        """
+        初始化磁碟快取
+        
+        Args:
+            directory: 快取目錄
+            max_bytes: 容量上限 (位元組)
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+    
+    def _path(self, key: str) -> str:
+        """將快取鍵轉為安全的檔案路徑"""
+        return os.path.join(self.directory, re.sub(r'[^\w\-]', '_', key) + ".img")
+    
+    def get(self, key: str) -> Optional[bytes]:
+        """讀取快取的圖片資料"""
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)  # 更新最近使用時間
+            return data
+        except OSError:
+            return None
+    
+    def put(self, key: str, data: bytes):
+        """寫入圖片資料，超出容量時淘汰最久未使用的檔案"""
+        path = self._path(key)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        
+        try:
+            with open(temp_path, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        except OSError as e:
+            logger.warning(f"寫入縮圖快取失敗: {e}")
+            return
+        
+        with self._lock:
+            self._prune()
+    
+    def _prune(self):
+        """淘汰最久未使用的檔案直到低於容量上限"""
+        try:
+            entries = [entry for entry in os.scandir(self.directory)
+                       if entry.is_file() and entry.name.endswith(".img")]
+        except OSError:
+            return
+        
+        stats = [(entry.path, entry.stat()) for entry in entries]
+        total = sum(stat.st_size for _, stat in stats)
+        if total <= self.max_bytes:
+            return
+        
+        for path, stat in sorted(stats, key=lambda item: item[1].st_mtime):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+                total -= stat.st_size
+            except OSError:
+                pass
+
+
+class ThumbnailLoader(QObject):
+    """縮圖載入器，在背景線程池下載並解碼縮圖，結果以信號送回 UI 線程"""
+    
+    # 自定義信號
+    thumbnail_ready = Signal(str, QPixmap)  # 縮圖可用時發出 (快取鍵, 縮圖)
+    thumbnail_failed = Signal(str, str)  # 縮圖載入失敗時發出 (快取鍵, 錯誤訊息)
+    
+    # 內部信號：工作線程解碼完成 (QPixmap 只能在 UI 線程建立，因此先傳 QImage)
+    _image_decoded = Signal(str, QImage)
+    _fetch_failed = Signal(str, str)
+    
+    # 預設設定
+    DEFAULT_MAX_WORKERS = 4
+    DEFAULT_MEMORY_BYTES = 48 * 1024 * 1024
+    DEFAULT_DISK_BYTES = 100 * 1024 * 1024
+    
+    def __init__(self, parent=None, max_workers: int = DEFAULT_MAX_WORKERS,
+                 memory_bytes: int = DEFAULT_MEMORY_BYTES, disk_bytes: int = DEFAULT_DISK_BYTES):
+        """
+        初始化縮圖載入器
+        
+        Args:
+            parent: 父物件
+            max_workers: 背景下載線程數
+            memory_bytes: 記憶體快取容量 (位元組)
+            disk_bytes: 磁碟快取容量 (位元組)
+        """
+        super().__init__(parent)
+        self.memory_cache = PixmapMemoryCache(memory_bytes)
+        self.disk_cache = ThumbnailDiskCache(get_cache_dir("thumbnails"), disk_bytes)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="thumbnail")
+        
+        # 進行中的載入 (快取鍵 -> Future，同一縮圖只下載一次)
+        self.pending = {}
+        
+        self._image_decoded.connect(self._on_image_decoded)
+        self._fetch_failed.connect(self._on_fetch_failed)
+    
+    def get_cached(self, key: str) -> Optional[QPixmap]:
+        """
+        從記憶體快取讀取縮圖 (不會觸發任何 I/O)
+        
+        Args:
+            key: 快取鍵 (平台與影片 ID)
+        
+        Returns:
+            縮圖，未命中時返回 None
+        """
+        return self.memory_cache.get(key)
+    
+    def load(self, key: str, url: Optional[str], url_resolver: Optional[Callable[[], Optional[str]]] = None):
+        """
+        載入縮圖，完成後發出 thumbnail_ready 或 thumbnail_failed
+        
+        Args:
+            key: 快取鍵 (平台與影片 ID)
+            url: 縮圖 URL
+            url_resolver: 沒有 URL 時在背景線程呼叫以取得 URL 的函數
+        """
+        pixmap = self.memory_cache.get(key)
+        if pixmap is not None:
+            self.thumbnail_ready.emit(key, pixmap)
+            return
+        
+        if key in self.pending:
+            return
+        
+        self.pending[key] = self.executor.submit(self._fetch, key, url, url_resolver)
+    
+    def shutdown(self):
+        """停止背景線程池，取消尚未開始的載入，不等待進行中的下載"""
+        # 逐一取消 (ThreadPoolExecutor.shutdown 的 cancel_futures 需要 Python 3.9)
+        for future in list(self.pending.values()):
+            future.cancel()
+        self.executor.shutdown(wait=False)
+    
+    def _fetch(self, key: str, url: Optional[str], url_resolver: Optional[Callable[[], Optional[str]]]):
+        """背景線程：依序嘗試磁碟快取和網路下載，並解碼圖片"""
+        try:
+            data = self.disk_cache.get(key)
+            from_network = data is None
+            
+            if from_network:
+                if not url and url_resolver is not None:
+                    url = url_resolver()
+                if not url:
+                    raise ValueError("找不到縮圖 URL")
+                
+                logger.info(f"開始下載縮圖: {url}")
+                # 縮圖已有磁碟快取，不必再保存在條件式請求快取中
+                data = get_http_client().get_content(url, conditional=False)
+            
+            image = QImage()
+            image.loadFromData(data)
+            if image.isNull():
+                raise ValueError(f"無法解碼縮圖: {url or key}")
+            
+            if from_network:
+                self.disk_cache.put(key, data)
+            self._image_decoded.emit(key, image)
+        except Exception as e:
+            logger.error(f"載入縮圖時出錯: {e}")
+            self._fetch_failed.emit(key, str(e))
+    
+    def _on_image_decoded(self, key: str, image: QImage):
+        """UI 線程：轉換為 QPixmap 並寫入記憶體快取"""
+        self.pending.pop(key, None)
+        pixmap = QPixmap.fromImage(image)
+        self.memory_cache.put(key, pixmap)
+        self.thumbnail_ready.emit(key, pixmap)
+    
+    def _on_fetch_failed(self, key: str, error: str):
+        """UI 線程：載入失敗的處理"""
+        self.pending.pop(key, None)
+        self.thumbnail_failed.emit(key, error)
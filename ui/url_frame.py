@@ -8,7 +8,7 @@ from PySide6.QtWidgets import (
     QLineEdit, QPushButton, QLabel, QHBoxLayout, QVBoxLayout, 
     QComboBox, QCompleter
 )
-from PySide6.QtCore import Qt, Signal
+from PySide6.QtCore import Qt, Signal, QTimer
 from PySide6.QtGui import QIcon
 
 from .base import BaseFrame
@@ -19,9 +19,12 @@ class UrlInputFrame(BaseFrame):
     """URL 輸入框架，處理 URL 輸入和平台檢測"""
     
     # 自定義信號
-    url_changed = Signal(str)  # URL 變更時發出
+    url_changed = Signal(str)  # URL 停止輸入且驗證通過後發出 (清理後的 URL，無效或清空時為空字串)
     platform_detected = Signal(str)  # 平台檢測時發出
     
+    # 停止輸入多久後才發出 url_changed (毫秒)
+    DEBOUNCE_MS = 400
+    
     def __init__(self, parent=None):
         """初始化 URL 輸入框架"""
         # 歷史記錄 - 移到 super().__init__ 之前初始化
@@ -30,8 +33,17 @@ class UrlInputFrame(BaseFrame):
         # URL 處理器
         self.url_processor = UrlProcessor()
         
+        # 最後一次發出的 URL，避免重複觸發預覽
+        self.last_emitted_url = ""
+        
         super().__init__(parent)
         
+        # 輸入防抖計時器
+        self.debounce_timer = QTimer(self)
+        self.debounce_timer.setSingleShot(True)
+        self.debounce_timer.setInterval(self.DEBOUNCE_MS)
+        self.debounce_timer.timeout.connect(self._emit_url_changed)
+        
     def setup_ui(self):
         """設置 UI 元件"""
         # 標題
@@ -79,13 +91,13 @@ class UrlInputFrame(BaseFrame):
     
     def _on_url_changed(self, url):
         """URL 變更時的處理"""
-        # 發出 URL 變更信號
-        self.url_changed.emit(url)
+        # 重新計時，停止輸入後才發出 URL 變更信號
+        self.debounce_timer.start()
         
         # 檢測平台
         if url:
             platform = self.url_processor.detect_platform(url)
-            if platform:
+            if platform != UrlProcessor.PLATFORM_UNKNOWN:
                 self.platform_label.setText(f"平台: {platform}")
                 self.platform_detected.emit(platform)
             else:
@@ -95,6 +107,21 @@ class UrlInputFrame(BaseFrame):
             self.platform_label.setText("")
             self.platform_detected.emit("")
     
+    def _emit_url_changed(self):
+        """輸入停止後驗證 URL，並在內容確實改變時發出 URL 變更信號"""
+        url = self.get_url()
+        
+        if url and self.url_processor.validate_url(url):
+            url = self.url_processor.clean_url(url)
+        else:
+            url = ""
+        
+        if url == self.last_emitted_url:
+            return
+        
+        self.last_emitted_url = url
+        self.url_changed.emit(url)
+    
     def _on_clear_clicked(self):
         """清除按鈕點擊時的處理"""
         self.url_input.clear()
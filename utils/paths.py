@@ -0,0 +1,81 @@
+"""
+應用程式路徑工具模組
+
+提供快取和資料檔案的存放位置，依作業系統選擇適合的使用者目錄
+"""
+
+import os
+import sys
+from typing import Optional
+
+# 應用程式目錄名稱
+APP_DIR_NAME = "youtube_downloader"
+
+# 可用環境變數覆寫根目錄 (便於可攜式安裝或伺服器部署)
+HOME_ENV_VAR = "YTDL_HOME"
+
+
+def _get_base_dir(kind: str) -> str:
+    """
+    獲取指定類型的使用者目錄
+    
+    Args:
+        kind: 目錄類型 ("cache" 或 "data")
+    
+    Returns:
+        基礎目錄路徑
+    """
+    override = os.environ.get(HOME_ENV_VAR)
+    if override:
+        return os.path.join(override, kind)
+    
+    home = os.path.expanduser("~")
+    
+    if sys.platform == "win32":
+        root = os.environ.get("LOCALAPPDATA") or os.path.join(home, "AppData", "Local")
+        return os.path.join(root, APP_DIR_NAME, kind)
+    
+    if sys.platform == "darwin":
+        if kind == "cache":
+            return os.path.join(home, "Library", "Caches", APP_DIR_NAME)
+        return os.path.join(home, "Library", "Application Support", APP_DIR_NAME)
+    
+    if kind == "cache":
+        root = os.environ.get("XDG_CACHE_HOME") or os.path.join(home, ".cache")
+    else:
+        root = os.environ.get("XDG_DATA_HOME") or os.path.join(home, ".local", "share")
+    return os.path.join(root, APP_DIR_NAME)
+
+
+def get_cache_dir(subdir: Optional[str] = None) -> str:
+    """
+    獲取快取目錄 (可隨時刪除的資料)，目錄不存在時自動建立
+    
+    Args:
+        subdir: 子目錄名稱
+    
+    Returns:
+        快取目錄路徑
+    """
+    path = _get_base_dir("cache")
+    if subdir:
+        path = os.path.join(path, subdir)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def get_data_dir(subdir: Optional[str] = None) -> str:
+    """
+    獲取資料目錄 (需要保留的資料)，目錄不存在時自動建立
+    
+    Args:
+        subdir: 子目錄名稱
+    
+    Returns:
+        資料目錄路徑
+    """
+    path = _get_base_dir("data")
+    if subdir:
+        path = os.path.join(path, subdir)
+    os.makedirs(path, exist_ok=True)
+    return path